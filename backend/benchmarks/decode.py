@@ -0,0 +1,98 @@
+"""
+CPU cost of rendering a page of stored assessments
+Compares the previous path (PatientAssessmentResponse per row, then FastAPI's
+response-model validation and JSONResponse) with rendering straight from
+schema-versioned documents, and with legacy documents that still need validation
+
+Usage: python -m backend.benchmarks.decode [--rows 1000] [--repeat 20]
+No server or database is needed
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend.models.documents import ASSESSMENT_SCHEMA_VERSION, render_assessments
+from backend.models.patient_assessment import PatientAssessment, PatientAssessmentResponse
+from backend.services.risk_calculator import IMWGRiskCalculator
+
+def stored_documents(rows: int, schema_version=ASSESSMENT_SCHEMA_VERSION) -> List[dict]:
+    """Calculated assessments as they are stored, with Mongo's _id"""
+    
+    documents = []
+    for index in range(rows):
+        assessment = PatientAssessment(
+            patient_id=f"P{index:06d}",
+            patient_name="Benchmark Patient",
+            del17p_tp53="positive" if index % 3 == 0 else "negative",
+            translocation_combo="negative",
+            del1p32_1q="positive" if index % 5 == 0 else "negative",
+            b2m_value=round(2 + index % 70 / 10, 1),
+            creatinine_value=round(0.6 + index % 12 / 10, 1),
+            clinical_notes="Initial assessment. " * 20,
+            physician_name="Dr. Smith",
+            institution="General Hospital",
+        )
+        mask = IMWGRiskCalculator.criteria_mask(assessment)
+        result = IMWGRiskCalculator.build_result(assessment, mask)
+        document = assessment.model_dump()
+        document.update(
+            risk_result=result.risk_result.value,
+            risk_factors=[factor.model_dump() for factor in result.risk_factors],
+            total_risk_factors=result.total_risk_factors,
+            latest_result=IMWGRiskCalculator.snapshot(result, mask).model_dump(),
+            status="COMPLETED",
+            updated_at=datetime.utcnow(),
+            _id=f"{index:024x}",
+        )
+        if schema_version is not None:
+            document["schema_version"] = schema_version
+        documents.append(document)
+    return documents
+
+RESPONSE_FIELD = create_response_field(name="response", type_=List[PatientAssessmentResponse])
+
+def previous_path(documents: List[dict], loop: asyncio.AbstractEventLoop) -> bytes:
+    models = [PatientAssessmentResponse(**document) for document in documents]
+    content = loop.run_until_complete(
+        serialize_response(field=RESPONSE_FIELD, response_content=models, is_coroutine=True)
+    )
+    return JSONResponse(content).body
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    loop = asyncio.new_event_loop()
+    trusted = stored_documents(args.rows)
+    legacy = stored_documents(args.rows, schema_version=None)
+    
+    # The fast path must produce the same JSON as the response model
+    if json.loads(render_assessments(trusted)) != json.loads(previous_path(trusted, loop)):
+        raise SystemExit("Trusted rendering differs from the response model")
+    
+    before = best_of(args.repeat, lambda: previous_path(trusted, loop))
+    print(f"{args.rows}-row page, best of {args.repeat}")
+    print(f"{'previous (model + response validation)':<40} {before * 1000:8.2f} ms")
+    for label, documents in (("trusted (schema-versioned)", trusted), ("legacy (validated)", legacy)):
+        seconds = best_of(args.repeat, lambda: render_assessments(documents))
+        print(f"{label:<40} {seconds * 1000:8.2f} ms   {before / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Offline equivalence and throughput harness for the IMWG risk calculator
+Generates random and boundary-focused assessments and checks that every engine
+agrees with IMWGRiskCalculator.calculate_risk:
+
+- vectorized: IMWGRiskCalculator.criteria_masks over NumPy columns
+- node: the IMWGRiskCalculator class in backend/server.js, run under Node.js
+
+Usage: python -m backend.benchmarks.equivalence [--cases 1000000] [--seed 0] [--strict-text]
+No server or database is needed; engines whose runtime is missing are skipped
+"""
+import argparse
+import json
+import math
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from backend.models.patient_assessment import PatientAssessment
+from backend.services.risk_calculator import (
+    IMWGRiskCalculator,
+    B2M_CUTOFF,
+    CREATININE_CUTOFF
+)
+
+SERVER_JS = Path(__file__).resolve().parents[1] / "server.js"
+
+STATUSES = ("positive", "negative")
+
+# Node driver: reads JSON arrays of assessments from stdin, one array per line,
+# and writes one JSON array of results per line
+NODE_DRIVER = """
+const readline = require('readline');
+%s
+const lines = readline.createInterface({ input: process.stdin });
+lines.on('line', (line) => {
+  const results = JSON.parse(line).map((assessment) => {
+    try {
+      const result = IMWGRiskCalculator.calculateRisk(assessment);
+      delete result.calculated_at;
+      return result;
+    } catch (error) {
+      return { error: String(error) };
+    }
+  });
+  process.stdout.write(JSON.stringify(results) + '\\n');
+});
+"""
+
+def _around(value: float, rng: random.Random) -> float:
+    """A value at, just beside, or close to a cutoff"""
+    
+    choice = rng.randrange(4)
+    if choice == 0:
+        return value
+    if choice == 1:
+        return math.nextafter(value, -math.inf)
+    if choice == 2:
+        return math.nextafter(value, math.inf)
+    return round(value + rng.uniform(-0.05, 0.05), rng.choice((1, 2, 3, 6)))
+
+def _lab_value(cutoff: float, upper: float, rng: random.Random) -> Optional[float]:
+    choice = rng.randrange(10)
+    if choice == 0:
+        return None
+    if choice < 5:
+        return _around(cutoff, rng)
+    if choice == 5:
+        return rng.choice((0.0, upper, float(round(cutoff))))
+    return round(rng.uniform(0, upper), rng.choice((1, 2, 6)))
+
+def generate_cases(count: int, seed: int) -> Iterator[Dict]:
+    """Random assessments concentrated around the criterion 4 cutoffs"""
+    
+    rng = random.Random(seed)
+    for _ in range(count):
+        case = {
+            "del17p_tp53": rng.choice(STATUSES),
+            "translocation_combo": rng.choice(STATUSES),
+            "del1p32_1q": rng.choice(STATUSES),
+            "b2m_value": _lab_value(B2M_CUTOFF, 50.0, rng),
+            "creatinine_value": _lab_value(CREATININE_CUTOFF, 20.0, rng),
+        }
+        # Values around the borderline β2M note of standard-risk interpretations
+        if rng.randrange(8) == 0:
+            case["b2m_value"] = _around(4.0, rng)
+        yield case
+
+def scalar_results(cases: List[Dict]) -> List[Dict]:
+    results = []
+    for case in cases:
+        result = IMWGRiskCalculator.calculate_risk(PatientAssessment(id="case", **case))
+        results.append(result.model_dump(mode="json", exclude={"calculated_at", "assessment_id"}))
+    return results
+
+def vectorized_masks(cases: List[Dict]):
+    import numpy as np
+    
+    def labs(name):
+        return np.array(
+            [math.nan if case[name] is None else case[name] for case in cases], dtype=np.float64
+        )
+    
+    def positive(name):
+        return np.array([case[name] == "positive" for case in cases], dtype=bool)
+    
+    return IMWGRiskCalculator.criteria_masks(
+        positive("del17p_tp53"),
+        positive("translocation_combo"),
+        positive("del1p32_1q"),
+        labs("b2m_value"),
+        labs("creatinine_value")
+    )
+
+class NodeEngine:
+    """The calculator class from backend/server.js, run in a Node.js subprocess"""
+    
+    def __init__(self, node: str):
+        source = SERVER_JS.read_text()
+        match = re.search(r"^class IMWGRiskCalculator \{.*?^\}$", source, re.S | re.M)
+        if match is None:
+            raise RuntimeError("IMWGRiskCalculator class not found in server.js")
+        self._script = tempfile.NamedTemporaryFile("w", suffix=".js", delete=False)
+        self._script.write(NODE_DRIVER % match.group(0))
+        self._script.close()
+        self._process = subprocess.Popen(
+            [node, self._script.name],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8"
+        )
+    
+    def results(self, cases: List[Dict]) -> List[Dict]:
+        self._process.stdin.write(json.dumps(cases) + "\n")
+        self._process.stdin.flush()
+        return json.loads(self._process.stdout.readline())
+    
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+        Path(self._script.name).unlink()
+
+def classification(result: Dict) -> tuple:
+    """The parts of a result that must agree exactly between engines"""
+    
+    return (
+        result["risk_result"],
+        tuple(factor["criterion"] for factor in result["risk_factors"]),
+        tuple(result["recommendations"]),
+    )
+
+def text(result: Dict) -> tuple:
+    return (
+        result["clinical_interpretation"],
+        tuple(factor["description"] for factor in result["risk_factors"]),
+    )
+
+class Tally:
+    def __init__(self, name: str):
+        self.name = name
+        self.checked = 0
+        self.mismatches = 0
+        self.text_mismatches = 0
+        self.seconds = 0.0
+        self.examples: List[str] = []
+    
+    def record(self, case: Dict, expected, actual, kind: str = "classification"):
+        if kind == "classification":
+            self.mismatches += 1
+        else:
+            self.text_mismatches += 1
+        if len(self.examples) < 5:
+            self.examples.append(f"{kind}: {json.dumps(case)}\n      expected {expected!r}\n      actual   {actual!r}")
+    
+    def report(self, scalar_seconds: Optional[float] = None):
+        rate = self.checked / self.seconds if self.seconds else float("inf")
+        speedup = f"   {scalar_seconds / self.seconds:7.1f}x scalar" if scalar_seconds and self.seconds else ""
+        print(f"{self.name:<12} {self.checked:>10} checked   {self.mismatches:>6} mismatches   "
+              f"{self.text_mismatches:>6} text mismatches   {rate:14,.0f} cases/s{speedup}")
+        for example in self.examples:
+            print(f"    {example}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=20_000)
+    parser.add_argument("--strict-text", action="store_true",
+                        help="Treat interpretation/description text differences as failures")
+    parser.add_argument("--node", default=shutil.which("node"), help="Node.js binary")
+    args = parser.parse_args()
+    
+    try:
+        import numpy  # noqa: F401
+        check_vectorized = True
+    except ImportError:
+        print("numpy not installed, skipping the vectorized engine")
+        check_vectorized = False
+    
+    node = NodeEngine(args.node) if args.node else None
+    if node is None:
+        print("node not found, skipping the server.js engine")
+    
+    scalar = Tally("scalar")
+    vectorized = Tally("vectorized")
+    javascript = Tally("server.js")
+    
+    cases_iter = generate_cases(args.cases, args.seed)
+    try:
+        while True:
+            cases = [case for _, case in zip(range(args.chunk), cases_iter)]
+            if not cases:
+                break
+            
+            start = time.perf_counter()
+            expected = scalar_results(cases)
+            scalar.seconds += time.perf_counter() - start
+            scalar.checked += len(cases)
+            
+            if check_vectorized:
+                start = time.perf_counter()
+                masks = vectorized_masks(cases)
+                vectorized.seconds += time.perf_counter() - start
+                vectorized.checked += len(cases)
+                for case, result, mask in zip(cases, expected, masks):
+                    expected_mask = IMWGRiskCalculator.criteria_mask(
+                        PatientAssessment(id="case", **case)
+                    )
+                    if int(mask) != expected_mask:
+                        vectorized.record(case, expected_mask, int(mask))
+            
+            if node is not None:
+                start = time.perf_counter()
+                actual = node.results(cases)
+                javascript.seconds += time.perf_counter() - start
+                javascript.checked += len(cases)
+                for case, want, got in zip(cases, expected, actual):
+                    if "error" in got:
+                        javascript.record(case, classification(want), got["error"])
+                    elif classification(want) != classification(got):
+                        javascript.record(case, classification(want), classification(got))
+                    elif text(want) != text(got):
+                        javascript.record(case, text(want), text(got), kind="text")
+    finally:
+        if node is not None:
+            node.close()
+    
+    scalar.report()
+    if check_vectorized:
+        vectorized.report(scalar.seconds)
+    if node is not None:
+        javascript.report(scalar.seconds)
+    
+    failures = vectorized.mismatches + javascript.mismatches
+    if args.strict_text:
+        failures += javascript.text_mismatches
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+String vs BSON Binary UUID id benchmark
+Loads the same uuid4 ids into two collections, one as strings and one as
+Binary subtype 4, indexes both like the assessments `id` index and reports
+data size, index size and point-lookup latency
+
+Usage: python -m backend.benchmarks.id_storage [--rows 2000000] [--lookups 20000]
+Runs against MONGO_URL using a scratch database that is dropped afterwards
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from backend.services.histogram import LatencyHistogram
+from backend.repositories.binary_ids import encode_id, id_filter
+
+INSERT_BATCH = 10000
+
+async def load(db, rows: int, seed: int) -> list:
+    """Insert `rows` ids in both encodings and return them as strings"""
+    
+    rng = random.Random(seed)
+    ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(rows)]
+    for start in range(0, rows, INSERT_BATCH):
+        batch = ids[start:start + INSERT_BATCH]
+        await asyncio.gather(
+            db.string_ids.insert_many([{"id": value} for value in batch], ordered=False),
+            db.binary_ids.insert_many([{"id": encode_id(value)} for value in batch], ordered=False)
+        )
+    await asyncio.gather(
+        db.string_ids.create_index("id", unique=True),
+        db.binary_ids.create_index("id", unique=True)
+    )
+    return ids
+
+async def lookups(collection, ids: list, count: int, to_filter, seed: int) -> LatencyHistogram:
+    rng = random.Random(seed)
+    histogram = LatencyHistogram()
+    for _ in range(count):
+        value = rng.choice(ids)
+        start = time.perf_counter()
+        await collection.find_one({"id": to_filter(value)}, {"_id": 0, "id": 1})
+        histogram.record(time.perf_counter() - start)
+    return histogram
+
+async def run(rows: int, count: int, seed: int) -> dict:
+    os.environ['DB_NAME'] = 'imwg_id_storage_bench'
+    from backend import database
+    
+    db = database.get_db()
+    results = {}
+    try:
+        await database.get_client().drop_database(db.name)
+        start = time.perf_counter()
+        ids = await load(db, rows, seed)
+        print(f"loaded {rows:,} rows per collection in {time.perf_counter() - start:.1f} s")
+        
+        variants = {
+            "string": (db.string_ids, lambda value: value),
+            "binary": (db.binary_ids, encode_id),
+            # What the repository issues in binary mode until every id is migrated
+            "binary_or_string": (db.binary_ids, id_filter),
+        }
+        for name, (collection, to_filter) in variants.items():
+            stats = await db.command("collStats", collection.name)
+            # Warm the index into the cache before timing
+            await lookups(collection, ids, min(count, 1000), to_filter, seed + 1)
+            results[name] = {
+                "data_size": stats["size"],
+                "index_size": stats["indexSizes"]["id_1"],
+                "latency": await lookups(collection, ids, count, to_filter, seed + 2),
+            }
+    finally:
+        await database.get_client().drop_database(db.name)
+        database.close_client()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    results = asyncio.run(run(args.rows, args.lookups, args.seed))
+    baseline = results["string"]
+    for name, result in results.items():
+        latency = result["latency"]
+        print(f"{name:<17} data {result['data_size'] / 2**20:8.1f} MiB   "
+              f"id index {result['index_size'] / 2**20:8.1f} MiB "
+              f"({result['index_size'] / baseline['index_size']:.0%})   "
+              f"lookup p50 {latency.percentile(50):6.3f} ms  p99 {latency.percentile(99):6.3f} ms")
+
+if __name__ == "__main__":
+    main()
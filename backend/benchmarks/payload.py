@@ -0,0 +1,94 @@
+"""
+Bytes-on-wire and latency benchmark for list and history responses
+Requests representative pages from a running deployment with identity, gzip
+and br encodings and reports the compressed size and latency of each
+
+Usage: python -m backend.benchmarks.payload [--base-url http://localhost:8001] [--seed 1000]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+import httpx
+
+from backend.benchmarks.scenarios import assessment_payload, update_payloads
+
+ENCODINGS = ("identity", "gzip", "br")
+
+# Multi-paragraph notes, like the clinical interpretations stored with results
+CLINICAL_NOTES = (
+    "Patient presented with bone pain and anaemia. Serum protein electrophoresis "
+    "showed an M-protein of 3.1 g/dL; bone marrow biopsy confirmed 40% clonal "
+    "plasma cells. FISH panel ordered for del(17p), t(4;14), t(14;16) and 1q gain.\n\n"
+    "Renal function preserved. Discussed induction options and transplant "
+    "eligibility with the patient and family; follow-up in two weeks."
+)
+
+def seed_assessments(client: httpx.Client, count: int, seed: int) -> List[str]:
+    """Create, calculate and edit `count` assessments so lists and histories have realistic content"""
+    
+    rng = random.Random(seed)
+    ids = []
+    for _ in range(count):
+        payload = dict(assessment_payload(rng), clinical_notes=CLINICAL_NOTES)
+        response = client.post("/api/assessments/", json=payload)
+        response.raise_for_status()
+        assessment_id = response.json()["id"]
+        client.post(f"/api/assessments/{assessment_id}/calculate").raise_for_status()
+        for update in update_payloads(rng):
+            client.put(f"/api/assessments/{assessment_id}", json=update).raise_for_status()
+        ids.append(assessment_id)
+    return ids
+
+def measure(client: httpx.Client, path: str, encoding: str, repeat: int) -> Tuple[int, List[float]]:
+    """Raw response bytes (as received, before decoding) and latencies in ms"""
+    
+    size = 0
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+            response.raise_for_status()
+            size = sum(len(chunk) for chunk in response.iter_raw())
+        latencies.append((time.perf_counter() - start) * 1000)
+    return size, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default=os.environ.get("BACKEND_URL", "http://localhost:8001"))
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Create this many assessments with calculations and edits first")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    with httpx.Client(base_url=args.base_url.rstrip("/"), timeout=60) as client:
+        ids = seed_assessments(client, args.seed, seed=0) if args.seed else []
+        if not ids:
+            listed = client.get("/api/assessments/", params={"limit": 1}).json()
+            if not listed:
+                raise SystemExit("No assessments found; run with --seed N to create some")
+            ids = [listed[0]["id"]]
+        
+        pages = [
+            ("list, 100", "/api/assessments/?limit=100"),
+            ("list, 1000", "/api/assessments/?limit=1000"),
+            ("history, page", f"/api/assessments/{ids[0]}/history"),
+            ("history, 500", f"/api/assessments/{ids[0]}/history?limit=500"),
+            ("assessment", f"/api/assessments/{ids[0]}?include=result"),
+        ]
+        
+        print(f"{'response':<16} {'encoding':<9} {'bytes':>10} {'ratio':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, path in pages:
+            identity_size = None
+            for encoding in ENCODINGS:
+                size, latencies = measure(client, path, encoding, args.repeat)
+                identity_size = identity_size or size
+                p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+                print(f"{label:<16} {encoding:<9} {size:>10,} {identity_size / max(size, 1):6.1f}x "
+                      f"{statistics.median(latencies):8.2f} {p95:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Assessment payloads for load generation
+The risk scenarios of risk_calculation_test.py and backend_test.py, one per
+IMWG criterion plus the standard-risk case and the lab edge cases
+"""
+import random
+from typing import Dict, List
+
+SCENARIOS: Dict[str, Dict] = {
+    "standard_risk": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "negative",
+        "b2m_value": 3.5,
+        "creatinine_value": 0.9,
+    },
+    "del17p_tp53": {
+        "del17p_tp53": "positive",
+        "translocation_combo": "negative",
+        "del1p32_1q": "negative",
+        "b2m_value": 3.5,
+        "creatinine_value": 0.9,
+    },
+    "translocation_combo": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "positive",
+        "del1p32_1q": "negative",
+        "b2m_value": 3.5,
+        "creatinine_value": 0.9,
+    },
+    "del1p32_1q": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "positive",
+        "b2m_value": 3.5,
+        "creatinine_value": 0.9,
+    },
+    "high_b2m_normal_creatinine": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "negative",
+        "b2m_value": 6.0,
+        "creatinine_value": 1.0,
+    },
+    "multiple_factors": {
+        "del17p_tp53": "positive",
+        "translocation_combo": "positive",
+        "del1p32_1q": "negative",
+        "b2m_value": 6.0,
+        "creatinine_value": 1.0,
+    },
+    "high_b2m_high_creatinine": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "negative",
+        "b2m_value": 6.0,
+        "creatinine_value": 1.5,
+    },
+    "no_labs": {
+        "del17p_tp53": "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "negative",
+    },
+}
+
+PHYSICIANS = ["Dr. Smith", "Dr. Johnson", "Dr. Williams", "Dr. Brown"]
+INSTITUTIONS = ["General Hospital", "University Medical Center", "Cancer Institute"]
+
+def assessment_payload(rng: random.Random, patients: int = 10_000) -> Dict:
+    """A create payload for a random scenario and one of `patients` patients"""
+    
+    scenario = rng.choice(list(SCENARIOS))
+    patient = rng.randrange(patients)
+    return {
+        "patient_id": f"LOAD{patient:06d}",
+        "patient_name": f"Load Test Patient {patient}",
+        **SCENARIOS[scenario],
+        "clinical_notes": f"Load test: {scenario}",
+        "physician_name": rng.choice(PHYSICIANS),
+        "institution": rng.choice(INSTITUTIONS),
+    }
+
+def update_payloads(rng: random.Random) -> List[Dict]:
+    """Small edits like the update steps of backend_test.py"""
+    
+    return [
+        {"clinical_notes": "Updated assessment"},
+        {"del17p_tp53": rng.choice(("positive", "negative"))},
+        {"b2m_value": round(rng.uniform(1, 8), 1), "creatinine_value": round(rng.uniform(0.6, 1.6), 1)},
+    ]
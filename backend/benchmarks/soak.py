@@ -0,0 +1,288 @@
+"""
+Open-loop load generator and soak test for a running deployment
+Replays a weighted mix of assessment operations at a fixed request rate and
+reports latency histograms, error rates and MongoDB round trips per request
+
+Usage:
+    python -m backend.benchmarks.soak --rps 50 --duration 4h \\
+        --mix create=1,get=4,calculate=2,list=2,history=2 --output-dir soak-results
+
+Latency is measured from each request's scheduled start, so a stalled server
+shows up in the percentiles instead of silently lowering the request rate.
+Round trips come from the db.* counters of GET /api/metrics, which workers
+publish every few seconds
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+import typer
+
+from backend.services.histogram import LatencyHistogram
+from backend.benchmarks.scenarios import assessment_payload, update_payloads
+
+OPERATIONS = ("create", "get", "update", "calculate", "list", "history")
+
+DEFAULT_MIX = "create=1,get=4,calculate=2,list=2,history=2"
+
+# Assessments created during the run that later operations pick from
+KNOWN_IDS_LIMIT = 10_000
+
+app = typer.Typer(add_completion=False, help=__doc__.strip().splitlines()[0])
+
+def parse_duration(value: str) -> float:
+    """Seconds from e.g. '90', '30s', '15m' or '4h'"""
+    
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value)
+    if match is None:
+        raise typer.BadParameter(f"Invalid duration: {value}")
+    number, unit = match.groups()
+    return float(number) * {"": 1, "s": 1, "m": 60, "h": 3600}[unit]
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Operation weights from e.g. 'create=1,get=4'"""
+    
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise typer.BadParameter(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise typer.BadParameter(f"Invalid weight for {name}: {weight}")
+    if not any(mix.values()):
+        raise typer.BadParameter("The mix needs at least one operation with a positive weight")
+    return mix
+
+@dataclass
+class OperationStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+    
+    @property
+    def count(self) -> int:
+        return self.latency.total
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], seed: int, patients: int):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+        self.patients = patients
+        self.known_ids: Deque[str] = deque(maxlen=KNOWN_IDS_LIMIT)
+        self.totals: Dict[str, OperationStats] = self._new_stats()
+        self.interval: Dict[str, OperationStats] = self._new_stats()
+    
+    def _new_stats(self) -> Dict[str, OperationStats]:
+        # Creates issued in place of other operations get a row even when the mix has none
+        return defaultdict(OperationStats, {name: OperationStats() for name in self.operations})
+    
+    def _request(self, operation: str) -> Tuple[str, str, str, Optional[Dict]]:
+        """The operation actually issued, with its method, path and body"""
+        
+        # Operations on one assessment need an existing id; create one first
+        if operation not in ("create", "list") and not self.known_ids:
+            operation = "create"
+        assessment_id = self.rng.choice(self.known_ids) if self.known_ids else None
+        
+        if operation == "create":
+            return operation, "POST", "/api/assessments/", assessment_payload(self.rng, self.patients)
+        if operation == "get":
+            return operation, "GET", f"/api/assessments/{assessment_id}", None
+        if operation == "update":
+            return operation, "PUT", f"/api/assessments/{assessment_id}", self.rng.choice(update_payloads(self.rng))
+        if operation == "calculate":
+            return operation, "POST", f"/api/assessments/{assessment_id}/calculate", None
+        if operation == "history":
+            return operation, "GET", f"/api/assessments/{assessment_id}/history", None
+        return operation, "GET", f"/api/assessments/?limit=50&skip={self.rng.randrange(10) * 50}", None
+    
+    async def issue(self, operation: str, scheduled: float):
+        operation, method, path, body = self._request(operation)
+        status = "error"
+        try:
+            response = await self.client.request(method, path, json=body)
+            status = str(response.status_code)
+            if operation == "create" and response.status_code == 200:
+                self.known_ids.append(response.json()["id"])
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            elapsed = time.perf_counter() - scheduled
+            for stats in (self.totals[operation], self.interval[operation]):
+                stats.latency.record(elapsed)
+                stats.statuses[status] += 1
+                if not status.startswith("2"):
+                    stats.errors += 1
+    
+    def next_operation(self) -> str:
+        return self.rng.choices(self.operations, self.weights)[0]
+    
+    def take_interval(self) -> Dict[str, OperationStats]:
+        interval = self.interval
+        self.interval = self._new_stats()
+        return interval
+
+async def database_counters(client: httpx.AsyncClient) -> Dict[str, float]:
+    """The db.* counters of the deployment, or {} if metrics are unavailable"""
+    
+    try:
+        response = await client.get("/api/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    return {
+        name: value for name, value in response.json()["counters"].items() if name.startswith("db.")
+    }
+
+def _combined(stats: Dict[str, OperationStats]) -> OperationStats:
+    combined = OperationStats()
+    for operation_stats in stats.values():
+        combined.latency.merge(operation_stats.latency)
+        combined.statuses.update(operation_stats.statuses)
+        combined.errors += operation_stats.errors
+    return combined
+
+def _summary_line(label: str, stats: OperationStats, seconds: float) -> str:
+    latency = stats.latency
+    error_rate = stats.errors / stats.count if stats.count else 0.0
+    return (f"{label:<10} {stats.count:>9} req {stats.count / seconds:9.1f}/s  "
+            f"err {error_rate:7.2%}  p50 {latency.percentile(50):8.2f}  p99 {latency.percentile(99):8.2f}  "
+            f"p99.9 {latency.percentile(99.9):8.2f}  max {latency.max / 1000:8.2f} ms")
+
+async def soak(
+    base_url: str,
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    concurrency: int,
+    report_interval: float,
+    seed: int,
+    patients: int,
+    output_dir: Optional[Path]
+):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        generator = LoadGenerator(client, mix, seed, patients)
+        counters_before = await database_counters(client)
+        interval_counters = counters_before
+        
+        in_flight = set()
+        skipped = 0
+        start = time.perf_counter()
+        next_report = start + report_interval
+        issued = 0
+        while True:
+            scheduled = start + issued / rps
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            issued += 1
+            
+            # A client that cannot keep up would distort the results, so
+            # requests beyond the connection budget are counted and dropped
+            if len(in_flight) >= concurrency * 4:
+                skipped += 1
+            else:
+                task = asyncio.create_task(generator.issue(generator.next_operation(), scheduled))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            
+            now = time.perf_counter()
+            if now >= next_report:
+                counters = await database_counters(client)
+                interval = _combined(generator.take_interval())
+                round_trips = counters.get("db.commands_total", 0) - interval_counters.get("db.commands_total", 0)
+                per_request = round_trips / interval.count if interval.count else 0.0
+                print(f"[{now - start:8.0f}s] {_summary_line('interval', interval, report_interval)}  "
+                      f"db {per_request:5.2f}/req  in flight {len(in_flight)}  skipped {skipped}", flush=True)
+                interval_counters = counters
+                next_report += report_interval
+        
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=30)
+        elapsed = time.perf_counter() - start
+        
+        # Give every worker a chance to publish its last counters
+        await asyncio.sleep(6)
+        counters_after = await database_counters(client)
+    
+    print(f"\n{base_url}  {elapsed:.0f}s at {rps:g} req/s target, {skipped} requests skipped")
+    for operation, stats in generator.totals.items():
+        if stats.count:
+            print(_summary_line(operation, stats, elapsed))
+            print(f"{'':<10} statuses {dict(stats.statuses)}")
+    total = _combined(generator.totals)
+    print(_summary_line("total", total, elapsed))
+    
+    round_trips = {
+        name: counters_after.get(name, 0) - counters_before.get(name, 0)
+        for name in counters_after
+    }
+    if round_trips.get("db.commands_total"):
+        print(f"db round trips {round_trips['db.commands_total']:.0f} "
+              f"({round_trips['db.commands_total'] / max(total.count, 1):.2f} per request)")
+        for name, value in sorted(round_trips.items()):
+            if name.startswith("db.command.") and value:
+                print(f"    {name[len('db.command.'):]:<16} {value:.0f}")
+    else:
+        print("db round trips unavailable (GET /api/metrics returned no db counters)")
+    
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for operation, stats in list(generator.totals.items()) + [("total", total)]:
+            if stats.count:
+                (output_dir / f"{operation}.hgrm").write_text(stats.latency.percentile_distribution())
+        (output_dir / "summary.json").write_text(json.dumps({
+            "base_url": base_url,
+            "seconds": elapsed,
+            "target_rps": rps,
+            "skipped": skipped,
+            "operations": {
+                operation: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "statuses": dict(stats.statuses),
+                    "p50_ms": stats.latency.percentile(50),
+                    "p99_ms": stats.latency.percentile(99),
+                    "p999_ms": stats.latency.percentile(99.9),
+                    "max_ms": stats.latency.max / 1000,
+                }
+                for operation, stats in list(generator.totals.items()) + [("total", total)]
+            },
+            "db_round_trips": round_trips,
+        }, indent=2))
+        print(f"Histograms written to {output_dir}")
+
+@app.command()
+def main(
+    base_url: str = typer.Option("http://localhost:8001", envvar="BACKEND_URL", help="Deployment to test"),
+    rps: float = typer.Option(20.0, min=0.1, help="Target requests per second"),
+    duration: str = typer.Option("60s", help="Run time, e.g. 90s, 30m or 4h"),
+    mix: str = typer.Option(DEFAULT_MIX, help="Operation weights: " + ", ".join(OPERATIONS)),
+    concurrency: int = typer.Option(50, min=1, help="Pooled connections"),
+    report_interval: float = typer.Option(10.0, min=1, help="Seconds between progress lines"),
+    seed: int = typer.Option(0),
+    patients: int = typer.Option(10_000, min=1, help="Distinct patient ids to create assessments for"),
+    output_dir: Optional[Path] = typer.Option(None, help="Write .hgrm histograms and summary.json here"),
+):
+    asyncio.run(soak(
+        base_url.rstrip("/"), rps, parse_duration(duration), parse_mix(mix),
+        concurrency, report_interval, seed, patients, output_dir
+    ))
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,87 @@
+"""
+Startup time benchmark
+Reports the import phase and the database init phase separately
+
+Usage: python -m backend.benchmarks.startup [--runs 5]
+The init phase runs against MONGO_URL using a scratch database that is dropped afterwards
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import backend.server; "
+    "print(time.perf_counter() - start)"
+)
+
+def measure_import(runs: int) -> list:
+    """Time `import backend.server` in fresh interpreters"""
+    
+    timings = []
+    env = dict(os.environ, MONGO_URL=os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+async def measure_init(runs: int) -> dict:
+    """Time a cold index build (sequential and concurrent) and a warm skip"""
+    
+    os.environ['DB_NAME'] = 'imwg_startup_bench'
+    from backend import database
+    
+    db = database.get_db()
+    timings = {"sequential_cold": [], "concurrent_cold": [], "warm_skip": []}
+    try:
+        for _ in range(runs):
+            await database.get_client().drop_database(db.name)
+            start = time.perf_counter()
+            for collection_name, indexes in database.INDEXES.items():
+                for keys, options in indexes:
+                    await db[collection_name].create_index(keys, **options)
+            timings["sequential_cold"].append(time.perf_counter() - start)
+            
+            await database.get_client().drop_database(db.name)
+            start = time.perf_counter()
+            await database.init_database()
+            timings["concurrent_cold"].append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            await database.init_database()
+            timings["warm_skip"].append(time.perf_counter() - start)
+    finally:
+        await database.get_client().drop_database(db.name)
+        database.close_client()
+    
+    return timings
+
+def report(name: str, timings: list):
+    print(f"{name:<20} median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-init", action="store_true", help="Only measure the import phase")
+    args = parser.parse_args()
+    
+    print("== import phase ==")
+    report("import backend.server", measure_import(args.runs))
+    
+    if not args.skip_init:
+        print("== init phase ==")
+        for name, timings in asyncio.run(measure_init(args.runs)).items():
+            report(name, timings)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Multi-worker throughput benchmark
+Starts gunicorn with an increasing number of uvicorn workers and reports
+requests per second and scaling efficiency relative to a single worker
+
+Usage: python -m backend.benchmarks.throughput [--path /api/] [--max-workers N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """Start gunicorn and wait until it answers"""
+    
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "backend.server:app",
+            "-k", "uvicorn.workers.UvicornWorker",
+            "-w", str(workers),
+            "-b", f"127.0.0.1:{port}",
+            "--log-level", "warning",
+        ],
+        cwd=ROOT_DIR,
+        env=dict(os.environ, MONGO_URL=os.environ.get('MONGO_URL', 'mongodb://localhost:27017')),
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start within 30 seconds")
+
+async def drive(url: str, method: str, body, requests: int, concurrency: int) -> int:
+    """Issue `requests` requests over `concurrency` connections, return error count"""
+    
+    errors = 0
+    remaining = requests
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return errors
+
+def client_process(args) -> int:
+    return asyncio.run(drive(*args))
+
+def measure(url: str, method: str, body, requests: int, concurrency: int, clients: int) -> dict:
+    """Drive load from several client processes so the client is not the bottleneck"""
+    
+    per_client = requests // clients
+    with multiprocessing.Pool(clients) as pool:
+        start = time.perf_counter()
+        errors = sum(pool.map(
+            client_process, [(url, method, body, per_client, concurrency)] * clients
+        ))
+        elapsed = time.perf_counter() - start
+    return {"rps": per_client * clients / elapsed, "errors": errors, "seconds": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", default="/api/")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default=None, help="JSON request body")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Connections per client process")
+    parser.add_argument("--clients", type=int, default=max(1, multiprocessing.cpu_count() // 2))
+    parser.add_argument("--max-workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    
+    body = json.loads(args.body) if args.body else None
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    
+    baseline = None
+    for workers in worker_counts:
+        port = free_port()
+        server = start_server(workers, port)
+        try:
+            url = f"http://127.0.0.1:{port}{args.path}"
+            # Warm up every worker before measuring
+            measure(url, args.method, body, args.requests // 10, args.concurrency, args.clients)
+            result = measure(url, args.method, body, args.requests, args.concurrency, args.clients)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+        
+        baseline = baseline or result["rps"]
+        efficiency = result["rps"] / (baseline * workers)
+        print(f"workers={workers:<3} {result['rps']:10.0f} req/s   "
+              f"scaling {result['rps'] / baseline:5.2f}x   efficiency {efficiency:6.1%}   "
+              f"errors {result['errors']}")
+
+if __name__ == "__main__":
+    main()
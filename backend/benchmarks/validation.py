@@ -0,0 +1,141 @@
+"""
+Benchmark of assessment input validation, single and bulk
+Compares the previous two-pass validation (loose Pydantic parse, then the
+if/elif checks of validate_assessment_data) with the constrained
+PatientAssessmentCreate model and the reused batch TypeAdapter
+
+Usage: python -m backend.benchmarks.validation [--rows 10000] [--repeat 5]
+No server or database is needed
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from backend.models.patient_assessment import (
+    PatientAssessment,
+    PatientAssessmentCreate,
+    validation_messages,
+    validate_assessment_batch
+)
+
+class LegacyAssessmentCreate(BaseModel):
+    """PatientAssessmentCreate as it was before the constraints moved onto the model"""
+    patient_id: Optional[str] = None
+    patient_name: Optional[str] = None
+    del17p_tp53: str
+    translocation_combo: str
+    del1p32_1q: str
+    b2m_value: Optional[float] = None
+    creatinine_value: Optional[float] = None
+    clinical_notes: Optional[str] = None
+    physician_name: Optional[str] = None
+    institution: Optional[str] = None
+
+def legacy_checks(assessment: PatientAssessment) -> List[str]:
+    """The field checks of the previous validate_assessment_data"""
+    
+    errors = []
+    if not assessment.del17p_tp53:
+        errors.append("del(17p) and/or TP53 mutation status is required")
+    elif assessment.del17p_tp53 not in ['positive', 'negative']:
+        errors.append("del(17p) and/or TP53 mutation status must be 'positive' or 'negative'")
+    if not assessment.translocation_combo:
+        errors.append("High-risk translocation status is required")
+    elif assessment.translocation_combo not in ['positive', 'negative']:
+        errors.append("High-risk translocation status must be 'positive' or 'negative'")
+    if not assessment.del1p32_1q:
+        errors.append("del(1p32) patterns status is required")
+    elif assessment.del1p32_1q not in ['positive', 'negative']:
+        errors.append("del(1p32) patterns status must be 'positive' or 'negative'")
+    if assessment.b2m_value is not None:
+        if assessment.b2m_value < 0 or assessment.b2m_value > 50:
+            errors.append("β2-microglobulin value must be between 0 and 50 mg/L")
+        if assessment.creatinine_value is None:
+            errors.append("Creatinine value is required when β2-microglobulin is provided")
+    if assessment.creatinine_value is not None:
+        if assessment.creatinine_value < 0 or assessment.creatinine_value > 20:
+            errors.append("Creatinine value must be between 0 and 20 mg/dL")
+        if assessment.b2m_value is None:
+            errors.append("β2-microglobulin value is required when creatinine is provided")
+    return errors
+
+def legacy_validate(row: Dict) -> Tuple[bool, List[str]]:
+    try:
+        data = LegacyAssessmentCreate(**row)
+    except ValidationError as e:
+        return False, [error["msg"] for error in e.errors()]
+    errors = legacy_checks(PatientAssessment(**data.dict()))
+    return not errors, errors
+
+def current_validate(row: Dict) -> Tuple[bool, List[str]]:
+    try:
+        PatientAssessmentCreate.model_validate(row)
+    except ValidationError as e:
+        return False, validation_messages(e.errors())
+    return True, []
+
+def generate_rows(count: int, invalid_fraction: float, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        row = {
+            "patient_id": f"P{index:07d}",
+            "patient_name": "Benchmark Patient",
+            "del17p_tp53": rng.choice(("positive", "negative")),
+            "translocation_combo": rng.choice(("positive", "negative")),
+            "del1p32_1q": rng.choice(("positive", "negative")),
+            "b2m_value": round(rng.uniform(0, 12), 2),
+            "creatinine_value": round(rng.uniform(0.4, 3), 2),
+            "physician_name": "Dr. Bench",
+        }
+        if rng.random() < invalid_fraction:
+            choice = rng.randrange(3)
+            if choice == 0:
+                row["del17p_tp53"] = "unknown"
+            elif choice == 1:
+                row["b2m_value"] = 75.0
+            else:
+                del row["creatinine_value"]
+        rows.append(row)
+    return rows
+
+def best_of(repeat: int, function: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def report(name: str, rows: int, before: float, after: float):
+    print(f"{name:<8} before {rows / before:12,.0f} rows/s   after {rows / after:12,.0f} rows/s   "
+          f"{before / after:5.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--invalid", type=float, default=0.1, help="Fraction of invalid rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rows = generate_rows(args.rows, args.invalid, args.seed)
+    
+    # Both paths must accept and reject the same rows
+    disagreements = sum(legacy_validate(row)[0] != current_validate(row)[0] for row in rows)
+    if disagreements:
+        raise SystemExit(f"{disagreements} rows validated differently before and after")
+    
+    single_before = best_of(args.repeat, lambda: [legacy_validate(row) for row in rows])
+    single_after = best_of(args.repeat, lambda: [current_validate(row) for row in rows])
+    bulk_after = best_of(args.repeat, lambda: validate_assessment_batch(rows))
+    
+    print(f"{args.rows} rows, {args.invalid:.0%} invalid, best of {args.repeat}")
+    report("single", args.rows, single_before, single_after)
+    report("bulk", args.rows, single_before, bulk_after)
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,217 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import SecondaryPreferred
+from typing import AsyncIterator, Optional
+import asyncio
 import os
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'imwg_calculator')]
+from backend.middleware.metrics import database_command_counter
+from backend.models.patient_assessment import SUMMARY_FIELDS
+from backend.repositories.base import AssessmentRepository
+from backend.repositories.memory import InMemoryAssessmentRepository
+from backend.repositories.motor import MotorAssessmentRepository
+
+# Bump whenever INDEXES changes so that existing deployments rebuild them
+INDEX_SCHEMA_VERSION = 4
+
+def _listing_index(*equality: str) -> list:
+    """
+    Index for assessment listings filtered on `equality`: the equality fields,
+    then the created_at sort, then the remaining summary fields so that
+    summary listings are covered (equality, sort, range order)
+    """
+    keys = [(field, 1) for field in equality] + [("created_at", -1)]
+    return keys + [(field, 1) for field in SUMMARY_FIELDS if field not in dict(keys)]
+
+# Indexes per collection, as (keys, options) pairs for create_index
+INDEXES = {
+    "assessments": [
+        ("id", {"unique": True}),
+        ("physician_name", {}),
+        # One per filter combination of GET /api/assessments/; combinations
+        # with patient_id use the patient's index, a patient has few assessments
+        (_listing_index(), {}),
+        (_listing_index("patient_id"), {}),
+        (_listing_index("risk_result"), {}),
+        (_listing_index("status"), {}),
+        (_listing_index("status", "risk_result"), {}),
+        # Incremental readers such as the analytics mirror page by (updated_at, id)
+        ([("updated_at", 1), ("id", 1)], {}),
+    ],
+    "calculations": [
+        ("assessment_id", {}),
+        ("calculated_at", {}),
+        ("risk_result", {}),
+        ([("calculated_at", 1), ("assessment_id", 1)], {}),
+    ],
+    "assessment_history": [
+        ("assessment_id", {}),
+        ("timestamp", {}),
+        ("action", {}),
+        ([("action", 1), ("timestamp", 1), ("id", 1)], {}),
+    ],
+    "patient_timeline": [
+        ([("patient_id", 1), ("calculated_at", 1)], {}),
+        # Only transitions are indexed, so transition queries never scan
+        # the far more numerous unchanged reassessments
+        (
+            [("previous_risk_result", 1), ("risk_result", 1), ("calculated_at", 1)],
+            {"partialFilterExpression": {"transition": True}}
+        ),
+    ],
+}
+
+# Indexes replaced by the ones above, dropped when the index schema is upgraded
+OBSOLETE_INDEXES = {
+    "assessments": ["patient_id_1", "created_at_1", "risk_result_1", "status_1"],
+}
+
+# MongoDB connection, created on first use so that importing this module
+# stays cheap and picks up environment loaded after import (e.g. from .env)
+_client: Optional[AsyncIOMotorClient] = None
+
+def get_client() -> AsyncIOMotorClient:
+    """Get the shared Motor client, creating it on first use"""
+    global _client
+    if _client is None:
+        mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+        # Round trips are counted so load tests can report them per request
+        _client = AsyncIOMotorClient(mongo_url, event_listeners=[database_command_counter])
+    return _client
+
+def get_db() -> AsyncIOMotorDatabase:
+    """Get the application database handle"""
+    return get_client()[os.environ.get('DB_NAME', 'imwg_calculator')]
+
+def secondary_reads_enabled() -> bool:
+    """Whether reads that may lag go to secondaries (SECONDARY_READS, default on)"""
+    return os.environ.get('SECONDARY_READS', '1') == '1'
+
+def get_secondary_db() -> AsyncIOMotorDatabase:
+    """
+    Database handle for reads that may lag the primary: secondaries are
+    preferred unless they are more than READ_MAX_STALENESS_SECONDS (default 90,
+    the smallest MongoDB accepts) behind, and only majority-committed data is
+    read so nothing returned can be rolled back
+    """
+    max_staleness = int(os.environ.get('READ_MAX_STALENESS_SECONDS', '90'))
+    return get_db().with_options(
+        read_preference=SecondaryPreferred(max_staleness=max_staleness),
+        read_concern=ReadConcern("majority")
+    )
+
+def close_client():
+    """Close the shared Motor client if it was ever created"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+def __getattr__(name):
+    # Backwards compatible module attributes `client` and `db`
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 async def get_database() -> AsyncIOMotorDatabase:
     """Get database connection"""
-    return db
+    return get_db()
+
+# The in-process store, shared by every request of this worker
+_memory_repository: Optional[InMemoryAssessmentRepository] = None
+
+def storage_engine() -> str:
+    """Where assessments are stored: "mongo" (default), or "memory" for a single process with no outside services"""
+    return os.environ.get('STORAGE_ENGINE', 'mongo')
+
+def binary_ids() -> bool:
+    """Whether UUID ids are written as BSON Binary (ID_STORAGE=binary) rather than strings (default)"""
+    storage = os.environ.get('ID_STORAGE', 'string')
+    if storage not in ("string", "binary"):
+        raise ValueError(f"Unknown ID_STORAGE {storage!r}, expected 'string' or 'binary'")
+    return storage == "binary"
+
+def get_repository() -> AssessmentRepository:
+    """Get the assessment repository for the configured storage engine"""
+    global _memory_repository
+    engine = storage_engine()
+    if engine == "memory":
+        if _memory_repository is None:
+            _memory_repository = InMemoryAssessmentRepository()
+        return _memory_repository
+    if engine != "mongo":
+        raise ValueError(f"Unknown STORAGE_ENGINE {engine!r}, expected 'mongo' or 'memory'")
+    return MotorAssessmentRepository(get_db(), binary_ids=binary_ids())
+
+async def _session_repository(db: AsyncIOMotorDatabase) -> AsyncIterator[AssessmentRepository]:
+    # One causally consistent session per request: each read sees the
+    # request's earlier writes and reads, whichever member serves it
+    if storage_engine() == "memory":
+        yield get_repository()
+        return
+    async with await get_client().start_session(causal_consistency=True) as session:
+        yield MotorAssessmentRepository(db, binary_ids=binary_ids(), session=session)
+
+async def get_assessment_repository() -> AsyncIterator[AssessmentRepository]:
+    """Get the assessment repository for writes and the reads that must see them, on the primary"""
+    async for repository in _session_repository(get_db()):
+        yield repository
+
+async def get_read_repository() -> AsyncIterator[AssessmentRepository]:
+    """
+    Get the assessment repository for listings, history, exports and statistics,
+    which may be answered by a secondary (see get_secondary_db)
+    """
+    db = get_secondary_db() if secondary_reads_enabled() else get_db()
+    async for repository in _session_repository(db):
+        yield repository
 
 async def create_indexes():
     """Create database indexes for better performance"""
     
-    # Assessments collection indexes
-    await db.assessments.create_index("id", unique=True)
-    await db.assessments.create_index("patient_id")
-    await db.assessments.create_index("physician_name")
-    await db.assessments.create_index("created_at")
-    await db.assessments.create_index("risk_result")
-    await db.assessments.create_index("status")
+    db = get_db()
     
-    # Calculations collection indexes
-    await db.calculations.create_index("assessment_id")
-    await db.calculations.create_index("calculated_at")
-    await db.calculations.create_index("risk_result")
-    
-    # History collection indexes
-    await db.assessment_history.create_index("assessment_id")
-    await db.assessment_history.create_index("timestamp")
-    await db.assessment_history.create_index("action")
+    # Index builds are independent, so issue them all at once
+    await asyncio.gather(*(
+        db[collection_name].create_index(keys, **options)
+        for collection_name, indexes in INDEXES.items()
+        for keys, options in indexes
+    ))
     
     print("Database indexes created successfully")
 
+async def drop_obsolete_indexes():
+    """Drop indexes superseded by INDEXES, once their replacements exist"""
+    
+    db = get_db()
+    for collection_name, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection_name].drop_index(name)
+
 async def init_database():
     """Initialize database with required collections and indexes"""
     
-    # Create collections if they don't exist
-    collections = await db.list_collection_names()
+    db = get_db()
     
-    required_collections = ["assessments", "calculations", "assessment_history"]
-    
-    for collection_name in required_collections:
-        if collection_name not in collections:
-            await db.create_collection(collection_name)
-            print(f"Created collection: {collection_name}")
+    # Collections are created implicitly by their first index, so a matching
+    # stored version means there is nothing left to do
+    meta = await db.schema_meta.find_one({"_id": "indexes"})
+    if meta and meta.get("version") == INDEX_SCHEMA_VERSION:
+        print("Database indexes up to date, skipping initialization")
+        return
     
     # Create indexes
     await create_indexes()
+    await drop_obsolete_indexes()
+    
+    await db.schema_meta.update_one(
+        {"_id": "indexes"},
+        {"$set": {"version": INDEX_SCHEMA_VERSION}},
+        upsert=True
+    )
     
-    print("Database initialization completed")
\ No newline at end of file
+    print("Database initialization completed")
@@ -0,0 +1,17 @@
+# Multi-worker deployment: gunicorn supervising uvicorn workers
+# Usage: gunicorn server:app -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8001')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# One worker per core unless WEB_CONCURRENCY says otherwise
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Workers import the app themselves, so module-level state such as the Motor
+# client is never shared across a fork
+preload_app = False
+
+graceful_timeout = 30
+keepalive = 5
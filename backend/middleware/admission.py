@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+import pymongo
+
+from backend.middleware.metrics import worker_metrics
+
+class PriorityClass(NamedTuple):
+    name: str
+    # Lower is admitted first when requests are waiting for a slot
+    priority: int
+    # Requests of this class in flight at once
+    limit: int
+    # Seconds a request may wait for a slot before it is turned away
+    queue_budget: float
+    # Seconds from arrival its database work may take, enforced as maxTimeMS;
+    # None leaves deadlines to the route
+    deadline: Optional[float]
+    retry_after: int
+
+PRIORITY_CLASSES = {
+    # Stateless calculations: cheap, no database, what clinicians wait on
+    "calculate": PriorityClass("calculate", 0, 64, 1.0, 2.0, 1),
+    # Interactive reads and single-assessment writes
+    "read": PriorityClass("read", 1, 48, 1.0, 5.0, 1),
+    # Batch calculations, exports and sweeps; callers are jobs that can retry
+    "bulk": PriorityClass("bulk", 2, 4, 0.5, 60.0, 5),
+    # Lab file imports, which take as long as the file is big; each batch has its own deadline
+    "import": PriorityClass("import", 2, 2, 0.5, None, 30),
+}
+
+# Classes by (method, path); anything unlisted is a read, and None is never queued
+ROUTE_CLASSES: List[Tuple[str, Pattern, Optional[str]]] = [
+    ("GET", re.compile(r"^/api/(health|metrics)$"), None),
+    # Profiling has to work when the worker is overloaded
+    ("GET", re.compile(r"^/api/debug/"), None),
+    ("POST", re.compile(r"^/api/calculate$"), "calculate"),
+    ("POST", re.compile(r"^/api/assessments/calculate$"), "bulk"),
+    ("POST", re.compile(r"^/api/cohort/snapshot$"), "bulk"),
+    ("POST", re.compile(r"^/api/analysis/threshold-sweep$"), "bulk"),
+    ("POST", re.compile(r"^/api/import/"), "import"),
+]
+
+# Requests in flight across all classes; freed slots go to the highest priority waiting
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get('ADMISSION_MAX_CONCURRENCY', '64'))
+
+# Waiting requests per class, as a multiple of its limit, before new ones are turned away at once
+QUEUE_FACTOR = 4
+
+def classify(method: str, path: str) -> Optional[PriorityClass]:
+    for route_method, pattern, name in ROUTE_CLASSES:
+        if method == route_method and pattern.match(path):
+            return PRIORITY_CLASSES[name] if name else None
+    return PRIORITY_CLASSES["read"]
+
+class AdmissionController:
+    """
+    Concurrency slots shared by all priority classes
+    Each class is capped at its own limit; when a slot is freed it goes to
+    the waiting request of the highest priority class that may still run
+    """
+    
+    def __init__(self, max_concurrency: int = ADMISSION_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.active_by_class: Dict[str, int] = defaultdict(int)
+        self.waiting_by_class: Dict[str, int] = defaultdict(int)
+        self._waiters: list = []
+        self._sequence = itertools.count()
+    
+    def _can_admit(self, priority_class: PriorityClass) -> bool:
+        return (
+            self.active < self.max_concurrency
+            and self.active_by_class[priority_class.name] < priority_class.limit
+        )
+    
+    def _admit(self, priority_class: PriorityClass):
+        self.active += 1
+        self.active_by_class[priority_class.name] += 1
+    
+    async def acquire(self, priority_class: PriorityClass) -> bool:
+        """Take a slot, waiting at most the class's queue budget; False if the request should be shed"""
+        
+        if self._can_admit(priority_class):
+            self._admit(priority_class)
+            return True
+        if self.waiting_by_class[priority_class.name] >= priority_class.limit * QUEUE_FACTOR:
+            return False
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority_class.priority, next(self._sequence), future, priority_class)
+        heapq.heappush(self._waiters, entry)
+        self.waiting_by_class[priority_class.name] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), priority_class.queue_budget)
+            return True
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the budget ran out
+            if future.done():
+                return True
+            self._forget(entry)
+            return False
+        except asyncio.CancelledError:
+            # Client went away while waiting; give back a slot handed over meanwhile
+            if future.done():
+                self.release(priority_class)
+            else:
+                self._forget(entry)
+            raise
+        finally:
+            self.waiting_by_class[priority_class.name] -= 1
+    
+    def _forget(self, entry: tuple):
+        entry[2].cancel()
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+    
+    def release(self, priority_class: PriorityClass):
+        self.active -= 1
+        self.active_by_class[priority_class.name] -= 1
+        self._wake()
+    
+    def _wake(self):
+        blocked = []
+        while self._waiters and self.active < self.max_concurrency:
+            entry = heapq.heappop(self._waiters)
+            future, priority_class = entry[2], entry[3]
+            if future.done():
+                continue
+            if self._can_admit(priority_class):
+                # The slot is taken on the waiter's behalf so nobody can overtake it
+                self._admit(priority_class)
+                future.set_result(True)
+            else:
+                blocked.append(entry)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+admission_controller = AdmissionController()
+
+class AdmissionControlMiddleware:
+    """
+    Admit requests by priority class and shed what cannot start in time
+    Requests that cannot get a slot within their class's queue budget get
+    503 with Retry-After. Admitted requests run under a pymongo timeout, so
+    every MongoDB operation carries maxTimeMS for what is left of the deadline
+    """
+    
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+        self.enabled = os.environ.get('ADMISSION_CONTROL', '1') == '1'
+    
+    async def __call__(self, scope, receive, send):
+        priority_class = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if not self.enabled or priority_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        arrived = time.perf_counter()
+        if not await self.controller.acquire(priority_class):
+            worker_metrics.increment(f"admission.{priority_class.name}.rejected")
+            await self._reject(priority_class, send)
+            return
+        
+        queued = time.perf_counter() - arrived
+        worker_metrics.increment(f"admission.{priority_class.name}.admitted")
+        worker_metrics.increment(f"admission.{priority_class.name}.queue_seconds", queued)
+        if priority_class.deadline is None:
+            deadline = contextlib.nullcontext()
+        else:
+            deadline = pymongo.timeout(max(priority_class.deadline - queued, 0.001))
+        try:
+            with deadline:
+                await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority_class)
+    
+    @staticmethod
+    async def _reject(priority_class: PriorityClass, send):
+        body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(priority_class.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+from pymongo import monitoring
+
+from backend.services.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+class WorkerMetrics:
+    """
+    In-process request counters for one worker
+    Kept in memory on the hot path and published to the shared state store
+    periodically so that any worker can report totals for the whole host.
+    Publishing runs in a thread and driver callbacks come from pymongo's
+    threads, so every update takes the lock
+    """
+    
+    def __init__(self):
+        self.counters: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self.worker_id = f"{os.uname().nodename}:{os.getpid()}"
+    
+    def record_request(self, method: str, route: str, status_code: int, duration: float):
+        status_class = f"{status_code // 100}xx"
+        with self._lock:
+            self.counters["requests_total"] += 1
+            self.counters[f"requests.{status_class}"] += 1
+            self.counters[f"route.{method} {route}.count"] += 1
+            self.counters[f"route.{method} {route}.seconds"] += duration
+    
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+    
+    # For callers outside the event loop thread, e.g. driver callbacks
+    increment_threadsafe = increment
+    
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.counters)
+    
+    def publish(self):
+        """Push this worker's counters to the shared state store"""
+        counters = self.snapshot()
+        if counters:
+            shared_state.publish_counters(self.worker_id, counters)
+    
+    async def publish_periodically(self, interval: float = 5.0):
+        """Publish counters every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.publish)
+            except Exception as e:
+                logger.warning(f"Publishing worker metrics failed: {e}")
+
+worker_metrics = WorkerMetrics()
+
+class DatabaseCommandCounter(monitoring.CommandListener):
+    """
+    Count MongoDB round trips per command name
+    Registered on the Motor client; pymongo calls it from its executor threads
+    """
+    
+    def started(self, event):
+        worker_metrics.increment_threadsafe("db.commands_total")
+        worker_metrics.increment_threadsafe(f"db.command.{event.command_name}")
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        worker_metrics.increment_threadsafe("db.commands_failed")
+
+database_command_counter = DatabaseCommandCounter()
+
+class RequestMetricsMiddleware:
+    """Count requests and time spent per route template"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Route templates keep the label set small, unlike raw paths
+            route = scope.get("route")
+            worker_metrics.record_request(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+                time.perf_counter() - start
+            )
@@ -0,0 +1 @@
+# Migrations package
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Online migration of UUID ids to BSON Binary
+Rewrites the indexed id fields of assessments, calculations and history in
+batches while the API keeps serving. Only the id fields are set, and only if
+they still hold the string that was read, so concurrent edits are never
+overwritten. Run it after deploying with ID_STORAGE=binary; running it again is safe
+
+Usage: python -m backend.migrations.binary_ids [--batch-size 1000] [--pause 0.1] [--dry-run] [--force]
+Runs against MONGO_URL / DB_NAME, and only with ID_STORAGE=binary set unless forced
+"""
+import argparse
+import asyncio
+import time
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from backend.repositories.binary_ids import ID_FIELDS, encode_id
+
+async def migrate_collection(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    batch_size: int,
+    pause: float,
+    dry_run: bool
+) -> dict:
+    """Convert one collection's string UUIDs, paging by _id"""
+    
+    fields = ID_FIELDS[collection]
+    counts = {"read": 0, "migrated": 0}
+    last_id = None
+    while True:
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = db[collection].find(query, {field: 1 for field in fields}).sort("_id", 1).limit(batch_size)
+        documents = await cursor.to_list(length=batch_size)
+        if not documents:
+            break
+        last_id = documents[-1]["_id"]
+        counts["read"] += len(documents)
+        
+        operations = []
+        for document in documents:
+            encoded = {
+                field: encode_id(document[field]) for field in fields
+                if isinstance(document.get(field), str) and encode_id(document[field]) is not document[field]
+            }
+            if not encoded:
+                # Not a canonical UUID; stays a string
+                continue
+            operations.append(UpdateOne(
+                {"_id": document["_id"], **{field: document[field] for field in encoded}},
+                {"$set": encoded}
+            ))
+        counts["migrated"] += len(operations)
+        if operations and not dry_run:
+            await db[collection].bulk_write(operations, ordered=False)
+        await asyncio.sleep(pause)
+    return counts
+
+async def migrate(db: AsyncIOMotorDatabase, batch_size: int, pause: float, dry_run: bool) -> dict:
+    return {
+        collection: await migrate_collection(db, collection, batch_size, pause, dry_run)
+        for collection in ID_FIELDS
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1,
+                        help="Seconds to wait between batches, to leave room for live traffic")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--force", action="store_true",
+                        help="Migrate even though ID_STORAGE is not binary here")
+    args = parser.parse_args()
+    
+    from backend import database
+    
+    # An app still writing and querying string ids would lose every migrated document
+    if not (database.binary_ids() or args.dry_run or args.force):
+        parser.error("ID_STORAGE is not 'binary'; deploy the app with ID_STORAGE=binary first, "
+                     "then run this with the same setting (or --force)")
+    
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(migrate(database.get_db(), args.batch_size, args.pause, args.dry_run))
+    finally:
+        database.close_client()
+    
+    for collection, counts in results.items():
+        print(f"{collection:<20} read {counts['read']:>10,}  migrated {counts['migrated']:>10,}")
+    print(f"{'dry run, ' if args.dry_run else ''}finished in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
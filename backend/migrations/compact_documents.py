@@ -0,0 +1,176 @@
+"""
+Online migration of assessments and calculations to the compact storage encoding
+Rewrites documents in batches while the API keeps serving. An assessment is only
+replaced if its version is unchanged since it was read, so concurrent edits win
+and the document is picked up again by the next run. Assessments from before
+documents were stamped with a schema version are normalised through the model
+first. Documents that would not round-trip exactly are left as they are;
+running it again is safe
+
+Usage: python -m backend.migrations.compact_documents [--batch-size 500] [--pause 0.1] [--dry-run]
+Runs against MONGO_URL / DB_NAME
+"""
+import argparse
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import ReplaceOne
+
+from backend.models.documents import ASSESSMENT_SCHEMA_VERSION
+from backend.models.patient_assessment import PatientAssessment
+from backend.repositories.compact import COMPACT_SCHEMA_VERSION, compact_assessment, compact_calculation
+
+class MigrationStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.read = 0
+        self.migrated = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+    
+    def record(self, before: dict, after: dict):
+        self.migrated += 1
+        self.bytes_before += len(bson.encode(before))
+        self.bytes_after += len(bson.encode(after))
+    
+    def report(self) -> str:
+        saved = 1 - self.bytes_after / self.bytes_before if self.bytes_before else 0
+        return (f"{self.name:<12} read {self.read:>9,}  migrated {self.migrated:>9,}  "
+                f"bytes {self.bytes_before:>12,} -> {self.bytes_after:>12,} ({saved:.0%} smaller)")
+
+def assessment_replacement(document: dict) -> Optional[Tuple[dict, dict]]:
+    """The filter and compact document replacing a stored assessment, None if it is left as it is"""
+    
+    stamped = document
+    if "schema_version" not in document:
+        # Written before documents were stamped; normalised as readers render it
+        if "id" not in document:
+            return None
+        try:
+            normalised = PatientAssessment(**document).model_dump()
+        except ValidationError:
+            return None
+        stamped = {"_id": document["_id"], **normalised, "schema_version": ASSESSMENT_SCHEMA_VERSION}
+    compact = compact_assessment(stamped)
+    if compact is stamped:
+        return None
+    # Only if nobody has written the assessment since it was read; legacy
+    # documents may lack a version, which matches it still being missing
+    return {
+        "_id": document["_id"],
+        "version": document.get("version"),
+        "schema_version": document.get("schema_version", {"$exists": False})
+    }, compact
+
+async def migrate_assessments(
+    db: AsyncIOMotorDatabase,
+    batch_size: int,
+    pause: float,
+    dry_run: bool
+) -> MigrationStats:
+    """Compact assessments written in the API shape or unstamped, one batch per round trip"""
+    
+    stats = MigrationStats("assessments")
+    last_id = None
+    while True:
+        query = {"$or": [{"schema_version": ASSESSMENT_SCHEMA_VERSION}, {"schema_version": {"$exists": False}}]}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        documents = await db.assessments.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not documents:
+            break
+        last_id = documents[-1]["_id"]
+        stats.read += len(documents)
+        
+        replacements = []
+        for document in documents:
+            replacement = assessment_replacement(document)
+            if replacement is None:
+                continue
+            stats.record(document, replacement[1])
+            replacements.append(ReplaceOne(*replacement))
+        if replacements and not dry_run:
+            await db.assessments.bulk_write(replacements, ordered=False)
+        await asyncio.sleep(pause)
+    return stats
+
+async def migrate_calculations(
+    db: AsyncIOMotorDatabase,
+    batch_size: int,
+    pause: float,
+    dry_run: bool
+) -> MigrationStats:
+    """
+    Compact stored calculation results
+    Older rows do not record the lab values they were calculated from; the
+    assessment's current values are used, and rows they do not reproduce are left as they are
+    """
+    
+    stats = MigrationStats("calculations")
+    last_id = None
+    while True:
+        query = {"schema_version": {"$ne": COMPACT_SCHEMA_VERSION}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        rows = await db.calculations.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not rows:
+            break
+        last_id = rows[-1]["_id"]
+        stats.read += len(rows)
+        
+        labs = {}
+        cursor = db.assessments.find(
+            {"id": {"$in": list({row["assessment_id"] for row in rows})}},
+            {"_id": 0, "id": 1, "b2m_value": 1, "creatinine_value": 1}
+        )
+        async for assessment in cursor:
+            labs[assessment["id"]] = {
+                "b2m_value": assessment.get("b2m_value"),
+                "creatinine_value": assessment.get("creatinine_value")
+            }
+        
+        replacements = []
+        for row in rows:
+            compact = compact_calculation({**labs.get(row["assessment_id"], {}), **row})
+            if compact.get("schema_version") != COMPACT_SCHEMA_VERSION:
+                continue
+            stats.record(row, compact)
+            # Calculations are never edited, only deleted with their assessment
+            replacements.append(ReplaceOne({"_id": row["_id"]}, compact))
+        if replacements and not dry_run:
+            await db.calculations.bulk_write(replacements, ordered=False)
+        await asyncio.sleep(pause)
+    return stats
+
+async def migrate(db: AsyncIOMotorDatabase, batch_size: int, pause: float, dry_run: bool) -> Tuple[MigrationStats, ...]:
+    return (
+        await migrate_assessments(db, batch_size, pause, dry_run),
+        await migrate_calculations(db, batch_size, pause, dry_run),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1,
+                        help="Seconds to wait between batches, to leave room for live traffic")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    
+    from backend import database
+    
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(migrate(database.get_db(), args.batch_size, args.pause, args.dry_run))
+    finally:
+        database.close_client()
+    
+    for stats in results:
+        print(stats.report())
+    print(f"{'dry run, ' if args.dry_run else ''}finished in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
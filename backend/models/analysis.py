@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+from datetime import datetime
+
+# Largest number of cutoffs accepted per axis of a what-if grid
+MAX_GRID_AXIS = 200
+
+class CohortSnapshotInfo(BaseModel):
+    count: int
+    built_at: datetime
+    genetic_high_risk: int
+
+class WhatIfRequest(BaseModel):
+    b2m_cutoffs: List[float] = Field(..., min_length=1, max_length=MAX_GRID_AXIS, description="β2-microglobulin cutoffs in mg/L")
+    creatinine_cutoffs: List[float] = Field(..., min_length=1, max_length=MAX_GRID_AXIS, description="Creatinine cutoffs in mg/dL")
+
+class WhatIfResponse(BaseModel):
+    cohort: CohortSnapshotInfo
+    b2m_cutoffs: List[float]
+    creatinine_cutoffs: List[float]
+    # high_risk[i][j] is the count for b2m_cutoffs[i] and creatinine_cutoffs[j]
+    high_risk: List[List[int]]
+    elapsed_ms: Optional[float] = None
+
+class CutoffRange(BaseModel):
+    """Evenly spaced cutoffs from start to stop inclusive"""
+    start: float = Field(..., ge=0)
+    stop: float = Field(..., ge=0)
+    steps: int = Field(..., ge=1, le=MAX_GRID_AXIS)
+    
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.stop < self.start:
+            raise ValueError("stop must not be below start")
+        return self
+    
+    def values(self) -> List[float]:
+        if self.steps == 1:
+            return [self.start]
+        step = (self.stop - self.start) / (self.steps - 1)
+        return [self.start + step * index for index in range(self.steps)]
+
+class ThresholdSweepRequest(BaseModel):
+    b2m: CutoffRange = Field(..., description="β2-microglobulin cutoffs in mg/L")
+    creatinine: CutoffRange = Field(..., description="Creatinine cutoffs in mg/dL")
+
+class ThresholdSweepResponse(BaseModel):
+    cohort: CohortSnapshotInfo
+    b2m_cutoffs: List[float]
+    creatinine_cutoffs: List[float]
+    current_b2m_cutoff: float
+    current_creatinine_cutoff: float
+    current_high_risk: int
+    # Grids are indexed [b2m cutoff][creatinine cutoff]
+    high_risk: List[List[int]]
+    newly_high_risk: List[List[int]]
+    no_longer_high_risk: List[List[int]]
+    reclassified: List[List[int]]
+    elapsed_ms: Optional[float] = None
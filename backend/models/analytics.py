@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+class SourceSyncState(BaseModel):
+    # Time of the last change applied from the source
+    position: datetime
+    synced_at: datetime
+
+class AnalyticsStatus(BaseModel):
+    assessments: int
+    calculations: int
+    sources: Dict[str, SourceSyncState]
+
+class CohortGroup(BaseModel):
+    group: Optional[str] = None
+    assessments: int
+    calculated: int
+    high_risk: int
+    mean_risk_factors: Optional[float] = None
+    mean_b2m_value: Optional[float] = None
+    mean_creatinine_value: Optional[float] = None
+
+class CohortBreakdown(BaseModel):
+    group_by: str
+    groups: List[CohortGroup]
+
+class FactorCooccurrence(BaseModel):
+    assessments: int
+    criteria: List[str]
+    # counts[i][j] assessments meet both criteria[i] and criteria[j]
+    counts: List[List[int]]
+
+class TrendPoint(BaseModel):
+    period: str
+    calculations: int
+    high_risk: int
+    assessments: int
+
+class RiskTrends(BaseModel):
+    bucket: str
+    points: List[TrendPoint]
@@ -0,0 +1,60 @@
+from typing import Any, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from backend.models.patient_assessment import AssessmentHistory, AssessmentSummary, PatientAssessmentResponse
+
+# Stamped on documents as `schema_version` when this API writes them; bump
+# whenever the stored shape changes so older documents are validated again
+ASSESSMENT_SCHEMA_VERSION = 1
+HISTORY_SCHEMA_VERSION = 1
+
+def _document_type(model: Type[BaseModel]) -> type:
+    # The model's fields in the model's order, each serialized as it is
+    # stored; unknown keys such as Mongo's _id are left out
+    return TypedDict(
+        f"{model.__name__}Document", {name: Any for name in model.model_fields}, total=False
+    )
+
+_ASSESSMENT = TypeAdapter(_document_type(PatientAssessmentResponse))
+_ASSESSMENT_LIST = TypeAdapter(List[_document_type(PatientAssessmentResponse)])
+_HISTORY_LIST = TypeAdapter(List[_document_type(AssessmentHistory)])
+_SUMMARY_LIST = TypeAdapter(List[AssessmentSummary])
+
+def _decoded(document: dict, model: Type[BaseModel], schema_version: int) -> dict:
+    """
+    A stored document ready to serialize
+    Documents stamped with the current schema version were validated when
+    written and are used as they are; anything else goes through the model
+    """
+    
+    if document.get("schema_version") == schema_version:
+        return document
+    return model(**document).model_dump()
+
+def render_assessment(document: dict) -> bytes:
+    """JSON of one stored assessment, as PatientAssessmentResponse would render it"""
+    return _ASSESSMENT.dump_json(
+        _decoded(document, PatientAssessmentResponse, ASSESSMENT_SCHEMA_VERSION)
+    )
+
+def render_assessments(documents: List[dict]) -> bytes:
+    """JSON array of stored assessments, as List[PatientAssessmentResponse] would render it"""
+    return _ASSESSMENT_LIST.dump_json([
+        _decoded(document, PatientAssessmentResponse, ASSESSMENT_SCHEMA_VERSION)
+        for document in documents
+    ])
+
+def render_summaries(documents: List[dict]) -> bytes:
+    """
+    JSON array of assessment summaries
+    Summaries are read from indexes without schema_version, so they are always validated; the model is small
+    """
+    return _SUMMARY_LIST.dump_json(_SUMMARY_LIST.validate_python(documents))
+
+def render_history(records: List[dict]) -> bytes:
+    """JSON array of stored history records, as List[AssessmentHistory] would render it"""
+    return _HISTORY_LIST.dump_json([
+        _decoded(record, AssessmentHistory, HISTORY_SCHEMA_VERSION) for record in records
+    ])
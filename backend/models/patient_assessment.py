@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, WrapValidator, model_validator
+from pydantic_core import PydanticCustomError
+from typing import Annotated, Optional, List, Dict, Literal, Tuple
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -12,34 +13,118 @@ class AssessmentStatus(str, Enum):
     COMPLETED = "COMPLETED"
     DRAFT = "DRAFT"
 
+# Allowed values of the three cytogenetic criteria
+CriterionStatus = Literal['positive', 'negative']
+
 class PatientAssessmentCreate(BaseModel):
     patient_id: Optional[str] = None
     patient_name: Optional[str] = None
-    del17p_tp53: str = Field(..., description="del(17p) and/or TP53 mutation status")
-    translocation_combo: str = Field(..., description="High-risk translocation status")
-    del1p32_1q: str = Field(..., description="del(1p32) patterns status")
-    b2m_value: Optional[float] = Field(None, description="β2-microglobulin value in mg/L")
-    creatinine_value: Optional[float] = Field(None, description="Creatinine value in mg/dL")
+    del17p_tp53: CriterionStatus = Field(..., description="del(17p) and/or TP53 mutation status")
+    translocation_combo: CriterionStatus = Field(..., description="High-risk translocation status")
+    del1p32_1q: CriterionStatus = Field(..., description="del(1p32) patterns status")
+    b2m_value: Optional[float] = Field(None, ge=0, le=50, description="β2-microglobulin value in mg/L")
+    creatinine_value: Optional[float] = Field(None, ge=0, le=20, description="Creatinine value in mg/dL")
     clinical_notes: Optional[str] = None
     physician_name: Optional[str] = None
     institution: Optional[str] = None
+    
+    @model_validator(mode="after")
+    def check_lab_pair(self):
+        # Criterion 4 needs both labs, so one without the other is rejected
+        if self.b2m_value is not None and self.creatinine_value is None:
+            raise PydanticCustomError(
+                "lab_pair", "Creatinine value is required when β2-microglobulin is provided"
+            )
+        if self.creatinine_value is not None and self.b2m_value is None:
+            raise PydanticCustomError(
+                "lab_pair", "β2-microglobulin value is required when creatinine is provided"
+            )
+        return self
 
 class PatientAssessmentUpdate(BaseModel):
     patient_name: Optional[str] = None
-    del17p_tp53: Optional[str] = None
-    translocation_combo: Optional[str] = None
-    del1p32_1q: Optional[str] = None
-    b2m_value: Optional[float] = None
-    creatinine_value: Optional[float] = None
+    del17p_tp53: Optional[CriterionStatus] = None
+    translocation_combo: Optional[CriterionStatus] = None
+    del1p32_1q: Optional[CriterionStatus] = None
+    b2m_value: Optional[float] = Field(None, ge=0, le=50)
+    creatinine_value: Optional[float] = Field(None, ge=0, le=20)
     clinical_notes: Optional[str] = None
     physician_name: Optional[str] = None
     institution: Optional[str] = None
 
+# Error messages for validation failures, keyed by field and Pydantic error type
+VALIDATION_MESSAGES = {
+    ("del17p_tp53", "missing"): "del(17p) and/or TP53 mutation status is required",
+    ("del17p_tp53", "literal_error"): "del(17p) and/or TP53 mutation status must be 'positive' or 'negative'",
+    ("translocation_combo", "missing"): "High-risk translocation status is required",
+    ("translocation_combo", "literal_error"): "High-risk translocation status must be 'positive' or 'negative'",
+    ("del1p32_1q", "missing"): "del(1p32) patterns status is required",
+    ("del1p32_1q", "literal_error"): "del(1p32) patterns status must be 'positive' or 'negative'",
+    ("b2m_value", "greater_than_equal"): "β2-microglobulin value must be between 0 and 50 mg/L",
+    ("b2m_value", "less_than_equal"): "β2-microglobulin value must be between 0 and 50 mg/L",
+    ("creatinine_value", "greater_than_equal"): "Creatinine value must be between 0 and 20 mg/dL",
+    ("creatinine_value", "less_than_equal"): "Creatinine value must be between 0 and 20 mg/dL",
+}
+
+def validation_messages(errors: List[dict]) -> List[str]:
+    """Turn Pydantic validation errors into the API's error messages"""
+    
+    messages = []
+    for error in errors:
+        field = next((part for part in reversed(error["loc"]) if isinstance(part, str)), None)
+        error_type = error["type"]
+        if error_type == "literal_error" and error.get("input") == "":
+            # An empty status is reported like a missing one
+            error_type = "missing"
+        message = VALIDATION_MESSAGES.get((field, error_type))
+        if message is None:
+            location = ".".join(str(part) for part in error["loc"] if part != "body")
+            message = f"{location}: {error['msg']}" if location and error_type != "lab_pair" else error["msg"]
+        if message not in messages:
+            messages.append(message)
+    return messages
+
+def _keep_row_errors(row, handler):
+    # Hand back a row's errors in place of the row so one bad row does not
+    # abort validation of the whole batch
+    try:
+        return handler(row)
+    except ValidationError as e:
+        return e
+
+# Reused for every bulk input so the list schema is compiled once
+ASSESSMENT_BATCH_ADAPTER = TypeAdapter(
+    List[Annotated[PatientAssessmentCreate, WrapValidator(_keep_row_errors)]]
+)
+
+def validate_assessment_batch(
+    rows: List[dict]
+) -> Tuple[List[Optional[PatientAssessmentCreate]], Dict[int, List[str]]]:
+    """
+    Validate many assessment payloads in one pass
+    Returns the parsed rows (None where invalid) and error messages by row index
+    """
+    
+    parsed: List[Optional[PatientAssessmentCreate]] = []
+    errors: Dict[int, List[str]] = {}
+    for index, row in enumerate(ASSESSMENT_BATCH_ADAPTER.validate_python(rows)):
+        if isinstance(row, ValidationError):
+            errors[index] = validation_messages(row.errors())
+            row = None
+        parsed.append(row)
+    return parsed, errors
+
 class RiskFactor(BaseModel):
     criterion: str
     description: str
     is_positive: bool
 
+class LatestResultSnapshot(BaseModel):
+    """Compact record of the latest calculation, embedded in the assessment"""
+    risk_mask: int
+    rules_version: int
+    calculated_at: datetime
+
 class PatientAssessment(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     patient_id: Optional[str] = None
@@ -57,6 +142,7 @@ class PatientAssessment(BaseModel):
     risk_result: Optional[RiskResult] = None
     risk_factors: List[RiskFactor] = Field(default_factory=list)
     total_risk_factors: int = 0
+    latest_result: Optional[LatestResultSnapshot] = None
     
     # Metadata
     status: AssessmentStatus = AssessmentStatus.DRAFT
@@ -67,6 +153,16 @@ class PatientAssessment(BaseModel):
 class PatientAssessmentResponse(PatientAssessment):
     pass
 
+class AssessmentSummary(BaseModel):
+    """An assessment as summary listings show it, read from the listing indexes alone"""
+    id: str
+    patient_id: Optional[str] = None
+    risk_result: Optional[RiskResult] = None
+    status: AssessmentStatus = AssessmentStatus.DRAFT
+    created_at: datetime
+
+SUMMARY_FIELDS = tuple(AssessmentSummary.model_fields)
+
 class RiskCalculationResult(BaseModel):
     assessment_id: str
     risk_result: RiskResult
@@ -76,6 +172,56 @@ class RiskCalculationResult(BaseModel):
     recommendations: List[str]
     calculated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class PatientAssessmentWithResult(PatientAssessmentResponse):
+    result: Optional[RiskCalculationResult] = None
+
+class BatchCalculateRequest(BaseModel):
+    """Assessments to calculate, either by ID or by filter"""
+    assessment_ids: Optional[List[str]] = None
+    patient_id: Optional[str] = None
+    risk_result: Optional[RiskResult] = None
+    status: Optional[AssessmentStatus] = None
+    
+    @model_validator(mode="after")
+    def check_selection(self):
+        # Filters are not applied to listed IDs, so a body with both is ambiguous
+        if self.assessment_ids is not None and (self.patient_id or self.risk_result or self.status):
+            raise PydanticCustomError(
+                "batch_selection", "Provide either assessment_ids or filters, not both"
+            )
+        return self
+
+class BatchCalculateItem(BaseModel):
+    assessment_id: Optional[str] = None
+    status: str  # "calculated", "not_found", "error"
+    result: Optional[RiskCalculationResult] = None
+    error: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based, not counting the header
+    errors: List[str]
+
+class ImportSummary(BaseModel):
+    """Outcome of a lab file import"""
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = Field(default_factory=list)
+    # More rows failed than are listed in errors
+    errors_truncated: bool = False
+    # Why the import stopped early; rows counted up to then were imported
+    error: Optional[str] = None
+
+class PatientTimelineEntry(BaseModel):
+    """One calculation in a patient's risk timeline"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    patient_id: str
+    assessment_id: str
+    risk_result: RiskResult
+    previous_risk_result: Optional[RiskResult] = None
+    transition: bool = False
+    calculated_at: datetime
+
 class AssessmentHistory(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     assessment_id: str
@@ -0,0 +1,163 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+class AssessmentRepository(ABC):
+    """
+    Storage for assessments and the records derived from them: calculations,
+    history and the patient risk timeline
+    Documents go in and come out as plain dicts in their stored shape. Every
+    write to assessments advances the change token that list ETags are built on
+    """
+    
+    # Assessments
+    
+    @abstractmethod
+    async def insert_assessment(self, document: dict):
+        """Store a new assessment"""
+    
+    @abstractmethod
+    async def insert_assessments(self, documents: List[dict]):
+        """Store many new assessments with one write"""
+    
+    @abstractmethod
+    async def get_assessment(
+        self,
+        assessment_id: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[dict]:
+        """One assessment by id, optionally only the given fields"""
+    
+    @abstractmethod
+    async def find_assessments(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        patient_id: Optional[str] = None,
+        physician_name: Optional[str] = None,
+        risk_result: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """
+        Assessments matching every given filter, newest first, optionally only the given fields
+        `physician_name` is a case-insensitive regular expression
+        """
+    
+    @abstractmethod
+    def scan_assessments(self, fields: Sequence[str]) -> AsyncIterator[dict]:
+        """Every assessment, only the given fields, in no particular order"""
+    
+    @abstractmethod
+    async def assessments_changed(
+        self,
+        after: Optional[Tuple[datetime, str]],
+        until: datetime,
+        limit: int
+    ) -> List[dict]:
+        """
+        Assessments by (updated_at, id), those after the `after` position up to
+        `until`, for incremental readers that keep their place with a watermark
+        """
+    
+    @abstractmethod
+    async def update_assessment(
+        self,
+        assessment_id: str,
+        fields: dict,
+        expected_versions: Optional[Sequence[int]] = None
+    ) -> Optional[dict]:
+        """
+        Set `fields` and increment the version, returning the updated assessment
+        With `expected_versions` the update only applies while the stored
+        version is one of them; returns None if nothing was updated
+        """
+    
+    @abstractmethod
+    async def apply_calculations(self, updates: List[Tuple[str, dict]]):
+        """Set calculated fields on many assessments, as (assessment_id, fields) pairs, incrementing each version"""
+    
+    @abstractmethod
+    async def delete_assessment(self, assessment_id: str) -> Optional[dict]:
+        """Delete an assessment and its calculations, returning the deleted assessment"""
+    
+    @abstractmethod
+    async def change_token(self) -> int:
+        """
+        Counter advanced by every write to assessments
+        Read it before querying, so a write racing with the query can only make
+        the token older than the data, never newer
+        """
+    
+    # Calculations
+    
+    @abstractmethod
+    async def insert_calculations(self, calculations: List[dict]):
+        """Store calculation results"""
+    
+    @abstractmethod
+    async def latest_calculation(self, assessment_id: str) -> Optional[dict]:
+        """The most recent calculation of an assessment"""
+    
+    @abstractmethod
+    async def calculations_since(
+        self,
+        after: Optional[Tuple[datetime, str]],
+        until: datetime,
+        limit: int
+    ) -> List[dict]:
+        """Calculations by (calculated_at, assessment_id), those after the `after` position up to `until`"""
+    
+    # History
+    
+    @abstractmethod
+    async def insert_history(self, records: List[dict]):
+        """Store assessment history records"""
+    
+    @abstractmethod
+    async def history(self, assessment_id: str, skip: int = 0, limit: int = 50) -> List[dict]:
+        """History of an assessment, newest first"""
+    
+    @abstractmethod
+    async def deletions_since(
+        self,
+        after: Optional[Tuple[datetime, str]],
+        until: datetime,
+        limit: int
+    ) -> List[dict]:
+        """History records of deleted assessments by (timestamp, id), those after the `after` position up to `until`"""
+    
+    # Patient timeline
+    
+    @abstractmethod
+    async def latest_risk_results(self, patient_ids: Iterable[str]) -> Dict[str, str]:
+        """Risk result of each patient's latest timeline entry, for patients that have one"""
+    
+    @abstractmethod
+    async def insert_timeline(self, entries: List[dict]):
+        """Append entries to patient timelines"""
+    
+    @abstractmethod
+    async def patient_timeline(self, patient_id: str, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Timeline entries of one patient in chronological order"""
+    
+    @abstractmethod
+    async def risk_transitions(
+        self,
+        from_risk: str,
+        to_risk: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[dict]:
+        """Timeline entries where a patient's risk changed from one result to another, oldest first"""
+    
+    @abstractmethod
+    async def ping(self):
+        """Raise if the storage is unreachable"""
+    
+    def without_session(self) -> "AssessmentRepository":
+        """The same storage outside any request's session, for loads shared between requests"""
+        return self
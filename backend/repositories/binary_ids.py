@@ -0,0 +1,68 @@
+"""
+Binary storage of UUID ids
+With ID_STORAGE=binary, canonical uuid4 strings are stored as BSON Binary
+subtype 4 (16 bytes instead of a 36 character string) in the indexed id
+fields below, and turned back into strings on read. Ids that are not
+canonical UUIDs are stored as they are. Reads match both encodings, so
+documents written before the switch keep working until they are migrated
+"""
+import uuid
+from typing import Iterable, List, Optional, Union
+
+from bson.binary import Binary, UuidRepresentation
+
+# Indexed id fields per collection
+ID_FIELDS = {
+    "assessments": ("id",),
+    "calculations": ("assessment_id",),
+    "assessment_history": ("id", "assessment_id"),
+}
+
+def encode_id(value):
+    """The Binary form of a canonical UUID string, anything else as it is"""
+    
+    if not isinstance(value, str) or len(value) != 36:
+        return value
+    try:
+        parsed = uuid.UUID(value)
+    except ValueError:
+        return value
+    if str(parsed) != value:
+        # Upper-case or otherwise non-canonical text would not read back the same
+        return value
+    return Binary.from_uuid(parsed, UuidRepresentation.STANDARD)
+
+def decode_id(value):
+    if isinstance(value, Binary) and value.subtype == 4:
+        return str(value.as_uuid(UuidRepresentation.STANDARD))
+    return value
+
+def id_values(value) -> List[Union[str, Binary]]:
+    """Every stored form of an id"""
+    
+    encoded = encode_id(value)
+    return [encoded] if encoded is value else [encoded, value]
+
+def id_filter(value):
+    """Query condition matching an id in either encoding"""
+    
+    values = id_values(value)
+    return values[0] if len(values) == 1 else {"$in": values}
+
+def ids_filter(values: Iterable) -> dict:
+    return {"$in": [stored for value in values for stored in id_values(value)]}
+
+def encode_ids(document: dict, collection: str) -> dict:
+    encoded = dict(document)
+    for field in ID_FIELDS[collection]:
+        if field in encoded:
+            encoded[field] = encode_id(encoded[field])
+    return encoded
+
+def decode_ids(document: Optional[dict], collection: str) -> Optional[dict]:
+    if document is None:
+        return None
+    for field in ID_FIELDS[collection]:
+        if field in document:
+            document[field] = decode_id(document[field])
+    return document
@@ -0,0 +1,206 @@
+"""
+Compact storage encoding of assessments and calculations (schema version 2)
+Assessments keep the three genetic criteria as a `criteria` bitmask and their
+risk factors as a `factor_mask`, plus the β2M factor's text, which quotes the
+lab values it was calculated from. Calculations keep the criteria bitmask and
+lab values instead of the rendered text. Both are expanded back to the API
+shape on read; documents that would not round-trip exactly are stored as they are.
+The factor and result text comes from the current rules, so changing that text
+needs a new schema version here
+"""
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.models.documents import ASSESSMENT_SCHEMA_VERSION
+from backend.models.patient_assessment import PatientAssessmentResponse
+from backend.services.risk_calculator import (
+    DEL17P_TP53,
+    TRANSLOCATION_COMBO,
+    DEL1P32_1Q,
+    HIGH_B2M_NORMAL_CREATININE,
+    RULES_VERSION,
+    IMWGRiskCalculator
+)
+
+COMPACT_SCHEMA_VERSION = 2
+
+# Bit of each genetic criterion in `criteria`
+CRITERIA_BITS = {
+    "del17p_tp53": DEL17P_TP53,
+    "translocation_combo": TRANSLOCATION_COMBO,
+    "del1p32_1q": DEL1P32_1Q,
+}
+
+FACTOR_BITS = (DEL17P_TP53, TRANSLOCATION_COMBO, DEL1P32_1Q, HIGH_B2M_NORMAL_CREATININE)
+
+# Stored fields each API field is rebuilt from
+STORED_FIELDS = {
+    **{field: ("criteria",) for field in CRITERIA_BITS},
+    "risk_factors": ("factor_mask", "b2m_factor"),
+    "total_risk_factors": ("factor_mask",),
+}
+
+@lru_cache(maxsize=None)
+def _factor(bit: int) -> dict:
+    labs = SimpleNamespace(b2m_value=None, creatinine_value=None)
+    return IMWGRiskCalculator.risk_factors_from_mask(bit, labs)[0].model_dump()
+
+@lru_cache(maxsize=None)
+def _factor_bits() -> Dict[str, int]:
+    return {_factor(bit)["criterion"]: bit for bit in FACTOR_BITS}
+
+def _expand_factors(factor_mask: int, b2m_factor: Optional[str]) -> List[dict]:
+    factors = []
+    for bit in FACTOR_BITS:
+        if factor_mask & bit:
+            factor = dict(_factor(bit))
+            if bit == HIGH_B2M_NORMAL_CREATININE:
+                factor["description"] = b2m_factor
+            factors.append(factor)
+    return factors
+
+def _compact_factors(risk_factors: List[dict]) -> Optional[dict]:
+    """factor_mask and b2m_factor for a risk factor list, None if it would not round-trip"""
+    
+    factor_mask = 0
+    b2m_factor = None
+    for factor in risk_factors:
+        factor = dict(factor)
+        bit = _factor_bits().get(factor.get("criterion"))
+        if bit is None:
+            return None
+        factor_mask |= bit
+        if bit == HIGH_B2M_NORMAL_CREATININE:
+            b2m_factor = factor.get("description")
+    if _expand_factors(factor_mask, b2m_factor) != [dict(factor) for factor in risk_factors]:
+        return None
+    
+    compact = {"factor_mask": factor_mask}
+    if b2m_factor is not None:
+        compact["b2m_factor"] = b2m_factor
+    return compact
+
+def compact_assessment(document: dict) -> dict:
+    """The stored form of an assessment written by this API, or the document itself if it cannot be compacted"""
+    
+    if document.get("schema_version") != ASSESSMENT_SCHEMA_VERSION:
+        return document
+    if any(document.get(field) not in ("positive", "negative") for field in CRITERIA_BITS):
+        return document
+    risk_factors = [dict(factor) for factor in document.get("risk_factors", [])]
+    factors = _compact_factors(risk_factors)
+    if factors is None or document.get("total_risk_factors", 0) != len(risk_factors):
+        return document
+    
+    compact = {
+        key: value for key, value in document.items()
+        if key not in CRITERIA_BITS and key not in ("risk_factors", "total_risk_factors")
+    }
+    compact["criteria"] = sum(bit for field, bit in CRITERIA_BITS.items() if document[field] == "positive")
+    compact.update(factors)
+    compact["schema_version"] = COMPACT_SCHEMA_VERSION
+    return compact
+
+def expand_assessment(document: dict) -> dict:
+    """An assessment in the API shape; handles documents read with a projection"""
+    
+    if document.get("schema_version") != COMPACT_SCHEMA_VERSION:
+        return document
+    
+    expanded = dict(document)
+    if "criteria" in expanded:
+        criteria = expanded.pop("criteria")
+        for field, bit in CRITERIA_BITS.items():
+            expanded[field] = "positive" if criteria & bit else "negative"
+    if "factor_mask" in expanded:
+        factors = _expand_factors(expanded.pop("factor_mask"), expanded.pop("b2m_factor", None))
+        expanded["risk_factors"] = factors
+        expanded["total_risk_factors"] = len(factors)
+    expanded["schema_version"] = ASSESSMENT_SCHEMA_VERSION
+    # Trusted documents are rendered in their stored key order
+    ordered = {field: expanded.pop(field) for field in PatientAssessmentResponse.model_fields if field in expanded}
+    return {**ordered, **expanded}
+
+def stored_fields(fields: Iterable[str]) -> List[str]:
+    """
+    Fields to read to rebuild `fields` from either encoding
+    schema_version is only read when a field needs expanding, so reads of
+    other fields can still be answered from an index
+    """
+    
+    stored = set()
+    for field in fields:
+        stored.add(field)
+        stored.update(STORED_FIELDS.get(field, ()))
+    if stored & STORED_FIELDS.keys():
+        stored.add("schema_version")
+    return sorted(stored)
+
+def compact_update(fields: dict, criteria: Optional[int] = None) -> Tuple[dict, List[str]]:
+    """
+    Fields to $set and $unset on a compact assessment for an update in the API shape
+    Changing a genetic criterion needs the document's current `criteria`
+    """
+    
+    updates = {key: value for key, value in fields.items() if key not in STORED_FIELDS}
+    unset = []
+    
+    changed = {field: fields[field] for field in CRITERIA_BITS if field in fields}
+    if changed:
+        for field, value in changed.items():
+            if value == "positive":
+                criteria |= CRITERIA_BITS[field]
+            else:
+                criteria &= ~CRITERIA_BITS[field]
+        updates["criteria"] = criteria
+    
+    if "risk_factors" in fields:
+        factors = _compact_factors([dict(factor) for factor in fields["risk_factors"]])
+        if factors is None:
+            raise ValueError("Risk factors cannot be stored compactly")
+        updates.update(factors)
+        if "b2m_factor" not in factors:
+            unset.append("b2m_factor")
+    return updates, unset
+
+def compact_calculation(calculation: dict) -> dict:
+    """
+    The stored form of a calculation result, or the result itself if it cannot be compacted
+    Expects the result's fields plus the b2m_value and creatinine_value it was calculated from
+    """
+    
+    risk_factors = [dict(factor) for factor in calculation.get("risk_factors", [])]
+    bits = [_factor_bits().get(factor.get("criterion")) for factor in risk_factors]
+    if None in bits or "b2m_value" not in calculation or "creatinine_value" not in calculation:
+        return calculation
+    
+    compact = {
+        "assessment_id": calculation["assessment_id"],
+        "risk_result": getattr(calculation["risk_result"], "value", calculation["risk_result"]),
+        "risk_mask": sum(bits),
+        "rules_version": RULES_VERSION,
+        "b2m_value": calculation["b2m_value"],
+        "creatinine_value": calculation["creatinine_value"],
+        "calculated_at": calculation["calculated_at"],
+        "schema_version": COMPACT_SCHEMA_VERSION,
+    }
+    expanded = expand_calculation(compact)
+    original = {key: calculation[key] for key in expanded if key in calculation}
+    original["risk_factors"] = risk_factors
+    original["risk_result"] = compact["risk_result"]
+    if expanded != original:
+        return calculation
+    return compact
+
+def expand_calculation(row: dict) -> dict:
+    """A stored calculation as RiskCalculationResult fields"""
+    
+    if row.get("schema_version") != COMPACT_SCHEMA_VERSION:
+        return row
+    
+    inputs = SimpleNamespace(
+        id=row["assessment_id"], b2m_value=row["b2m_value"], creatinine_value=row["creatinine_value"]
+    )
+    result = IMWGRiskCalculator.build_result(inputs, row["risk_mask"], calculated_at=row["calculated_at"])
+    return result.model_dump(mode="python") | {"risk_result": result.risk_result.value}
@@ -0,0 +1,255 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from backend.repositories.base import AssessmentRepository
+from backend.repositories.compact import (
+    compact_assessment,
+    compact_calculation,
+    expand_assessment,
+    expand_calculation
+)
+
+def _sort_key(value: Optional[datetime]) -> Tuple[bool, datetime]:
+    # Documents without the field sort first, as missing fields do in MongoDB
+    return (value is not None, value or datetime.min)
+
+def _calculated_at(entry: dict) -> datetime:
+    return entry["calculated_at"]
+
+def _after(
+    documents: Iterable[dict],
+    time_field: str,
+    id_field: str,
+    after: Optional[Tuple[datetime, str]],
+    until: datetime,
+    limit: int
+) -> List[dict]:
+    # Keyset page by (time, id); documents without the time field are never returned
+    page = sorted(
+        (
+            document for document in documents
+            if document.get(time_field) is not None and document[time_field] <= until
+            and (after is None or (document[time_field], document[id_field]) > after)
+        ),
+        key=lambda document: (document[time_field], document[id_field])
+    )
+    return [dict(document) for document in page[:limit]]
+
+def _project(document: dict, fields: Optional[Sequence[str]]) -> dict:
+    document = expand_assessment(document)
+    if fields is None:
+        return dict(document)
+    return {field: document[field] for field in fields if field in document}
+
+class InMemoryAssessmentRepository(AssessmentRepository):
+    """
+    Assessments kept in this process, for single-node deployments and hermetic load tests
+    Assessments are indexed by id and patient_id (hash) and created_at (sorted);
+    timelines are kept sorted per patient and per risk transition. Every method
+    runs without awaiting, so each is atomic on the event loop. Assessments and
+    calculations are kept in the compact encoding of backend/repositories/compact.py.
+    Documents are copied in and out; nested values are shared and must not be mutated
+    """
+    
+    def __init__(self):
+        self._assessments: Dict[str, dict] = {}
+        self._by_patient: Dict[str, Set[str]] = defaultdict(set)
+        self._by_created: List[Tuple[Tuple[bool, datetime], str]] = []
+        self._change_token = 0
+        self._calculations: Dict[str, List[dict]] = defaultdict(list)
+        self._history: Dict[str, List[dict]] = defaultdict(list)
+        self._timelines: Dict[str, List[dict]] = defaultdict(list)
+        self._transitions: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+    
+    def _index(self, document: dict):
+        self._by_patient[document.get("patient_id")].add(document["id"])
+        insort(self._by_created, (_sort_key(document.get("created_at")), document["id"]))
+    
+    def _unindex(self, document: dict):
+        patient_ids = self._by_patient[document.get("patient_id")]
+        patient_ids.discard(document["id"])
+        if not patient_ids:
+            del self._by_patient[document.get("patient_id")]
+        entry = (_sort_key(document.get("created_at")), document["id"])
+        del self._by_created[bisect_left(self._by_created, entry)]
+    
+    async def insert_assessment(self, document: dict):
+        if document["id"] in self._assessments:
+            raise ValueError(f"Duplicate assessment id {document['id']}")
+        document = dict(compact_assessment(document))
+        self._assessments[document["id"]] = document
+        self._index(document)
+        self._change_token += 1
+    
+    async def insert_assessments(self, documents):
+        for document in documents:
+            await self.insert_assessment(document)
+    
+    async def get_assessment(self, assessment_id, fields=None):
+        document = self._assessments.get(assessment_id)
+        return _project(document, fields) if document else None
+    
+    def _newest_first(self, ids: Iterable[str]) -> List[dict]:
+        documents = [self._assessments[assessment_id] for assessment_id in ids if assessment_id in self._assessments]
+        documents.sort(key=lambda document: (_sort_key(document.get("created_at")), document["id"]), reverse=True)
+        return documents
+    
+    async def find_assessments(
+        self,
+        ids=None,
+        patient_id=None,
+        physician_name=None,
+        risk_result=None,
+        status=None,
+        skip=0,
+        limit=100,
+        fields=None
+    ):
+        # Narrow down with a hash index when possible, otherwise walk created_at
+        if ids is not None:
+            candidates = self._newest_first(set(ids))
+        elif patient_id:
+            candidates = self._newest_first(self._by_patient.get(patient_id, ()))
+        else:
+            candidates = (self._assessments[assessment_id] for _, assessment_id in reversed(self._by_created))
+        
+        physician = re.compile(physician_name, re.IGNORECASE) if physician_name else None
+        matches = []
+        for document in candidates:
+            if patient_id and document.get("patient_id") != patient_id:
+                continue
+            if physician and not physician.search(document.get("physician_name") or ""):
+                continue
+            if risk_result and document.get("risk_result") != risk_result:
+                continue
+            if status and document.get("status") != status:
+                continue
+            matches.append(document)
+            if len(matches) == skip + limit:
+                break
+        return [_project(document, fields) for document in matches[skip:]]
+    
+    async def scan_assessments(self, fields: Sequence[str]) -> AsyncIterator[dict]:
+        for document in list(self._assessments.values()):
+            yield _project(document, fields)
+    
+    async def assessments_changed(self, after, until, limit):
+        changed = _after(self._assessments.values(), "updated_at", "id", after, until, limit)
+        return [expand_assessment(document) for document in changed]
+    
+    async def update_assessment(self, assessment_id, fields, expected_versions=None):
+        document = self._assessments.get(assessment_id)
+        if not document:
+            return None
+        if expected_versions is not None and document.get("version", 1) not in expected_versions:
+            return None
+        document = self._update(document, fields)
+        self._change_token += 1
+        return _project(document, None)
+    
+    def _update(self, document: dict, fields: dict) -> dict:
+        reindex = "patient_id" in fields or "created_at" in fields
+        if reindex:
+            self._unindex(document)
+        updated = {**expand_assessment(document), **fields}
+        updated["version"] = document.get("version", 1) + 1
+        updated = dict(compact_assessment(updated))
+        self._assessments[updated["id"]] = updated
+        if reindex:
+            self._index(updated)
+        return updated
+    
+    async def apply_calculations(self, updates: List[Tuple[str, dict]]):
+        if not updates:
+            return
+        for assessment_id, fields in updates:
+            document = self._assessments.get(assessment_id)
+            if document:
+                self._update(document, fields)
+        self._change_token += 1
+    
+    async def delete_assessment(self, assessment_id):
+        document = self._assessments.pop(assessment_id, None)
+        if document:
+            self._unindex(document)
+            self._calculations.pop(assessment_id, None)
+            self._change_token += 1
+        return _project(document, None) if document else None
+    
+    async def change_token(self) -> int:
+        return self._change_token
+    
+    async def insert_calculations(self, calculations: List[dict]):
+        for calculation in calculations:
+            self._calculations[calculation["assessment_id"]].append(dict(compact_calculation(calculation)))
+    
+    async def latest_calculation(self, assessment_id):
+        calculations = self._calculations.get(assessment_id)
+        if not calculations:
+            return None
+        latest = max(calculations, key=lambda calculation: _sort_key(calculation.get("calculated_at")))
+        return dict(expand_calculation(latest))
+    
+    async def calculations_since(self, after, until, limit):
+        calculations = (calculation for records in self._calculations.values() for calculation in records)
+        page = _after(calculations, "calculated_at", "assessment_id", after, until, limit)
+        return [expand_calculation(row) for row in page]
+    
+    async def insert_history(self, records: List[dict]):
+        for record in records:
+            self._history[record["assessment_id"]].append(dict(record))
+    
+    async def history(self, assessment_id, skip=0, limit=50):
+        records = sorted(
+            self._history.get(assessment_id, ()),
+            key=lambda record: _sort_key(record.get("timestamp")),
+            reverse=True
+        )
+        return [dict(record) for record in records[skip:skip + limit]]
+    
+    async def deletions_since(self, after, until, limit):
+        records = (
+            record for records in self._history.values() for record in records
+            if record.get("action") == "deleted"
+        )
+        return _after(records, "timestamp", "id", after, until, limit)
+    
+    async def latest_risk_results(self, patient_ids: Iterable[str]) -> Dict[str, str]:
+        return {
+            patient_id: self._timelines[patient_id][-1]["risk_result"]
+            for patient_id in patient_ids
+            if self._timelines.get(patient_id)
+        }
+    
+    async def insert_timeline(self, entries: List[dict]):
+        for entry in entries:
+            entry = dict(entry)
+            insort(self._timelines[entry["patient_id"]], entry, key=_calculated_at)
+            if entry.get("transition"):
+                # Only transitions are indexed, like the partial index in MongoDB
+                transition = (entry["previous_risk_result"], entry["risk_result"])
+                insort(self._transitions[transition], entry, key=_calculated_at)
+    
+    async def patient_timeline(self, patient_id, skip=0, limit=100):
+        return [dict(entry) for entry in self._timelines.get(patient_id, ())[skip:skip + limit]]
+    
+    async def risk_transitions(
+        self,
+        from_risk: str,
+        to_risk: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        entries = self._transitions.get((from_risk, to_risk), [])
+        start = bisect_left(entries, since, key=_calculated_at) if since else 0
+        end = bisect_left(entries, until, key=_calculated_at) if until else len(entries)
+        start += skip
+        return [dict(entry) for entry in entries[start:min(start + limit, end)]]
+    
+    async def ping(self):
+        pass
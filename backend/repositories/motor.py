@@ -0,0 +1,337 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+
+from backend.repositories.base import AssessmentRepository
+from backend.repositories.binary_ids import decode_ids, encode_id, encode_ids, id_filter, ids_filter
+from backend.repositories.compact import (
+    COMPACT_SCHEMA_VERSION,
+    CRITERIA_BITS,
+    compact_assessment,
+    compact_calculation,
+    compact_update,
+    expand_assessment,
+    expand_calculation,
+    stored_fields
+)
+
+# Attempts at a criteria update before giving up on a contended assessment
+MAX_UPDATE_ATTEMPTS = 5
+
+def _projection(fields: Optional[Sequence[str]]) -> Optional[dict]:
+    if fields is None:
+        return None
+    return {"_id": 0, **{field: 1 for field in stored_fields(fields)}}
+
+def _expanded(document: Optional[dict], fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+    if document is None:
+        return None
+    document = expand_assessment(decode_ids(document, "assessments"))
+    if fields is None:
+        return document
+    return {field: document[field] for field in fields if field in document}
+
+def _keyset_query(
+    time_field: str,
+    id_field: str,
+    after: Optional[Tuple[datetime, str]],
+    until: datetime,
+    binary_ids: bool = False
+) -> dict:
+    # Everything past the (time, id) position, so equal timestamps are never skipped
+    query = {time_field: {"$lte": until}}
+    if after is not None:
+        query["$or"] = [
+            {time_field: {"$gt": after[0]}},
+            {time_field: after[0], id_field: {"$gt": after[1]}}
+        ]
+        if binary_ids:
+            # $gt only compares values of the same BSON type, so each encoding
+            # needs its own bound; rows sharing a timestamp with a row migrated
+            # mid-page can be read again
+            query["$or"].append({time_field: after[0], id_field: {"$gt": encode_id(after[1])}})
+    return query
+
+# Listings are always newest first; the listing indexes in backend/database.py end in this key
+LIST_SORT = [("created_at", -1)]
+
+def list_filter(
+    ids: Optional[Iterable] = None,
+    patient_id: Optional[str] = None,
+    physician_name: Optional[str] = None,
+    risk_result: Optional[str] = None,
+    status: Optional[str] = None
+) -> dict:
+    """The find() filter of an assessment listing, also explained by backend/services/query_advisor.py"""
+    
+    filter_query = {}
+    if ids is not None:
+        filter_query["id"] = ids
+    if patient_id:
+        filter_query["patient_id"] = patient_id
+    if physician_name:
+        filter_query["physician_name"] = {"$regex": physician_name, "$options": "i"}
+    if risk_result:
+        filter_query["risk_result"] = risk_result
+    if status:
+        filter_query["status"] = status
+    return filter_query
+
+class MotorAssessmentRepository(AssessmentRepository):
+    """
+    Assessments stored in MongoDB, using the indexes declared in backend/database.py
+    With binary_ids, UUID ids are written as BSON Binary (backend/repositories/binary_ids.py)
+    Every operation runs in `session` when one is given; its reads follow the
+    read preference and read concern of `db`
+    """
+    
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        binary_ids: bool = False,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ):
+        self.db = db
+        self.binary_ids = binary_ids
+        self.session = session
+    
+    def without_session(self):
+        return MotorAssessmentRepository(self.db, self.binary_ids) if self.session else self
+    
+    def _id(self, value):
+        return id_filter(value) if self.binary_ids else value
+    
+    def _ids(self, values: Iterable) -> dict:
+        return ids_filter(values) if self.binary_ids else {"$in": list(values)}
+    
+    def _encoded(self, document: dict, collection: str) -> dict:
+        # Always a copy; insert_one and insert_many add _id to what they are given
+        return encode_ids(document, collection) if self.binary_ids else dict(document)
+    
+    def _keyset_query(self, time_field: str, id_field: str, after, until) -> dict:
+        return _keyset_query(time_field, id_field, after, until, self.binary_ids)
+    
+    async def _bump_change_token(self):
+        await self.db.change_tokens.update_one(
+            {"_id": "assessments"}, {"$inc": {"seq": 1}}, upsert=True, session=self.session
+        )
+    
+    async def insert_assessment(self, document: dict):
+        document = self._encoded(compact_assessment(document), "assessments")
+        await self.db.assessments.insert_one(document, session=self.session)
+        await self._bump_change_token()
+    
+    async def insert_assessments(self, documents):
+        if documents:
+            await self.db.assessments.insert_many(
+                [self._encoded(compact_assessment(document), "assessments") for document in documents],
+                ordered=False,
+                session=self.session
+            )
+            await self._bump_change_token()
+    
+    async def get_assessment(self, assessment_id, fields=None):
+        document = await self.db.assessments.find_one(
+            {"id": self._id(assessment_id)}, _projection(fields), session=self.session
+        )
+        return _expanded(document, fields)
+    
+    async def find_assessments(
+        self,
+        ids=None,
+        patient_id=None,
+        physician_name=None,
+        risk_result=None,
+        status=None,
+        skip=0,
+        limit=100,
+        fields=None
+    ):
+        filter_query = list_filter(
+            self._ids(ids) if ids is not None else None, patient_id, physician_name, risk_result, status
+        )
+        cursor = self.db.assessments.find(filter_query, _projection(fields), session=self.session)
+        cursor = cursor.sort(LIST_SORT).skip(skip).limit(limit)
+        return [_expanded(document, fields) for document in await cursor.to_list(length=limit)]
+    
+    async def scan_assessments(self, fields: Sequence[str]) -> AsyncIterator[dict]:
+        cursor = self.db.assessments.find({}, _projection(fields), session=self.session)
+        async for document in cursor.batch_size(10000):
+            yield _expanded(document, fields)
+    
+    async def assessments_changed(self, after, until, limit):
+        query = self._keyset_query("updated_at", "id", after, until)
+        cursor = self.db.assessments.find(query, session=self.session)
+        documents = await cursor.sort([("updated_at", 1), ("id", 1)]).limit(limit).to_list(length=limit)
+        return [_expanded(document) for document in documents]
+    
+    async def update_assessment(self, assessment_id, fields, expected_versions=None):
+        if not CRITERIA_BITS.keys() & fields.keys():
+            # The other editable fields are stored the same way in both encodings
+            filter_query = {"id": self._id(assessment_id)}
+            if expected_versions is not None:
+                filter_query["version"] = {"$in": list(expected_versions)}
+            document = await self._find_one_and_update(filter_query, {"$set": fields})
+        else:
+            document = await self._update_criteria(assessment_id, fields, expected_versions)
+        if document:
+            await self._bump_change_token()
+        return _expanded(document)
+    
+    async def _find_one_and_update(self, filter_query: dict, update: dict) -> Optional[dict]:
+        # Compare-and-swap in one round trip, returning the updated document
+        return await self.db.assessments.find_one_and_update(
+            filter_query,
+            {**update, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER,
+            session=self.session
+        )
+    
+    async def _update_criteria(self, assessment_id, fields, expected_versions) -> Optional[dict]:
+        """
+        Compact assessments keep the criteria in one bitmask, so changing one
+        reads the current mask and writes the new one only if the version is unchanged
+        """
+        
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            current = await self.db.assessments.find_one(
+                {"id": self._id(assessment_id)},
+                {"_id": 0, "version": 1, "criteria": 1, "schema_version": 1},
+                session=self.session
+            )
+            if not current:
+                return None
+            version = current.get("version", 1)
+            if expected_versions is not None and version not in expected_versions:
+                return None
+            
+            update = {"$set": fields}
+            if current.get("schema_version") == COMPACT_SCHEMA_VERSION:
+                updates, unset = compact_update(fields, current["criteria"])
+                update = {"$set": updates, **({"$unset": dict.fromkeys(unset, "")} if unset else {})}
+            document = await self._find_one_and_update({"id": self._id(assessment_id), "version": version}, update)
+            if document or expected_versions is not None:
+                return document
+        return None
+    
+    async def apply_calculations(self, updates: List[Tuple[str, dict]]):
+        if not updates:
+            return
+        # Each assessment gets one update per encoding; only the one matching its schema applies
+        operations = []
+        for assessment_id, fields in updates:
+            compact, unset = compact_update(fields)
+            compact_operation = {"$set": compact, "$inc": {"version": 1}}
+            if unset:
+                compact_operation["$unset"] = dict.fromkeys(unset, "")
+            operations.append(UpdateOne(
+                {"id": self._id(assessment_id), "schema_version": COMPACT_SCHEMA_VERSION}, compact_operation
+            ))
+            operations.append(UpdateOne(
+                {"id": self._id(assessment_id), "schema_version": {"$ne": COMPACT_SCHEMA_VERSION}},
+                {"$set": fields, "$inc": {"version": 1}}
+            ))
+        await self.db.assessments.bulk_write(operations, ordered=False, session=self.session)
+        await self._bump_change_token()
+    
+    async def delete_assessment(self, assessment_id):
+        document = await self.db.assessments.find_one_and_delete(
+            {"id": self._id(assessment_id)}, session=self.session
+        )
+        if document:
+            await self._bump_change_token()
+            await self.db.calculations.delete_many(
+                {"assessment_id": self._id(assessment_id)}, session=self.session
+            )
+        return _expanded(document)
+    
+    async def change_token(self) -> int:
+        document = await self.db.change_tokens.find_one({"_id": "assessments"}, session=self.session)
+        return document["seq"] if document else 0
+    
+    async def insert_calculations(self, calculations: List[dict]):
+        if calculations:
+            await self.db.calculations.insert_many(
+                [self._encoded(compact_calculation(calculation), "calculations") for calculation in calculations],
+                ordered=False,
+                session=self.session
+            )
+    
+    async def latest_calculation(self, assessment_id):
+        row = await self.db.calculations.find_one(
+            {"assessment_id": self._id(assessment_id)},
+            {"_id": 0},
+            sort=[("calculated_at", -1)],
+            session=self.session
+        )
+        return expand_calculation(decode_ids(row, "calculations")) if row else None
+    
+    async def calculations_since(self, after, until, limit):
+        query = self._keyset_query("calculated_at", "assessment_id", after, until)
+        cursor = self.db.calculations.find(query, {"_id": 0}, session=self.session)
+        rows = await cursor.sort([("calculated_at", 1), ("assessment_id", 1)]).limit(limit).to_list(length=limit)
+        return [expand_calculation(decode_ids(row, "calculations")) for row in rows]
+    
+    async def insert_history(self, records: List[dict]):
+        if records:
+            await self.db.assessment_history.insert_many(
+                [self._encoded(record, "assessment_history") for record in records],
+                ordered=False,
+                session=self.session
+            )
+    
+    async def history(self, assessment_id, skip=0, limit=50):
+        cursor = self.db.assessment_history.find({"assessment_id": self._id(assessment_id)}, session=self.session)
+        records = await cursor.sort("timestamp", -1).skip(skip).limit(limit).to_list(length=limit)
+        return [decode_ids(record, "assessment_history") for record in records]
+    
+    async def deletions_since(self, after, until, limit):
+        query = {"action": "deleted", **self._keyset_query("timestamp", "id", after, until)}
+        cursor = self.db.assessment_history.find(query, {"_id": 0}, session=self.session)
+        records = await cursor.sort([("timestamp", 1), ("id", 1)]).limit(limit).to_list(length=limit)
+        return [decode_ids(record, "assessment_history") for record in records]
+    
+    async def latest_risk_results(self, patient_ids: Iterable[str]) -> Dict[str, str]:
+        # One pass over the (patient_id, calculated_at) index for all patients
+        cursor = self.db.patient_timeline.aggregate([
+            {"$match": {"patient_id": {"$in": list(patient_ids)}}},
+            {"$sort": {"patient_id": 1, "calculated_at": -1}},
+            {"$group": {"_id": "$patient_id", "risk_result": {"$first": "$risk_result"}}}
+        ], session=self.session)
+        return {row["_id"]: row["risk_result"] async for row in cursor}
+    
+    async def insert_timeline(self, entries: List[dict]):
+        if entries:
+            await self.db.patient_timeline.insert_many(
+                [dict(entry) for entry in entries], ordered=False, session=self.session
+            )
+    
+    async def patient_timeline(self, patient_id, skip=0, limit=100):
+        cursor = self.db.patient_timeline.find({"patient_id": patient_id}, session=self.session)
+        return await cursor.sort("calculated_at", 1).skip(skip).limit(limit).to_list(length=limit)
+    
+    async def risk_transitions(
+        self,
+        from_risk: str,
+        to_risk: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        # Matches the partial (previous_risk_result, risk_result, calculated_at) index
+        filter_query = {"transition": True, "previous_risk_result": from_risk, "risk_result": to_risk}
+        if since or until:
+            filter_query["calculated_at"] = {}
+            if since:
+                filter_query["calculated_at"]["$gte"] = since
+            if until:
+                filter_query["calculated_at"]["$lt"] = until
+        
+        cursor = self.db.patient_timeline.find(filter_query, session=self.session)
+        return await cursor.sort("calculated_at", 1).skip(skip).limit(limit).to_list(length=limit)
+    
+    async def ping(self):
+        await self.db.command("ping", session=self.session)
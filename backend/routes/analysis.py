@@ -0,0 +1,98 @@
+from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import time
+
+from backend.models.analysis import (
+    CohortSnapshotInfo,
+    WhatIfRequest,
+    WhatIfResponse,
+    ThresholdSweepRequest,
+    ThresholdSweepResponse
+)
+from backend.services.cohort_store import (
+    COHORT_FIELDS,
+    CohortSnapshotWriter,
+    CohortSnapshot,
+    current_snapshot
+)
+from backend.services.risk_calculator import B2M_CUTOFF, CREATININE_CUTOFF
+from backend.repositories.base import AssessmentRepository
+from backend.database import get_read_repository
+
+router = APIRouter(tags=["analysis"])
+
+def _snapshot_info(snapshot: CohortSnapshot) -> CohortSnapshotInfo:
+    return CohortSnapshotInfo(
+        count=snapshot.count,
+        built_at=snapshot.manifest["built_at"],
+        genetic_high_risk=snapshot.genetic_high_risk
+    )
+
+async def _require_snapshot() -> CohortSnapshot:
+    snapshot = await asyncio.to_thread(current_snapshot)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=409,
+            detail="No cohort snapshot yet, build one with POST /api/cohort/snapshot"
+        )
+    return snapshot
+
+@router.post("/cohort/snapshot", response_model=CohortSnapshotInfo)
+async def build_cohort_snapshot(repository: AssessmentRepository = Depends(get_read_repository)):
+    """Materialize the clinical columns of all assessments into a shared snapshot"""
+    
+    writer = CohortSnapshotWriter()
+    async for document in repository.scan_assessments(COHORT_FIELDS):
+        writer.append(document)
+    
+    await asyncio.to_thread(writer.write)
+    return _snapshot_info(await _require_snapshot())
+
+@router.get("/cohort/snapshot", response_model=CohortSnapshotInfo)
+async def get_cohort_snapshot():
+    """Describe the current cohort snapshot"""
+    
+    return _snapshot_info(await _require_snapshot())
+
+@router.post("/whatif", response_model=WhatIfResponse)
+async def what_if(request: WhatIfRequest):
+    """Count high-risk patients in the cohort snapshot for a grid of criterion 4 cutoffs"""
+    
+    snapshot = await _require_snapshot()
+    
+    start = time.perf_counter()
+    high_risk = await asyncio.to_thread(
+        snapshot.high_risk_grid, request.b2m_cutoffs, request.creatinine_cutoffs
+    )
+    
+    return WhatIfResponse(
+        cohort=_snapshot_info(snapshot),
+        b2m_cutoffs=request.b2m_cutoffs,
+        creatinine_cutoffs=request.creatinine_cutoffs,
+        high_risk=high_risk,
+        elapsed_ms=(time.perf_counter() - start) * 1000
+    )
+
+@router.post("/analysis/threshold-sweep", response_model=ThresholdSweepResponse)
+async def threshold_sweep(request: ThresholdSweepRequest):
+    """
+    Classification stability of the cohort snapshot around the criterion 4 cutoffs
+    Reports high-risk and reclassification counts against the current rules
+    """
+    
+    snapshot = await _require_snapshot()
+    b2m_cutoffs = request.b2m.values()
+    creatinine_cutoffs = request.creatinine.values()
+    
+    start = time.perf_counter()
+    sweep = await asyncio.to_thread(snapshot.threshold_sweep, b2m_cutoffs, creatinine_cutoffs)
+    
+    return ThresholdSweepResponse(
+        cohort=_snapshot_info(snapshot),
+        b2m_cutoffs=b2m_cutoffs,
+        creatinine_cutoffs=creatinine_cutoffs,
+        current_b2m_cutoff=B2M_CUTOFF,
+        current_creatinine_cutoff=CREATININE_CUTOFF,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        **sweep
+    )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Query
+from typing import Literal, Optional
+from datetime import datetime
+import asyncio
+
+from backend.models.analytics import (
+    AnalyticsStatus,
+    CohortBreakdown,
+    FactorCooccurrence,
+    RiskTrends
+)
+from backend.services.analytics_mirror import analytics_mirror
+
+# Answered from the local analytics mirror, never from the primary database
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/status", response_model=AnalyticsStatus)
+async def get_analytics_status():
+    """Rows in the analytics mirror and how far each source has been synced"""
+    
+    return await asyncio.to_thread(analytics_mirror.status)
+
+@router.get("/query/cohort-breakdown", response_model=CohortBreakdown)
+async def cohort_breakdown(
+    group_by: Literal["institution", "physician_name", "status", "risk_result"] = Query("institution")
+):
+    """Assessments, high-risk results and mean labs per institution, physician, status or risk result"""
+    
+    groups = await asyncio.to_thread(analytics_mirror.cohort_breakdown, group_by)
+    return CohortBreakdown(group_by=group_by, groups=groups)
+
+@router.get("/query/factor-cooccurrence", response_model=FactorCooccurrence)
+async def factor_cooccurrence():
+    """How often each pair of IMWG criteria is met by the same assessment"""
+    
+    return await asyncio.to_thread(analytics_mirror.factor_cooccurrence)
+
+@router.get("/query/trends", response_model=RiskTrends)
+async def risk_trends(
+    bucket: Literal["day", "week", "month"] = Query("week"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None)
+):
+    """Calculations and high-risk results over time"""
+    
+    points = await asyncio.to_thread(analytics_mirror.risk_trends, bucket, since, until)
+    return RiskTrends(bucket=bucket, points=points)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 import os
 
@@ -9,102 +9,187 @@ from backend.models.patient_assessment import (
     PatientAssessmentCreate,
     PatientAssessmentUpdate,
     PatientAssessmentResponse,
+    PatientAssessmentWithResult,
+    AssessmentSummary,
+    SUMMARY_FIELDS,
     RiskCalculationResult,
     AssessmentHistory,
-    AssessmentStatus
+    AssessmentStatus,
+    BatchCalculateRequest,
+    BatchCalculateItem
+)
+from backend.models.documents import (
+    ASSESSMENT_SCHEMA_VERSION,
+    render_assessment,
+    render_assessments,
+    render_history,
+    render_summaries
 )
 from backend.services.risk_calculator import IMWGRiskCalculator
-from backend.database import get_database
+from backend.services.history import history_record, log_assessment_action
+from backend.services.timeline import record_calculations
+from backend.services.read_cache import read_cache
+from backend.services.etags import (
+    ETAG_FIELDS,
+    assessment_etag,
+    list_etag,
+    etag_matches,
+    etag_versions
+)
+from backend.routes.validation import AssessmentValidationRoute
+from backend.repositories.base import AssessmentRepository
+from backend.database import get_assessment_repository, get_read_repository, get_repository
+
+router = APIRouter(prefix="/assessments", tags=["assessments"], route_class=AssessmentValidationRoute)
+
+# Largest number of assessments calculated by one batch request
+MAX_BATCH_SIZE = 1000
 
-router = APIRouter(prefix="/assessments", tags=["assessments"])
+# History entries returned per page by default, and at most
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+
+# Fields that feed the risk calculation
+CALCULATION_INPUTS = {
+    "del17p_tp53",
+    "translocation_combo",
+    "del1p32_1q",
+    "b2m_value",
+    "creatinine_value"
+}
 
 @router.post("/", response_model=PatientAssessmentResponse)
 async def create_assessment(
     assessment_data: PatientAssessmentCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repository: AssessmentRepository = Depends(get_assessment_repository)
 ):
     """Create a new patient assessment"""
     
-    # Create assessment object
+    # Create assessment object; the request body was validated while parsing it
     assessment = PatientAssessment(**assessment_data.dict())
     
-    # Validate assessment data
-    is_valid, errors = IMWGRiskCalculator.validate_assessment_data(assessment)
-    if not is_valid:
-        raise HTTPException(status_code=400, detail={"errors": errors})
-    
     # Save to database
     assessment_dict = assessment.dict()
     assessment_dict["created_at"] = datetime.utcnow()
     assessment_dict["updated_at"] = datetime.utcnow()
+    assessment_dict["schema_version"] = ASSESSMENT_SCHEMA_VERSION
     
-    result = await db.assessments.insert_one(assessment_dict)
-    assessment_dict["_id"] = str(result.inserted_id)
+    await repository.insert_assessment(assessment_dict)
     
     # Log creation in history
-    await _log_assessment_action(
-        db, assessment.id, "created", 
+    await log_assessment_action(
+        repository, assessment.id, "created", 
         {"created_by": assessment_data.physician_name or "Unknown"}
     )
     
     return PatientAssessmentResponse(**assessment_dict)
 
-@router.get("/{assessment_id}", response_model=PatientAssessmentResponse)
+@router.get(
+    "/{assessment_id}",
+    response_model=Union[PatientAssessmentWithResult, PatientAssessmentResponse]
+)
 async def get_assessment(
     assessment_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated extras, e.g. 'result'"),
+    if_none_match: Optional[str] = Header(None),
+    repository: AssessmentRepository = Depends(get_assessment_repository)
 ):
     """Get a specific assessment by ID"""
     
-    assessment = await db.assessments.find_one({"id": assessment_id})
+    includes = {part.strip() for part in include.split(",")} if include else set()
+    variant = includes & {"result"}
+    
+    if if_none_match:
+        # Revalidation only needs the ETag fields, not the whole document
+        current = await read_cache.get(
+            ("etag", assessment_id),
+            lambda: repository.without_session().get_assessment(assessment_id, ETAG_FIELDS)
+        )
+        if current:
+            etag = assessment_etag(current, variant)
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+    
+    assessment = await _find_assessment(repository, assessment_id)
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    return PatientAssessmentResponse(**assessment)
+    etag = assessment_etag(assessment, variant)
+    if "result" not in includes:
+        return Response(render_assessment(assessment), media_type="application/json", headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    
+    with_result = PatientAssessmentWithResult(**assessment)
+    with_result.result = IMWGRiskCalculator.result_from_snapshot(with_result)
+    if with_result.result is None and with_result.risk_result is not None:
+        # Calculated before snapshots were embedded or under other rules,
+        # fall back to the stored result
+        calculation = await repository.latest_calculation(assessment_id)
+        if calculation:
+            with_result.result = RiskCalculationResult(**calculation)
+    
+    return with_result
 
 @router.put("/{assessment_id}", response_model=PatientAssessmentResponse)
 async def update_assessment(
     assessment_id: str,
     update_data: PatientAssessmentUpdate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    if_match: Optional[str] = Header(None),
+    repository: AssessmentRepository = Depends(get_assessment_repository)
 ):
-    """Update an existing assessment"""
+    """
+    Update an existing assessment
+    With If-Match, the update only applies to the version the client last saw
+    and fails with 409 if someone else changed the assessment since
+    """
     
-    # Get existing assessment
-    existing = await db.assessments.find_one({"id": assessment_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Assessment not found")
+    versions = etag_versions(if_match) if if_match else None
     
     # Update only provided fields
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
     update_dict["updated_at"] = datetime.utcnow()
     
-    # Update in database
-    await db.assessments.update_one(
-        {"id": assessment_id},
-        {"$set": update_dict}
-    )
-    
-    # Get updated assessment
-    updated_assessment = await db.assessments.find_one({"id": assessment_id})
+    if CALCULATION_INPUTS.intersection(update_dict):
+        # The embedded snapshot only describes the inputs it was calculated from
+        update_dict["latest_result"] = None
+    
+    # Compare-and-swap, returning the updated document
+    updated_assessment = await repository.update_assessment(assessment_id, update_dict, versions)
+    if not updated_assessment:
+        # Only failed updates pay for telling a missing assessment from a stale version
+        current = await repository.get_assessment(assessment_id, ETAG_FIELDS)
+        if not current:
+            raise HTTPException(status_code=404, detail="Assessment not found")
+        raise HTTPException(
+            status_code=409,
+            detail="Assessment was modified by another request; reload it and retry",
+            headers={"ETag": assessment_etag(current)}
+        )
     
     # Log update in history
-    await _log_assessment_action(
-        db, assessment_id, "updated", 
+    await log_assessment_action(
+        repository, assessment_id, "updated", 
         {"changes": update_dict, "updated_by": update_data.physician_name or "Unknown"}
     )
+    _invalidate_reads(assessment_id)
     
-    return PatientAssessmentResponse(**updated_assessment)
+    return Response(
+        render_assessment(updated_assessment),
+        media_type="application/json",
+        headers={"ETag": assessment_etag(updated_assessment)}
+    )
 
 @router.post("/{assessment_id}/calculate", response_model=RiskCalculationResult)
 async def calculate_risk(
     assessment_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repository: AssessmentRepository = Depends(get_assessment_repository)
 ):
     """Calculate risk for a specific assessment"""
     
     # Get assessment
-    assessment_data = await db.assessments.find_one({"id": assessment_id})
+    assessment_data = await repository.get_assessment(assessment_id)
     if not assessment_data:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
@@ -112,129 +197,259 @@ async def calculate_risk(
     
     # Calculate risk
     try:
-        result = IMWGRiskCalculator.calculate_risk(assessment)
-        
+        mask = IMWGRiskCalculator.criteria_mask(assessment)
+        result = IMWGRiskCalculator.build_result(assessment, mask)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating risk: {str(e)}")
+    
+    # Database errors propagate, so deadline timeouts are answered with 503
+    try:
         # Update assessment with calculated results
-        update_dict = {
-            "risk_result": result.risk_result.value,
-            "risk_factors": [factor.dict() for factor in result.risk_factors],
-            "total_risk_factors": result.total_risk_factors,
-            "status": AssessmentStatus.COMPLETED.value,
-            "updated_at": datetime.utcnow()
-        }
-        
-        await db.assessments.update_one(
-            {"id": assessment_id},
-            {"$set": update_dict}
-        )
+        await repository.apply_calculations([(assessment_id, _calculation_update(result, mask))])
         
         # Save calculation result
-        result_dict = result.dict()
-        await db.calculations.insert_one(result_dict)
+        await repository.insert_calculations([_calculation_record(assessment, result)])
         
         # Log calculation in history
-        await _log_assessment_action(
-            db, assessment_id, "calculated", 
-            {"risk_result": result.risk_result.value, "total_risk_factors": result.total_risk_factors}
+        await log_assessment_action(
+            repository, assessment_id, "calculated", _calculation_details(result)
         )
         
-        return result
+        # Extend the patient's risk timeline
+        await record_calculations(repository, [(assessment, result)])
+    finally:
+        _invalidate_reads(assessment_id)
+    
+    return result
+
+@router.post("/calculate")
+async def calculate_risk_batch(
+    request: BatchCalculateRequest,
+    repository: AssessmentRepository = Depends(get_assessment_repository)
+):
+    """
+    Calculate risk for many assessments in one request
+    Answers with one JSON line per assessment; nothing is sent until every
+    result is saved, so a response always reports what was stored
+    """
+    
+    if request.assessment_ids is not None:
+        if len(request.assessment_ids) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {MAX_BATCH_SIZE} assessments can be calculated per request"
+            )
+        filters = {"ids": request.assessment_ids}
+    else:
+        filters = request.model_dump(
+            mode="json", include={"patient_id", "risk_result", "status"}, exclude_none=True
+        )
+        if not filters:
+            raise HTTPException(
+                status_code=400,
+                detail="Provide assessment_ids or at least one filter"
+            )
+    
+    # Fetch every assessment with a single query, one more than allowed to
+    # tell a filter matching too many from one matching exactly the limit
+    documents = await repository.find_assessments(**filters, limit=MAX_BATCH_SIZE + 1)
+    if len(documents) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {MAX_BATCH_SIZE} assessments match, narrow the filter or pass assessment_ids"
+        )
+    
+    items = []
+    assessment_updates = []
+    calculations = []
+    history_records = []
+    timeline_calculations = []
+    for document in documents:
+        try:
+            assessment = PatientAssessment(**document)
+            mask = IMWGRiskCalculator.criteria_mask(assessment)
+            result = IMWGRiskCalculator.build_result(assessment, mask)
+        except Exception as e:
+            items.append(BatchCalculateItem(
+                assessment_id=document.get("id"),
+                status="error",
+                error=f"Error calculating risk: {str(e)}"
+            ))
+            continue
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error calculating risk: {str(e)}")
+        assessment_updates.append((assessment.id, _calculation_update(result, mask)))
+        calculations.append(_calculation_record(assessment, result))
+        timeline_calculations.append((assessment, result))
+        history_records.append(history_record(
+            assessment.id, "calculated", _calculation_details(result)
+        ))
+        items.append(BatchCalculateItem(
+            assessment_id=assessment.id,
+            status="calculated",
+            result=result
+        ))
+    
+    if request.assessment_ids is not None:
+        found = {document.get("id") for document in documents}
+        items.extend(
+            BatchCalculateItem(assessment_id=assessment_id, status="not_found")
+            for assessment_id in dict.fromkeys(request.assessment_ids)
+            if assessment_id not in found
+        )
+    
+    # Persist the whole batch with one write per collection
+    if assessment_updates:
+        await repository.apply_calculations(assessment_updates)
+        await repository.insert_calculations(calculations)
+        await repository.insert_history(history_records)
+        await record_calculations(repository, timeline_calculations)
+        _invalidate_reads(*(assessment.id for assessment, _ in timeline_calculations))
+    
+    def stream_items():
+        for item in items:
+            yield item.model_dump_json() + "\n"
+    
+    return StreamingResponse(stream_items(), media_type="application/x-ndjson")
 
-@router.get("/", response_model=List[PatientAssessmentResponse])
+@router.get("/", response_model=Union[List[PatientAssessmentResponse], List[AssessmentSummary]])
 async def list_assessments(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     patient_id: Optional[str] = Query(None),
     physician_name: Optional[str] = Query(None),
     risk_result: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    view: Literal["full", "summary"] = Query("full", description="'summary' returns only AssessmentSummary fields"),
+    if_none_match: Optional[str] = Header(None),
+    repository: AssessmentRepository = Depends(get_read_repository)
 ):
-    """List assessments with optional filtering"""
-    
-    # Build filter query
-    filter_query = {}
-    
-    if patient_id:
-        filter_query["patient_id"] = patient_id
-    
-    if physician_name:
-        filter_query["physician_name"] = {"$regex": physician_name, "$options": "i"}
-    
-    if risk_result:
-        filter_query["risk_result"] = risk_result
-    
-    if status:
-        filter_query["status"] = status
-    
-    # Query database
-    cursor = db.assessments.find(filter_query).skip(skip).limit(limit).sort("created_at", -1)
-    assessments = await cursor.to_list(length=limit)
+    """
+    List assessments with optional filtering
+    Summaries are answered from the listing indexes without reading documents
+    """
+    
+    # Any write to the collection changes the token, and with it every page's ETag.
+    # The page is read after the token in the same causally consistent session,
+    # so it is never older than the token even when a secondary serves it
+    change_token = await repository.change_token()
+    etag = list_etag(change_token, request.query_params.multi_items())
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    assessments = await repository.find_assessments(
+        patient_id=patient_id,
+        physician_name=physician_name,
+        risk_result=risk_result,
+        status=status,
+        skip=skip,
+        limit=limit,
+        fields=SUMMARY_FIELDS if view == "summary" else None
+    )
     
-    return [PatientAssessmentResponse(**assessment) for assessment in assessments]
+    if view == "summary":
+        return Response(render_summaries(assessments), media_type="application/json", headers={"ETag": etag})
+    # Rendered straight from the stored documents; see backend/models/documents.py
+    return Response(render_assessments(assessments), media_type="application/json", headers={"ETag": etag})
 
 @router.delete("/{assessment_id}")
 async def delete_assessment(
     assessment_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    repository: AssessmentRepository = Depends(get_assessment_repository)
 ):
     """Delete an assessment"""
     
-    # Check if assessment exists
-    existing = await db.assessments.find_one({"id": assessment_id})
+    # Delete assessment and its calculations
+    existing = await repository.delete_assessment(assessment_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # Delete assessment
-    await db.assessments.delete_one({"id": assessment_id})
-    
-    # Delete related calculations
-    await db.calculations.delete_many({"assessment_id": assessment_id})
-    
     # Log deletion in history
-    await _log_assessment_action(
-        db, assessment_id, "deleted", 
+    await log_assessment_action(
+        repository, assessment_id, "deleted", 
         {"patient_name": existing.get("patient_name", "Unknown")}
     )
+    _invalidate_reads(assessment_id)
     
     return {"message": "Assessment deleted successfully"}
 
 @router.get("/{assessment_id}/history", response_model=List[AssessmentHistory])
 async def get_assessment_history(
     assessment_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    repository: AssessmentRepository = Depends(get_read_repository),
+    primary: AssessmentRepository = Depends(get_repository)
 ):
-    """Get history of an assessment"""
-    
-    # Check if assessment exists
-    existing = await db.assessments.find_one({"id": assessment_id})
+    """
+    Get history of an assessment, newest first
+    Read from a secondary when there is one, so it may lag recent writes
+    """
+    
+    # Check if assessment exists; one created moments ago may not have reached
+    # the secondary yet, and the primary's answer is the one that counts
+    existing = (
+        await repository.get_assessment(assessment_id, ("id",))
+        or await _find_assessment(primary, assessment_id)
+    )
     if not existing:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
     # Get history
-    cursor = db.assessment_history.find({"assessment_id": assessment_id}).sort("timestamp", -1)
-    history = await cursor.to_list(length=None)
+    if skip == 0 and limit == HISTORY_PAGE_SIZE:
+        # The first default page is what concurrent readers ask for, so only it is cached
+        history = await read_cache.get(
+            ("history", assessment_id),
+            lambda: repository.without_session().history(assessment_id, skip, limit)
+        )
+    else:
+        history = await repository.history(assessment_id, skip, limit)
     
-    return [AssessmentHistory(**record) for record in history]
+    return Response(render_history(history), media_type="application/json")
 
-async def _log_assessment_action(
-    db: AsyncIOMotorDatabase,
-    assessment_id: str,
-    action: str,
-    details: dict,
-    performed_by: Optional[str] = None
-):
-    """Log an assessment action to history"""
-    
-    history_record = AssessmentHistory(
-        assessment_id=assessment_id,
-        action=action,
-        changes=details,
-        performed_by=performed_by,
-        timestamp=datetime.utcnow()
+async def _find_assessment(repository: AssessmentRepository, assessment_id: str) -> Optional[dict]:
+    """
+    Read an assessment through the per-worker read cache
+    Concurrent requests for the same assessment share one query, which runs
+    outside the first caller's session since it may outlive that request
+    """
+    
+    return await read_cache.get(
+        ("assessment", assessment_id),
+        lambda: repository.without_session().get_assessment(assessment_id)
     )
+
+def _invalidate_reads(*assessment_ids: str):
+    """Drop cached reads of assessments that were just written"""
+    
+    read_cache.invalidate(*(
+        key
+        for assessment_id in assessment_ids
+        for key in (("assessment", assessment_id), ("etag", assessment_id), ("history", assessment_id))
+    ))
+
+def _calculation_update(result: RiskCalculationResult, mask: int) -> dict:
+    """Fields written to an assessment when its risk is calculated"""
+    
+    return {
+        "risk_result": result.risk_result.value,
+        "risk_factors": [factor.dict() for factor in result.risk_factors],
+        "total_risk_factors": result.total_risk_factors,
+        "latest_result": IMWGRiskCalculator.snapshot(result, mask).dict(),
+        "status": AssessmentStatus.COMPLETED.value,
+        "updated_at": datetime.utcnow()
+    }
+
+def _calculation_record(assessment: PatientAssessment, result: RiskCalculationResult) -> dict:
+    """Calculation document, with the lab values it was calculated from"""
+    
+    return {
+        **result.dict(),
+        "b2m_value": assessment.b2m_value,
+        "creatinine_value": assessment.creatinine_value
+    }
+
+def _calculation_details(result: RiskCalculationResult) -> dict:
+    """History details recorded for a calculation"""
     
-    await db.assessment_history.insert_one(history_record.dict())
\ No newline at end of file
+    return {"risk_result": result.risk_result.value, "total_risk_factors": result.total_risk_factors}
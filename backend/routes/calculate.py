@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+
+from backend.models.patient_assessment import (
+    PatientAssessment,
+    PatientAssessmentCreate,
+    RiskCalculationResult
+)
+from backend.services.risk_calculator import IMWGRiskCalculator
+from backend.routes.validation import AssessmentValidationRoute
+
+router = APIRouter(tags=["calculate"], route_class=AssessmentValidationRoute)
+
+@router.post("/calculate", response_model=RiskCalculationResult)
+async def calculate_risk_stateless(assessment_data: PatientAssessmentCreate):
+    """
+    Calculate risk without saving anything
+    For callers that only need the result, e.g. the web calculator
+    """
+    
+    # The request body was fully validated while parsing it
+    assessment = PatientAssessment(**dict(assessment_data))
+    return IMWGRiskCalculator.calculate_risk(assessment)
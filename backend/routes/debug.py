@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import asyncio
+import hmac
+import os
+import threading
+
+from backend.middleware.metrics import worker_metrics
+from backend.services.profiling import format_collapsed, loop_monitor, sample_stacks
+
+async def require_admin(authorization: Optional[str] = Header(None)):
+    """Only callers presenting ADMIN_TOKEN as a bearer token; the routes do not exist without it"""
+    
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Each request is answered by one worker, named in the X-Worker header
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100)
+):
+    """
+    Sample this worker's event loop stack for `seconds` and return collapsed
+    stacks ("frame;frame;frame count" per line), ready for flamegraph.pl or speedscope
+    Samples in the selector's select() are the loop waiting, e.g. on MongoDB
+    """
+    
+    # Handlers run on the event loop thread; the sampler runs beside it
+    loop_thread_id = threading.get_ident()
+    samples = await asyncio.to_thread(sample_stacks, loop_thread_id, seconds, interval_ms / 1000)
+    return PlainTextResponse(format_collapsed(samples), headers={"X-Worker": worker_metrics.worker_id})
+
+@router.get("/loop-lag")
+async def loop_lag():
+    """Event loop lag percentiles of this worker over the last minute or two"""
+    
+    return {"worker": worker_metrics.worker_id, **loop_monitor.percentiles()}
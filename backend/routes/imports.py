@@ -0,0 +1,140 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from pymongo.errors import BulkWriteError, PyMongoError
+from datetime import datetime
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import pymongo
+
+from backend.models.patient_assessment import (
+    PatientAssessment,
+    ImportRowError,
+    ImportSummary
+)
+from backend.models.documents import ASSESSMENT_SCHEMA_VERSION
+from backend.services.history import history_record
+from backend.services.lab_import import ImportBatch, LabFileReader
+from backend.repositories.base import AssessmentRepository
+from backend.database import get_assessment_repository
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+# Row errors listed in the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Seconds the writes of one batch may take
+IMPORT_BATCH_TIMEOUT = 30.0
+
+async def _insert_batch(repository: AssessmentRepository, batch: ImportBatch):
+    """Store a batch's valid rows with one write per collection, as create_assessment would"""
+    
+    now = datetime.utcnow()
+    documents = []
+    history_records = []
+    for _, assessment_data in batch.rows:
+        assessment = PatientAssessment(**assessment_data.model_dump())
+        documents.append({
+            **assessment.model_dump(),
+            "created_at": now,
+            "updated_at": now,
+            "schema_version": ASSESSMENT_SCHEMA_VERSION
+        })
+        history_records.append(history_record(
+            assessment.id, "created",
+            {"created_by": assessment_data.physician_name or "Unknown", "source": "csv_import"}
+        ))
+    
+    if not documents:
+        return
+    with pymongo.timeout(IMPORT_BATCH_TIMEOUT):
+        try:
+            await repository.insert_assessments(documents)
+        except BulkWriteError as e:
+            # Unordered, so the documents without a write error were stored
+            # unless the insert was cut short, which nInserted tells apart
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            stored = [record for index, record in enumerate(history_records) if index not in failed]
+            if stored and len(stored) == e.details.get("nInserted"):
+                await repository.insert_history(stored)
+            raise
+        await repository.insert_history(history_records)
+
+def _write_errors(batch: ImportBatch, error: BulkWriteError) -> Dict[int, List[str]]:
+    """Row errors of the valid rows a partly failed insert did not store"""
+    
+    return {
+        batch.rows[write_error["index"]][0]: [f"Not stored: {write_error.get('errmsg', 'write error')}"]
+        for write_error in error.details.get("writeErrors", [])
+    }
+
+@router.post("/csv", response_model=ImportSummary)
+async def import_csv(
+    file: UploadFile = File(...),
+    repository: AssessmentRepository = Depends(get_assessment_repository)
+):
+    """
+    Create assessments from a CSV lab file, one per row
+    Valid rows are imported and invalid ones reported by row number. The file
+    is read in chunks, each chunk parsed while the one before it is written
+    """
+    
+    # The upload was spooled to a temporary file as it arrived
+    try:
+        reader = await asyncio.to_thread(LabFileReader, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    summary = ImportSummary(rows=0, imported=0, failed=0)
+    
+    def report(
+        batch: ImportBatch,
+        imported: Optional[int] = None,
+        write_errors: Optional[Dict[int, List[str]]] = None
+    ):
+        imported = len(batch.rows) if imported is None else imported
+        errors = {**batch.errors, **(write_errors or {})}
+        summary.rows += len(batch.rows) + len(batch.errors)
+        summary.imported += imported
+        summary.failed += len(batch.rows) + len(batch.errors) - imported
+        for row in sorted(errors):
+            if len(summary.errors) == MAX_REPORTED_ERRORS:
+                summary.errors_truncated = True
+                break
+            summary.errors.append(ImportRowError(row=row, errors=errors[row]))
+    
+    parsing = asyncio.ensure_future(asyncio.to_thread(reader.next_batch))
+    inserting = None
+    written = None
+    try:
+        while parsing is not None:
+            try:
+                batch = await parsing
+            except ValueError as e:
+                batch, summary.error = None, str(e)
+            parsing = asyncio.ensure_future(asyncio.to_thread(reader.next_batch)) if batch is not None else None
+            if inserting is not None:
+                await inserting
+                report(written)
+            written = batch
+            inserting = asyncio.ensure_future(_insert_batch(repository, batch)) if batch is not None else None
+    except BulkWriteError as e:
+        # The batch was partly stored; the rows that were not carry the database's error
+        report(written, e.details.get("nInserted", 0), _write_errors(written, e))
+        logger.warning(f"CSV import stopped after {summary.rows} rows: {e}")
+        summary.error = f"Database error, rows after {summary.rows} were not read"
+    except PyMongoError as e:
+        # Which of the batch's rows were stored is unknown, e.g. after a timeout
+        last_row = written.first_row + len(written.rows) + len(written.errors) - 1
+        logger.warning(f"CSV import stopped at rows {written.first_row}-{last_row}: {e}")
+        summary.error = (
+            f"Database error: rows {written.first_row} to {last_row} may be partly imported, "
+            f"later rows were not read"
+        )
+    finally:
+        for task in (parsing, inserting):
+            if task is not None and not task.done():
+                task.cancel()
+    
+    return summary
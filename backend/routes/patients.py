@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from datetime import datetime
+
+from backend.models.patient_assessment import PatientTimelineEntry, RiskResult
+from backend.repositories.base import AssessmentRepository
+from backend.database import get_read_repository
+
+router = APIRouter(prefix="/patients", tags=["patients"])
+
+@router.get("/transitions", response_model=List[PatientTimelineEntry])
+async def list_risk_transitions(
+    from_risk: RiskResult = Query(RiskResult.STANDARD_RISK),
+    to_risk: RiskResult = Query(RiskResult.HIGH_RISK),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    repository: AssessmentRepository = Depends(get_read_repository)
+):
+    """Patients whose risk changed from one result to another, and when"""
+    
+    entries = await repository.risk_transitions(from_risk.value, to_risk.value, since, until, skip, limit)
+    
+    return [PatientTimelineEntry(**entry) for entry in entries]
+
+@router.get("/{patient_id}/timeline", response_model=List[PatientTimelineEntry])
+async def get_patient_timeline(
+    patient_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    repository: AssessmentRepository = Depends(get_read_repository)
+):
+    """Risk calculations for one patient in chronological order"""
+    
+    entries = await repository.patient_timeline(patient_id, skip, limit)
+    
+    return [PatientTimelineEntry(**entry) for entry in entries]
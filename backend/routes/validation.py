@@ -0,0 +1,27 @@
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+from backend.models.patient_assessment import validation_messages
+
+class AssessmentValidationRoute(APIRoute):
+    """
+    Reports invalid assessment requests as 400 with the {"errors": [...]}
+    messages the assessment endpoints have always returned; routes of other
+    routers keep FastAPI's 422
+    """
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def validating_handler(request: Request):
+            try:
+                return await handler(request)
+            except RequestValidationError as exc:
+                return JSONResponse(
+                    status_code=400,
+                    content={"detail": {"errors": validation_messages(exc.errors())}}
+                )
+        
+        return validating_handler
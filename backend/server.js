@@ -114,7 +114,8 @@ class IMWGRiskCalculator {
     }
     
     // Criterion 4: High β2M with normal creatinine
-    if (assessment.b2m_value !== undefined && assessment.creatinine_value !== undefined) {
+    // Loose != null also excludes stored nulls, which JavaScript compares as 0
+    if (assessment.b2m_value != null && assessment.creatinine_value != null) {
       if (assessment.b2m_value >= 5.5 && assessment.creatinine_value < 1.2) {
         riskFactors.push({
           criterion: "High β2-microglobulin with normal creatinine",
@@ -146,8 +147,10 @@ class IMWGRiskCalculator {
   }
   
   static generateClinicalInterpretation(riskResult, riskFactors, assessment) {
+    let interpretation;
+    
     if (riskResult === 'HIGH_RISK') {
-      let interpretation = `Patient meets criteria for High-Risk Multiple Myeloma based on ${riskFactors.length} positive risk factor(s):\n\n`;
+      interpretation = `Patient meets criteria for High-Risk Multiple Myeloma based on ${riskFactors.length} positive risk factor(s):\n\n`;
       
       riskFactors.forEach((factor, index) => {
         interpretation += `${index + 1}. ${factor.criterion}: ${factor.description}\n`;
@@ -172,7 +175,7 @@ class IMWGRiskCalculator {
       interpretation += "Standard risk classification allows for conventional treatment approaches with standard monitoring intervals.";
       
       // Add notes about borderline values
-      if (assessment.b2m_value !== undefined && assessment.b2m_value >= 4.0) {
+      if (assessment.b2m_value != null && assessment.b2m_value >= 4.0) {
         interpretation += `\n\nNote: β2-microglobulin level of ${assessment.b2m_value} mg/L is elevated but does not meet high-risk criteria.`;
       }
     }
@@ -1,27 +1,36 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
+from pymongo.errors import PyMongoError
 from typing import List
 import uuid
 from datetime import datetime
 
 # Import new modules
 from backend.routes.assessments import router as assessments_router
-from backend.database import init_database, get_database
+from backend.routes.calculate import router as calculate_router
+from backend.routes.analysis import router as analysis_router
+from backend.routes.patients import router as patients_router
+from backend.routes.analytics import router as analytics_router
+from backend.routes.debug import router as debug_router
+from backend.routes.imports import router as imports_router
+from backend.database import init_database, get_db, get_repository, storage_engine, close_client
+from backend.middleware.metrics import RequestMetricsMiddleware, worker_metrics
+from backend.middleware.compression import CompressionMiddleware
+from backend.middleware.admission import AdmissionControlMiddleware, PRIORITY_CLASSES
+from backend.services.shared_state import acquire_leadership, shared_state
+from backend.services.analytics_mirror import analytics_mirror, sync_periodically
+from backend.services.query_advisor import advisor_enabled, log_advice
+from backend.services.profiling import loop_monitor
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'imwg_calculator')]
-
 # Create the main app without a prefix
 app = FastAPI(
     title="IMWG Risk Calculator API",
@@ -29,6 +38,19 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.exception_handler(PyMongoError)
+async def database_error_handler(request: Request, exc: PyMongoError):
+    """Report database work that ran past the request's deadline as 503, so clients back off and retry"""
+    if not exc.timeout:
+        logger.error(f"Database error for {request.method} {request.url.path}", exc_info=exc)
+        return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+    logger.warning(f"Database deadline exceeded for {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database did not answer in time, retry later"},
+        headers={"Retry-After": str(PRIORITY_CLASSES["read"].retry_after)}
+    )
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -51,10 +73,11 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        await db.command("ping")
+        await get_repository().ping()
         return {
             "status": "healthy",
             "database": "connected",
+            "storage_engine": storage_engine(),
             "timestamp": datetime.utcnow()
         }
     except Exception as e:
@@ -65,31 +88,54 @@ async def health_check():
             "timestamp": datetime.utcnow()
         }
 
+@api_router.get("/metrics")
+async def get_metrics():
+    """Request counters aggregated across all workers on this host"""
+    # Publish this worker's latest numbers so the totals include them
+    await asyncio.to_thread(worker_metrics.publish)
+    counters = await asyncio.to_thread(shared_state.aggregate_counters)
+    return {
+        "workers": await asyncio.to_thread(shared_state.active_workers),
+        "counters": counters,
+        "timestamp": datetime.utcnow()
+    }
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await get_db().status_checks.insert_one(status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+    status_checks = await get_db().status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
-# Include the assessments router
+# Include the assessments, patients, stateless calculation, analysis and analytics routers
 api_router.include_router(assessments_router)
+api_router.include_router(patients_router)
+api_router.include_router(calculate_router)
+api_router.include_router(analysis_router)
+api_router.include_router(analytics_router)
+api_router.include_router(imports_router)
+api_router.include_router(debug_router)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Innermost, so that 503s from shedding still get CORS headers
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -98,16 +144,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
+# Background startup work, kept referenced so it is not garbage collected
+background_tasks = set()
+
+async def initialize_database():
+    """Initialize database indexes without failing the app"""
     try:
         await init_database()
         logger.info("Database initialized successfully")
+        if advisor_enabled():
+            await log_advice(get_db())
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
 
+def start_background_task(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize database on startup"""
+    # With several workers only the leader runs one-off startup work; index
+    # creation is deferred so the app can serve as soon as it boots
+    if acquire_leadership() and storage_engine() == "mongo":
+        start_background_task(initialize_database())
+    # A single worker keeps the analytics mirror in sync with the primary
+    if acquire_leadership("analytics"):
+        start_background_task(sync_periodically(get_repository(), analytics_mirror))
+    start_background_task(worker_metrics.publish_periodically())
+    start_background_task(loop_monitor.run())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    for task in background_tasks:
+        task.cancel()
+    worker_metrics.publish()
+    close_client()
     logger.info("Database connection closed")
\ No newline at end of file
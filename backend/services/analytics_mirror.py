@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backend.models.patient_assessment import PatientAssessment
+from backend.repositories.base import AssessmentRepository
+from backend.services.risk_calculator import (
+    DEL17P_TP53,
+    TRANSLOCATION_COMBO,
+    DEL1P32_1Q,
+    HIGH_B2M_NORMAL_CREATININE,
+    IMWGRiskCalculator
+)
+from backend.services.shared_state import SHARED_STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Local copy of the assessment data that analytical queries are answered from
+ANALYTICS_DB_PATH = Path(os.environ.get('ANALYTICS_DB_PATH', SHARED_STATE_DIR / 'analytics.sqlite3'))
+
+# Seconds between sync passes, and how far behind the present each pass stops,
+# so writes stamped just before a pass but committed after it are not skipped
+ANALYTICS_SYNC_INTERVAL = float(os.environ.get('ANALYTICS_SYNC_INTERVAL', '10'))
+ANALYTICS_SYNC_LAG = float(os.environ.get('ANALYTICS_SYNC_LAG', '2'))
+
+# Documents read from the primary per round trip
+ANALYTICS_BATCH_SIZE = 1000
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS assessments ("
+    " id TEXT PRIMARY KEY, patient_id TEXT, physician_name TEXT, institution TEXT,"
+    " status TEXT, risk_result TEXT, total_risk_factors INTEGER, criteria_mask INTEGER NOT NULL,"
+    " b2m_value REAL, creatinine_value REAL, created_at TEXT, updated_at TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS calculations ("
+    " assessment_id TEXT NOT NULL, calculated_at TEXT NOT NULL, risk_result TEXT NOT NULL,"
+    " total_risk_factors INTEGER NOT NULL, PRIMARY KEY (assessment_id, calculated_at))",
+    "CREATE INDEX IF NOT EXISTS calculations_calculated_at ON calculations (calculated_at)",
+    "CREATE TABLE IF NOT EXISTS sync_state ("
+    " source TEXT PRIMARY KEY, position_at TEXT NOT NULL, position_id TEXT NOT NULL,"
+    " synced_at TEXT NOT NULL)",
+)
+
+# Columns the cohort breakdown can group by
+GROUP_COLUMNS = ("institution", "physician_name", "status", "risk_result")
+
+# strftime formats of the trend buckets
+TREND_BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+# IMWG criteria in the order of the co-occurrence matrix
+CRITERIA = (
+    ("del17p_tp53", DEL17P_TP53),
+    ("translocation_combo", TRANSLOCATION_COMBO),
+    ("del1p32_1q", DEL1P32_1Q),
+    ("high_b2m_normal_creatinine", HIGH_B2M_NORMAL_CREATININE),
+)
+
+def _text(value) -> Optional[str]:
+    # Enums are stored by value, as MongoDB stores them
+    return getattr(value, "value", value)
+
+def _utc_text(value: datetime) -> str:
+    # Stored times are naive UTC, as MongoDB returns them, and compare as text
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+def _assessment_row(document: dict) -> tuple:
+    assessment = PatientAssessment.model_construct(**document)
+    return (
+        document["id"],
+        document.get("patient_id"),
+        document.get("physician_name"),
+        document.get("institution"),
+        _text(document.get("status")),
+        _text(document.get("risk_result")),
+        document.get("total_risk_factors"),
+        IMWGRiskCalculator.criteria_mask(assessment),
+        document.get("b2m_value"),
+        document.get("creatinine_value"),
+        document["created_at"].isoformat() if document.get("created_at") else None,
+        document["updated_at"].isoformat(),
+    )
+
+def _calculation_row(document: dict) -> tuple:
+    return (
+        document["assessment_id"],
+        document["calculated_at"].isoformat(),
+        _text(document["risk_result"]),
+        document["total_risk_factors"],
+    )
+
+class AnalyticsMirror:
+    """
+    SQLite copy of assessments and calculations for analytical queries
+    One worker (the "analytics" leader) applies changes from the primary;
+    every worker answers queries from the file, so OLAP load never reaches
+    MongoDB. Connections are per process and shared by its threads under a lock
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so reopen in each new process
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+    
+    def position(self, source: str) -> Optional[Tuple[datetime, str]]:
+        """Last (time, id) applied from a source, None before its first sync"""
+        
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT position_at, position_id FROM sync_state WHERE source = ?", (source,)
+            ).fetchone()
+        return (datetime.fromisoformat(row[0]), row[1]) if row else None
+    
+    def apply(self, source: str, documents: List[dict], position: Tuple[datetime, str]):
+        """Apply one batch of changes from `source` and advance its position in the same transaction"""
+        
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if source == "assessments":
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO assessments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [_assessment_row(document) for document in documents]
+                    )
+                elif source == "calculations":
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO calculations VALUES (?, ?, ?, ?)",
+                        [_calculation_row(document) for document in documents]
+                    )
+                else:
+                    deleted = [(document["assessment_id"],) for document in documents]
+                    connection.executemany("DELETE FROM assessments WHERE id = ?", deleted)
+                    connection.executemany("DELETE FROM calculations WHERE assessment_id = ?", deleted)
+                connection.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (source, position[0].isoformat(), position[1], datetime.utcnow().isoformat())
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+    
+    def _query(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchall()
+    
+    def status(self) -> dict:
+        """Rows mirrored and how far each source has been applied"""
+        
+        sources = {
+            source: {"position": position_at, "synced_at": synced_at}
+            for source, position_at, synced_at in self._query(
+                "SELECT source, position_at, synced_at FROM sync_state"
+            )
+        }
+        (assessments,) = self._query("SELECT COUNT(*) FROM assessments")[0]
+        (calculations,) = self._query("SELECT COUNT(*) FROM calculations")[0]
+        return {"assessments": assessments, "calculations": calculations, "sources": sources}
+    
+    def cohort_breakdown(self, group_by: str) -> List[dict]:
+        """Assessment counts, high-risk share and mean labs per value of `group_by`"""
+        
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by {group_by!r}")
+        rows = self._query(
+            f"SELECT {group_by}, COUNT(*), SUM(risk_result = 'HIGH_RISK'), SUM(risk_result IS NOT NULL),"
+            " AVG(CASE WHEN risk_result IS NOT NULL THEN total_risk_factors END), AVG(b2m_value), AVG(creatinine_value)"
+            f" FROM assessments GROUP BY {group_by} ORDER BY COUNT(*) DESC, {group_by}"
+        )
+        return [
+            {
+                "group": group,
+                "assessments": count,
+                "calculated": calculated,
+                "high_risk": high_risk or 0,
+                "mean_risk_factors": mean_factors,
+                "mean_b2m_value": mean_b2m,
+                "mean_creatinine_value": mean_creatinine,
+            }
+            for group, count, high_risk, calculated, mean_factors, mean_b2m, mean_creatinine in rows
+        ]
+    
+    def factor_cooccurrence(self) -> dict:
+        """How many assessments meet each pair of IMWG criteria; the diagonal counts single criteria"""
+        
+        pairs = [(first, second) for first in range(len(CRITERIA)) for second in range(first, len(CRITERIA))]
+        masks = [CRITERIA[first][1] | CRITERIA[second][1] for first, second in pairs]
+        columns = ", ".join(f"SUM((criteria_mask & {mask}) = {mask})" for mask in masks)
+        row = self._query(f"SELECT COUNT(*), {columns} FROM assessments")[0]
+        counts = [[0] * len(CRITERIA) for _ in CRITERIA]
+        for (first, second), count in zip(pairs, row[1:]):
+            counts[first][second] = counts[second][first] = count or 0
+        return {"assessments": row[0], "criteria": [name for name, _ in CRITERIA], "counts": counts}
+    
+    def risk_trends(self, bucket: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[dict]:
+        """Calculations and high-risk results per day, week or month"""
+        
+        conditions, parameters = [], []
+        if since:
+            conditions.append("calculated_at >= ?")
+            parameters.append(_utc_text(since))
+        if until:
+            conditions.append("calculated_at < ?")
+            parameters.append(_utc_text(until))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._query(
+            f"SELECT strftime(?, calculated_at) AS period, COUNT(*), SUM(risk_result = 'HIGH_RISK'),"
+            f" COUNT(DISTINCT assessment_id) FROM calculations {where} GROUP BY period ORDER BY period",
+            (TREND_BUCKETS[bucket], *parameters)
+        )
+        return [
+            {"period": period, "calculations": count, "high_risk": high_risk, "assessments": assessments}
+            for period, count, high_risk, assessments in rows
+        ]
+
+# Where each source keeps its place: (repository reader, time field, id field)
+SOURCES = {
+    "assessments": ("assessments_changed", "updated_at", "id"),
+    "calculations": ("calculations_since", "calculated_at", "assessment_id"),
+    "deletions": ("deletions_since", "timestamp", "id"),
+}
+
+async def sync_mirror(
+    repository: AssessmentRepository,
+    mirror: AnalyticsMirror,
+    batch_size: int = ANALYTICS_BATCH_SIZE,
+    lag: float = ANALYTICS_SYNC_LAG
+) -> Dict[str, int]:
+    """
+    Copy changes since the last pass from the primary into the mirror
+    Each source is read in (time, id) order from its stored position, one
+    batch per round trip; deletions come last so they win over earlier upserts
+    """
+    
+    until = datetime.utcnow() - timedelta(seconds=lag)
+    applied = {}
+    for source, (reader, time_field, id_field) in SOURCES.items():
+        applied[source] = 0
+        position = await asyncio.to_thread(mirror.position, source)
+        while True:
+            documents = await getattr(repository, reader)(position, until, batch_size)
+            if not documents:
+                break
+            position = (documents[-1][time_field], documents[-1][id_field])
+            await asyncio.to_thread(mirror.apply, source, documents, position)
+            applied[source] += len(documents)
+            if len(documents) < batch_size:
+                break
+    return applied
+
+async def sync_periodically(
+    repository: AssessmentRepository,
+    mirror: AnalyticsMirror,
+    interval: float = ANALYTICS_SYNC_INTERVAL
+):
+    """Sync the mirror every `interval` seconds until cancelled"""
+    while True:
+        try:
+            applied = await sync_mirror(repository, mirror)
+            if any(applied.values()):
+                logger.info(f"Analytics mirror applied {applied}")
+        except Exception as e:
+            logger.warning(f"Analytics mirror sync failed: {e}")
+        await asyncio.sleep(interval)
+
+analytics_mirror = AnalyticsMirror(ANALYTICS_DB_PATH)
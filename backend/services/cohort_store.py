@@ -0,0 +1,220 @@
+import json
+import math
+import os
+import shutil
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from backend.services.risk_calculator import (
+    DEL17P_TP53,
+    TRANSLOCATION_COMBO,
+    DEL1P32_1Q,
+    B2M_CUTOFF,
+    CREATININE_CUTOFF
+)
+from backend.services.shared_state import SHARED_STATE_DIR
+
+# Snapshots live in versioned directories; `current` links to the newest one
+COHORT_SNAPSHOT_DIR = Path(os.environ.get('COHORT_SNAPSHOT_DIR', SHARED_STATE_DIR / 'cohort'))
+
+# Assessment fields needed to materialize the clinical columns
+COHORT_FIELDS = (
+    "del17p_tp53",
+    "translocation_combo",
+    "del1p32_1q",
+    "b2m_value",
+    "creatinine_value",
+)
+
+class CohortSnapshotWriter:
+    """
+    Accumulates assessments into compact columns and writes them as .npy files
+    Columns: genetic_mask (uint8 criteria bits 0-2), b2m and creatinine (float64, NaN if missing)
+    """
+    
+    def __init__(self):
+        self.genetic_mask = array('B')
+        self.b2m = array('d')
+        self.creatinine = array('d')
+    
+    def append(self, document: dict):
+        mask = 0
+        if document.get("del17p_tp53") == 'positive':
+            mask |= DEL17P_TP53
+        if document.get("translocation_combo") == 'positive':
+            mask |= TRANSLOCATION_COMBO
+        if document.get("del1p32_1q") == 'positive':
+            mask |= DEL1P32_1Q
+        self.genetic_mask.append(mask)
+        
+        b2m_value = document.get("b2m_value")
+        creatinine_value = document.get("creatinine_value")
+        self.b2m.append(math.nan if b2m_value is None else b2m_value)
+        self.creatinine.append(math.nan if creatinine_value is None else creatinine_value)
+    
+    def write(self, base_dir: Optional[Path] = None) -> Path:
+        """Write the columns to a new snapshot directory and make it current"""
+        import numpy as np
+        
+        base_dir = base_dir or COHORT_SNAPSHOT_DIR
+        base_dir.mkdir(parents=True, exist_ok=True)
+        snapshot_dir = base_dir / f"snapshot-{time.time_ns()}"
+        snapshot_dir.mkdir()
+        
+        genetic_mask = np.frombuffer(self.genetic_mask, dtype=np.uint8)
+        b2m = np.frombuffer(self.b2m, dtype=np.float64)
+        creatinine = np.frombuffer(self.creatinine, dtype=np.float64)
+        
+        # Patients decided by criterion 4 alone (genetics negative, both labs
+        # present), ordered by β2M so a β2M cutoff selects a contiguous suffix
+        deciding = (genetic_mask == 0) & ~np.isnan(b2m) & ~np.isnan(creatinine)
+        order = np.argsort(b2m[deciding], kind='stable')
+        
+        np.save(snapshot_dir / "genetic_mask.npy", genetic_mask)
+        np.save(snapshot_dir / "b2m.npy", b2m)
+        np.save(snapshot_dir / "creatinine.npy", creatinine)
+        np.save(snapshot_dir / "deciding_b2m.npy", b2m[deciding][order])
+        np.save(snapshot_dir / "deciding_creatinine.npy", creatinine[deciding][order])
+        (snapshot_dir / "manifest.json").write_text(json.dumps({
+            "count": len(genetic_mask),
+            "genetic_high_risk": int(np.count_nonzero(genetic_mask)),
+            "built_at": datetime.utcnow().isoformat()
+        }))
+        
+        # Swap the link atomically so readers never see a half-written snapshot
+        link = base_dir / "current"
+        temporary_link = base_dir / f"current-{time.time_ns()}"
+        temporary_link.symlink_to(snapshot_dir.name)
+        os.replace(temporary_link, link)
+        
+        _remove_old_snapshots(base_dir, keep=snapshot_dir.name)
+        return snapshot_dir
+
+def _remove_old_snapshots(base_dir: Path, keep: str):
+    # The previous snapshot is kept for workers that are switching over right
+    # now; unlinking anything older is safe because existing maps stay valid
+    previous = sorted(base_dir.glob("snapshot-*"), key=lambda path: int(path.name.split("-")[1]))
+    for path in previous[:-2]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+class CohortSnapshot:
+    """
+    Read-only, memory-mapped view of a cohort snapshot
+    Every worker maps the same files, so the columns are shared through the
+    page cache instead of being copied into each process
+    """
+    
+    def __init__(self, snapshot_dir: Path):
+        import numpy as np
+        
+        self.path = snapshot_dir
+        self.manifest = json.loads((snapshot_dir / "manifest.json").read_text())
+        self.genetic_mask = np.load(snapshot_dir / "genetic_mask.npy", mmap_mode='r')
+        self.b2m = np.load(snapshot_dir / "b2m.npy", mmap_mode='r')
+        self.creatinine = np.load(snapshot_dir / "creatinine.npy", mmap_mode='r')
+        self.deciding_b2m = np.load(snapshot_dir / "deciding_b2m.npy", mmap_mode='r')
+        self.deciding_creatinine = np.load(snapshot_dir / "deciding_creatinine.npy", mmap_mode='r')
+    
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+    
+    @property
+    def genetic_high_risk(self) -> int:
+        """Patients who are high risk from genetics alone, whatever the lab cutoffs"""
+        return self.manifest["genetic_high_risk"]
+    
+    def high_risk_grid(self, b2m_cutoffs: Sequence[float], creatinine_cutoffs: Sequence[float]) -> List[List[int]]:
+        """High-risk patient counts for every (β2M cutoff, creatinine cutoff) pair"""
+        
+        counts = criterion4_counts(
+            self.deciding_b2m, self.deciding_creatinine, b2m_cutoffs, creatinine_cutoffs
+        )
+        return (counts + self.genetic_high_risk).tolist()
+    
+    def threshold_sweep(
+        self,
+        b2m_cutoffs: Sequence[float],
+        creatinine_cutoffs: Sequence[float],
+        current_b2m_cutoff: float = B2M_CUTOFF,
+        current_creatinine_cutoff: float = CREATININE_CUTOFF
+    ) -> dict:
+        """
+        High-risk and reclassification counts for every cutoff pair, relative
+        to the classification under the current cutoffs
+        """
+        import numpy as np
+        
+        b2m = np.asarray(self.deciding_b2m)
+        creatinine = np.asarray(self.deciding_creatinine)
+        currently_high = (b2m >= current_b2m_cutoff) & (creatinine < current_creatinine_cutoff)
+        
+        # Patients that stay high risk, and patients that become high risk
+        retained = criterion4_counts(
+            b2m[currently_high], creatinine[currently_high], b2m_cutoffs, creatinine_cutoffs
+        )
+        newly_high = criterion4_counts(
+            b2m[~currently_high], creatinine[~currently_high], b2m_cutoffs, creatinine_cutoffs
+        )
+        no_longer_high = int(np.count_nonzero(currently_high)) - retained
+        
+        return {
+            "current_high_risk": self.genetic_high_risk + int(np.count_nonzero(currently_high)),
+            "high_risk": (self.genetic_high_risk + retained + newly_high).tolist(),
+            "newly_high_risk": newly_high.tolist(),
+            "no_longer_high_risk": no_longer_high.tolist(),
+            "reclassified": (newly_high + no_longer_high).tolist()
+        }
+
+def criterion4_counts(b2m, creatinine, b2m_cutoffs: Sequence[float], creatinine_cutoffs: Sequence[float]):
+    """
+    Count patients with β2M >= x and creatinine < y for every pair of cutoffs
+    Each patient is binned once by how many cutoffs it clears on each axis;
+    cumulative sums over the bin counts then give every grid cell, so the cost
+    is O(N log G + G²) rather than one pass over the cohort per grid point
+    """
+    import numpy as np
+    
+    b2m_cutoffs = np.asarray(b2m_cutoffs, dtype=np.float64)
+    creatinine_cutoffs = np.asarray(creatinine_cutoffs, dtype=np.float64)
+    b2m_order = np.argsort(b2m_cutoffs, kind='stable')
+    creatinine_order = np.argsort(creatinine_cutoffs, kind='stable')
+    sorted_b2m_cutoffs = b2m_cutoffs[b2m_order]
+    sorted_creatinine_cutoffs = creatinine_cutoffs[creatinine_order]
+    
+    # b2m >= cutoff i  <=>  i < b2m_bin;  creatinine < cutoff j  <=>  j >= creatinine_bin
+    b2m_bin = np.searchsorted(sorted_b2m_cutoffs, b2m, side='right')
+    creatinine_bin = np.searchsorted(sorted_creatinine_cutoffs, creatinine, side='right')
+    
+    rows, columns = len(sorted_b2m_cutoffs) + 1, len(sorted_creatinine_cutoffs) + 1
+    histogram = np.bincount(
+        b2m_bin * columns + creatinine_bin, minlength=rows * columns
+    ).reshape(rows, columns)
+    
+    # Suffix sums over β2M bins, prefix sums over creatinine bins
+    at_or_above = np.cumsum(histogram[::-1], axis=0)[::-1]
+    counts = np.cumsum(at_or_above[1:, :-1], axis=1)
+    
+    # Back to the caller's cutoff order
+    grid = np.empty_like(counts)
+    grid[np.ix_(b2m_order, creatinine_order)] = counts
+    return grid
+
+_loaded: Optional[CohortSnapshot] = None
+
+def current_snapshot(base_dir: Optional[Path] = None) -> Optional[CohortSnapshot]:
+    """The newest snapshot, reloaded only when the `current` link changes"""
+    global _loaded
+    
+    link = (base_dir or COHORT_SNAPSHOT_DIR) / "current"
+    if not link.exists():
+        return None
+    
+    snapshot_dir = link.resolve()
+    if _loaded is None or _loaded.path != snapshot_dir:
+        _loaded = CohortSnapshot(snapshot_dir)
+    return _loaded
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+# Fields an assessment ETag is derived from, for validator-only lookups
+ETAG_FIELDS = ("id", "version", "updated_at", "created_at")
+
+def _strong_etag(*parts) -> str:
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+def assessment_etag(document: dict, variant: Iterable[str] = ()) -> str:
+    """
+    Strong ETag of one assessment representation, "<version>.<digest>"
+    Changes whenever the stored version or updated_at changes; `variant`
+    distinguishes representations of the same document, e.g. with its result.
+    The version prefix lets If-Match be checked by the database
+    """
+    
+    version = document.get("version", 1)
+    changed_at: Optional[datetime] = document.get("updated_at") or document.get("created_at")
+    digest = _strong_etag(
+        document.get("id"),
+        version,
+        changed_at.isoformat() if changed_at else "",
+        ",".join(sorted(variant))
+    ).strip('"')
+    return f'"{version}.{digest}"'
+
+def list_etag(change_token: int, query: Iterable) -> str:
+    """Strong ETag of a list page: the collection's change token plus the query"""
+    return _strong_etag("list", change_token, sorted(query))
+
+# Content codings the compression middleware tags onto ETags
+ETAG_ENCODINGS = ("br", "gzip")
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the `encoding`-coded representation, "<tag>-<encoding>"
+    A strong ETag names exact bytes, so each content coding gets its own
+    """
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+def _without_encoding(etag: str) -> str:
+    for encoding in ETAG_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `etag` (weak comparison, RFC 9110)
+    in any of its content codings
+    """
+    
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or _without_encoding(candidate.removeprefix("W/")) == etag:
+            return True
+    return False
+
+def etag_versions(if_match: str) -> Optional[List[int]]:
+    """
+    Assessment versions named by an If-Match header, None for "*"
+    Weak or unrecognised tags name no version, as If-Match requires strong ones
+    """
+    
+    versions = []
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return None
+        version, dot, _ = candidate.strip('"').partition(".")
+        if candidate.startswith('"') and dot and version.isdigit():
+            versions.append(int(version))
+    return versions
@@ -0,0 +1,102 @@
+"""
+Latency histogram with HdrHistogram-style log-linear buckets
+Values are recorded as integer microseconds with three significant digits,
+so memory stays bounded however many values are recorded
+"""
+import math
+from typing import Dict, Iterator, Tuple
+
+# 2048 exact sub-buckets; each doubling above that keeps 1024 of them,
+# which bounds the relative error at 1/1024
+SUB_BUCKET_BITS = 11
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+def _index(value: int) -> int:
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+def _highest_equivalent(index: int) -> int:
+    """Largest value recorded into the bucket at `index`"""
+    
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    return ((offset + SUB_BUCKET_HALF) << shift) + (1 << shift) - 1
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = math.inf
+        self.max = 0
+        self.sum = 0
+    
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = _index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def _cumulative(self) -> Iterator[Tuple[int, int]]:
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            yield min(_highest_equivalent(index), self.max), seen
+    
+    def percentile(self, percentile: float) -> float:
+        """Latency in milliseconds at `percentile` (0-100)"""
+        
+        if not self.total:
+            return 0.0
+        wanted = max(1, math.ceil(self.total * percentile / 100))
+        for value, seen in self._cumulative():
+            if seen >= wanted:
+                return value / 1000
+        return self.max / 1000
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total / 1000 if self.total else 0.0
+    
+    def percentile_distribution(self, ticks_per_half_distance: int = 5) -> str:
+        """
+        The distribution in HdrHistogram's percentile output format, in
+        milliseconds, readable by the usual HdrHistogram plotting tools
+        """
+        
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total:
+            # Percentile steps halve the remaining distance to 100% in fixed ticks
+            percentiles = []
+            remaining = 100.0
+            while remaining > 100 / self.total / 2 and len(percentiles) < 200:
+                step = remaining / 2 / ticks_per_half_distance
+                for _ in range(ticks_per_half_distance):
+                    percentiles.append(100 - remaining)
+                    remaining -= step
+            percentiles.append(100.0)
+            
+            for percentile in percentiles:
+                value = self.percentile(percentile)
+                count = math.ceil(self.total * percentile / 100)
+                inverse = f"{1 / (1 - percentile / 100):14.2f}" if percentile < 100 else f"{'inf':>14}"
+                lines.append(f"{value:12.3f} {percentile / 100:14.12f} {count:10d} {inverse}")
+        lines.append(f"#[Mean    = {self.mean:12.3f}, StdDeviation   = {'n/a':>12}]")
+        lines.append(f"#[Max     = {self.max / 1000:12.3f}, Total count    = {self.total:12d}]")
+        lines.append(f"#[Buckets = {len(self.counts):12d}, SubBuckets     = {SUB_BUCKET_COUNT:12d}]")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+
+from backend.models.documents import HISTORY_SCHEMA_VERSION
+from backend.models.patient_assessment import AssessmentHistory
+from backend.repositories.base import AssessmentRepository
+
+def history_record(
+    assessment_id: str,
+    action: str,
+    details: dict,
+    performed_by: Optional[str] = None
+) -> dict:
+    """Build an assessment history document"""
+    
+    record = AssessmentHistory(
+        assessment_id=assessment_id,
+        action=action,
+        changes=details,
+        performed_by=performed_by,
+        timestamp=datetime.utcnow()
+    )
+    
+    return {**record.dict(), "schema_version": HISTORY_SCHEMA_VERSION}
+
+async def log_assessment_action(
+    repository: AssessmentRepository,
+    assessment_id: str,
+    action: str,
+    details: dict,
+    performed_by: Optional[str] = None
+):
+    """Log an assessment action to history"""
+    
+    await repository.insert_history([history_record(assessment_id, action, details, performed_by)])
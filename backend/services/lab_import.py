@@ -0,0 +1,193 @@
+"""
+Reading assessments from lab result files
+A CSV file is read a chunk at a time with pandas, its columns mapped to the
+PatientAssessmentCreate fields, and each chunk's criteria and lab ranges are
+checked column-wise before the rows that pass are validated as models
+"""
+import math
+import os
+import re
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple, get_args
+
+from backend.models.patient_assessment import (
+    CriterionStatus,
+    PatientAssessmentCreate,
+    VALIDATION_MESSAGES,
+    validate_assessment_batch
+)
+
+# Rows read, validated and inserted together
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', '1000'))
+
+CRITERIA_FIELDS = ("del17p_tp53", "translocation_combo", "del1p32_1q")
+LAB_FIELDS = ("b2m_value", "creatinine_value")
+TEXT_FIELDS = ("patient_id", "patient_name", "clinical_notes", "physician_name", "institution")
+
+# Header names as labs write them, after lowercasing and turning anything
+# but letters and digits into "_"; the field names themselves always match
+COLUMN_ALIASES = {
+    "del17p": "del17p_tp53",
+    "del_17p": "del17p_tp53",
+    "tp53": "del17p_tp53",
+    "del_17p_tp53": "del17p_tp53",
+    "translocation": "translocation_combo",
+    "translocations": "translocation_combo",
+    "high_risk_translocation": "translocation_combo",
+    "del1p32": "del1p32_1q",
+    "del_1p32": "del1p32_1q",
+    "del_1p32_1q": "del1p32_1q",
+    "b2m": "b2m_value",
+    "b2m_mg_l": "b2m_value",
+    "beta2_microglobulin": "b2m_value",
+    "b2_microglobulin": "b2m_value",
+    "creatinine": "creatinine_value",
+    "creatinine_mg_dl": "creatinine_value",
+    "patient": "patient_id",
+    "mrn": "patient_id",
+    "physician": "physician_name",
+    "notes": "clinical_notes",
+}
+
+# Criterion results as lab systems report them
+CRITERION_VALUES = {
+    **{value: value for value in get_args(CriterionStatus)},
+    "pos": "positive",
+    "+": "positive",
+    "detected": "positive",
+    "neg": "negative",
+    "-": "negative",
+    "not detected": "negative",
+}
+
+def _field_bounds(field: str) -> Tuple[float, float]:
+    # The model's own ge/le constraints, so both checks agree on the ranges
+    bounds = {}
+    for constraint in PatientAssessmentCreate.model_fields[field].metadata:
+        bounds.update({name: getattr(constraint, name) for name in ("ge", "le") if hasattr(constraint, name)})
+    return bounds["ge"], bounds["le"]
+
+LAB_BOUNDS = {field: _field_bounds(field) for field in LAB_FIELDS}
+
+def map_columns(columns: List[str]) -> Dict[str, str]:
+    """File column -> field, for the columns that map to one; unknown columns are ignored"""
+    
+    mapping = {}
+    for column in columns:
+        name = re.sub(r"[^a-z0-9]+", "_", str(column).strip().lower()).strip("_")
+        field = name if name in PatientAssessmentCreate.model_fields else COLUMN_ALIASES.get(name)
+        if field is None:
+            continue
+        if field in mapping.values():
+            raise ValueError(f"More than one column maps to {field}")
+        mapping[column] = field
+    missing = [field for field in CRITERIA_FIELDS if field not in mapping.values()]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return mapping
+
+class ImportBatch(NamedTuple):
+    first_row: int
+    rows: List[Tuple[int, PatientAssessmentCreate]]
+    errors: Dict[int, List[str]]
+
+def validate_chunk(frame, first_row: int) -> ImportBatch:
+    """
+    Validate one chunk of rows with fields as columns, all as strings
+    The criteria and lab ranges are checked a column at a time; only rows
+    passing those are validated as models, which adds the remaining checks
+    """
+    import numpy as np
+    import pandas as pd
+    
+    errors: Dict[int, List[str]] = {}
+    
+    def flag(mask, message: str):
+        for position in np.flatnonzero(mask.to_numpy()):
+            errors.setdefault(first_row + int(position), []).append(message)
+    
+    columns = {}
+    for field in CRITERIA_FIELDS:
+        raw = frame[field].str.strip().str.lower()
+        columns[field] = raw.map(CRITERION_VALUES)
+        flag(raw.eq(""), VALIDATION_MESSAGES[(field, "missing")])
+        flag(raw.ne("") & columns[field].isna(), VALIDATION_MESSAGES[(field, "literal_error")])
+    
+    for field in LAB_FIELDS:
+        if field not in frame:
+            columns[field] = pd.Series(np.nan, index=frame.index)
+            continue
+        raw = frame[field].str.strip()
+        value = pd.to_numeric(raw, errors="coerce")
+        low, high = LAB_BOUNDS[field]
+        flag(raw.ne("") & value.isna(), f"{field}: Input should be a valid number, unable to parse string as a number")
+        flag((value < low) | (value > high), VALIDATION_MESSAGES[(field, "less_than_equal")])
+        columns[field] = value
+    
+    for field in TEXT_FIELDS:
+        if field in frame:
+            text = frame[field].str.strip()
+            columns[field] = text.where(text.ne(""))
+    
+    checked = pd.DataFrame(columns)
+    passed = np.ones(len(frame), dtype=bool)
+    passed[[row - first_row for row in errors]] = False
+    records = checked[passed].to_dict("records")
+    row_numbers = [first_row + int(position) for position in np.flatnonzero(passed)]
+    for record in records:
+        for field, value in record.items():
+            if isinstance(value, float) and math.isnan(value):
+                record[field] = None
+    
+    parsed, model_errors = validate_assessment_batch(records)
+    for index, messages in model_errors.items():
+        errors[row_numbers[index]] = messages
+    rows = [(row, assessment) for row, assessment in zip(row_numbers, parsed) if assessment is not None]
+    return ImportBatch(first_row, rows, errors)
+
+class LabFileReader:
+    """
+    A CSV lab file as validated batches of at most `chunk_rows` rows
+    Only one chunk is held at a time, whatever the file's size. Reads block,
+    so callers on the event loop run them in a thread
+    """
+    
+    def __init__(self, file: BinaryIO, chunk_rows: Optional[int] = None):
+        import pandas as pd
+        
+        try:
+            self._chunks = pd.read_csv(
+                file,
+                chunksize=chunk_rows or IMPORT_CHUNK_ROWS,
+                dtype=str,
+                keep_default_na=False,
+                encoding="utf-8-sig",
+                encoding_errors="replace"
+            )
+            # The first chunk is read now so a file without the required
+            # columns is turned away before anything is imported
+            self._pending = next(self._chunks, None)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+            raise ValueError(f"Could not read the file as CSV: {e}")
+        if self._pending is None:
+            raise ValueError("The file has no rows")
+        self.columns = map_columns(list(self._pending.columns))
+        self.rows_read = 0
+    
+    def next_batch(self) -> Optional[ImportBatch]:
+        """The next batch, or None at the end of the file; ValueError if the file is malformed"""
+        import pandas as pd
+        
+        if self._pending is None:
+            try:
+                self._pending = next(self._chunks, None)
+            except pd.errors.ParserError as e:
+                raise ValueError(f"Could not read the file after row {self.rows_read}: {e}")
+            if self._pending is None:
+                return None
+        
+        # Fields missing from short rows read as NaN even with keep_default_na off
+        frame = self._pending[list(self.columns)].rename(columns=self.columns).fillna("")
+        self._pending = None
+        batch = validate_chunk(frame.reset_index(drop=True), self.rows_read + 1)
+        self.rows_read += len(frame)
+        return batch
@@ -0,0 +1,142 @@
+"""
+Profiling of the running worker
+A sampling profiler that reads the event loop thread's stack from another
+thread, so it sees what the loop is doing even while it is blocked, and an
+event loop lag monitor with a watchdog thread that logs the loop's stack
+while a stall is still in progress
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+
+from backend.services.histogram import LatencyHistogram
+from backend.middleware.metrics import worker_metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+# How often the lag monitor wakes up, and the lag that counts as a stall
+LOOP_MONITOR_INTERVAL = float(os.environ.get('LOOP_MONITOR_INTERVAL', '0.1'))
+LOOP_LAG_THRESHOLD = float(os.environ.get('LOOP_LAG_THRESHOLD_MS', '200')) / 1000
+
+# Lag percentiles cover the last one to two windows
+LOOP_LAG_WINDOW = 60.0
+
+def _frame_name(frame: FrameType) -> str:
+    path = Path(frame.f_code.co_filename)
+    try:
+        location = path.resolve().relative_to(ROOT_DIR).as_posix()
+    except ValueError:
+        location = path.name
+    return f"{location}:{frame.f_code.co_name}"
+
+def collapsed_stack(frame: Optional[FrameType]) -> str:
+    """One stack in collapsed form, outermost frame first, as flame graph tools read it"""
+    
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter:
+    """Sample `thread_id`'s stack every `interval` seconds for `seconds`; counts per collapsed stack"""
+    
+    samples: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            samples[collapsed_stack(frame)] += 1
+        del frame
+        time.sleep(interval)
+    return samples
+
+def format_collapsed(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+class EventLoopMonitor:
+    """
+    Measures how late the event loop runs a timer, which is how long any
+    request can have been kept waiting by work that does not yield
+    """
+    
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._current = LatencyHistogram()
+        self._previous = LatencyHistogram()
+        self._window_started = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, lag: float):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started >= LOOP_LAG_WINDOW:
+                self._previous, self._current = self._current, LatencyHistogram()
+                self._window_started = now
+            self._current.record(lag)
+        if lag >= self.threshold:
+            worker_metrics.increment("event_loop.stalls")
+        worker_metrics.increment("event_loop.lag_seconds", lag)
+    
+    def percentiles(self) -> Dict[str, float]:
+        """Lag in milliseconds over the recent windows"""
+        
+        with self._lock:
+            histogram = LatencyHistogram()
+            histogram.merge(self._previous)
+            histogram.merge(self._current)
+        return {
+            "samples": histogram.total,
+            "p50_ms": histogram.percentile(50),
+            "p90_ms": histogram.percentile(90),
+            "p99_ms": histogram.percentile(99),
+            "max_ms": histogram.max / 1000 if histogram.total else 0.0,
+        }
+    
+    async def run(self):
+        """Measure lag until cancelled, with a watchdog thread watching for stalls"""
+        
+        self.loop_thread_id = threading.get_ident()
+        stopped = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(stopped,), name="event-loop-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                self._heartbeat = time.monotonic()
+                expected = time.perf_counter() + self.interval
+                await asyncio.sleep(self.interval)
+                self.record(max(0.0, time.perf_counter() - expected))
+        finally:
+            stopped.set()
+    
+    def _watch(self, stopped: threading.Event):
+        # The monitor coroutine cannot report a stall until it is over, by which
+        # time the stack that caused it is gone; this thread looks while it lasts
+        reported = None
+        while not stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            del frame
+            logger.warning(f"Event loop blocked for {stalled * 1000:.0f} ms so far, at:\n{stack}")
+
+loop_monitor = EventLoopMonitor()
@@ -0,0 +1,99 @@
+"""
+Query/index advisor for assessment listings
+Runs explain() on every filter combination GET /api/assessments/ can issue,
+in both the full and the summary view, and flags plans that scan the whole
+collection, sort in memory, or (for summaries) fetch documents instead of
+answering from the index. Meant for development: set QUERY_ADVISOR=1 to
+log findings after the indexes are built, and tests assert there are none
+"""
+import logging
+import os
+from itertools import combinations
+from typing import Iterator, List, NamedTuple, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from backend.models.patient_assessment import SUMMARY_FIELDS
+from backend.repositories.motor import LIST_SORT, list_filter
+
+logger = logging.getLogger(__name__)
+
+# A representative value for each listing filter
+SAMPLE_FILTERS = {
+    "patient_id": "P-0001",
+    "risk_result": "HIGH_RISK",
+    "status": "COMPLETED",
+}
+
+# Stages that mean a listing does more work than it needs to
+FLAGGED_STAGES = {
+    "COLLSCAN": "scans the whole collection",
+    "SORT": "sorts in memory instead of walking an index in created_at order",
+}
+
+class Finding(NamedTuple):
+    view: str
+    filters: tuple
+    stage: str
+    message: str
+    
+    def __str__(self) -> str:
+        filters = ", ".join(self.filters) or "no filters"
+        return f"{self.view} listing with {filters}: {self.stage} {self.message}"
+
+def query_shapes() -> Iterator[tuple]:
+    """Every combination of the equality filters, plus the physician_name regex on its own"""
+    
+    for size in range(len(SAMPLE_FILTERS) + 1):
+        yield from combinations(SAMPLE_FILTERS, size)
+    yield ("physician_name",)
+
+def plan_stages(plan: Optional[dict]) -> Iterator[str]:
+    """Stage names of an explain() plan tree, outermost first"""
+    
+    if not plan:
+        return
+    if "queryPlan" in plan:
+        # Plans run by the slot-based engine (MongoDB 7+) are nested one level deeper
+        yield from plan_stages(plan["queryPlan"])
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    yield from plan_stages(plan.get("inputStage"))
+    for stage in plan.get("inputStages", ()):
+        yield from plan_stages(stage)
+
+def review_plan(explanation: dict, view: str, filters: tuple) -> List[Finding]:
+    stages = set(plan_stages(explanation["queryPlanner"]["winningPlan"]))
+    findings = [
+        Finding(view, filters, stage, message)
+        for stage, message in FLAGGED_STAGES.items() if stage in stages
+    ]
+    # physician_name is not part of any summary index, so those summaries always fetch
+    if view == "summary" and "FETCH" in stages and "physician_name" not in filters:
+        findings.append(Finding(view, filters, "FETCH", "reads documents; the summary is not covered by an index"))
+    return findings
+
+async def advise(db: AsyncIOMotorDatabase, limit: int = 100) -> List[Finding]:
+    """Explain every listing query shape and return what should be looked at"""
+    
+    findings = []
+    for filters in query_shapes():
+        values = {field: SAMPLE_FILTERS.get(field, "smith") for field in filters}
+        filter_query = list_filter(**values)
+        for view, projection in (("full", None), ("summary", {"_id": 0, **dict.fromkeys(SUMMARY_FIELDS, 1)})):
+            cursor = db.assessments.find(filter_query, projection).sort(LIST_SORT).limit(limit)
+            findings.extend(review_plan(await cursor.explain(), view, filters))
+    return findings
+
+def advisor_enabled() -> bool:
+    return os.environ.get('QUERY_ADVISOR', '0') == '1'
+
+async def log_advice(db: AsyncIOMotorDatabase):
+    """Log the advisor's findings, for development deployments"""
+    
+    findings = await advise(db)
+    for finding in findings:
+        logger.warning(f"Query advisor: {finding}")
+    if not findings:
+        logger.info("Query advisor: every assessment listing is served by an index")
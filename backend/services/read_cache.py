@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from backend.middleware.metrics import worker_metrics
+from backend.services.shared_state import SharedStateStore, shared_state
+
+logger = logging.getLogger(__name__)
+
+# Seconds a loaded value is served without asking the database again; 0 keeps
+# coalescing of concurrent loads but caches nothing
+READ_CACHE_TTL = float(os.environ.get('READ_CACHE_TTL', '2.0'))
+
+# Entries kept per worker before expired and then oldest ones are dropped
+READ_CACHE_MAX_ENTRIES = 10_000
+
+# Shared invalidation generations keys are hashed into; a write to one key also
+# drops cached values of the keys sharing its slot, which only costs a reload
+READ_CACHE_SLOTS = 4096
+
+class SingleFlightCache:
+    """
+    Coalesces concurrent loads of the same key into one and keeps the result
+    for a short time
+    Values are shared between requests and must not be mutated. Values are
+    held per worker; with a `shared` store, invalidation also advances a
+    generation there that every worker checks before serving a value, so a
+    write through one worker is seen by the others on the same host
+    """
+    
+    def __init__(
+        self,
+        ttl: float = READ_CACHE_TTL,
+        max_entries: int = READ_CACHE_MAX_ENTRIES,
+        shared: Optional[SharedStateStore] = None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: Dict[Hashable, Tuple[float, Optional[int], Any]] = {}
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, loading it with `loader` at most once at a time"""
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, generation, value = entry
+            if expires > time.monotonic():
+                if generation == self._generation(key):
+                    worker_metrics.increment("read_cache.hits")
+                    return value
+                # Written through another worker since it was loaded
+                worker_metrics.increment("read_cache.stale")
+            del self._entries[key]
+        
+        task = self._in_flight.get(key)
+        if task is None:
+            worker_metrics.increment("read_cache.misses")
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(_consume_exception)
+            self._in_flight[key] = task
+        else:
+            worker_metrics.increment("read_cache.coalesced")
+        
+        # Shielded so a disconnecting client does not cancel the load for
+        # everyone else waiting on it
+        return await asyncio.shield(task)
+    
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Read first, so a write landing during the load leaves the value stale
+        generation = self._generation(key) if self.ttl > 0 else None
+        try:
+            value = await loader()
+        finally:
+            task = self._in_flight.get(key)
+            current = task is asyncio.current_task()
+            if current:
+                del self._in_flight[key]
+        
+        # A load invalidated while running may have read the old document
+        if current and value is not None and generation is not None:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + self.ttl, generation, value)
+        return value
+    
+    def _generation(self, key: Hashable) -> Optional[int]:
+        """The key's shared generation, None if it cannot be read so nothing is served from the cache"""
+        
+        if self.shared is None:
+            return 0
+        try:
+            return self.shared.generation(_slot(key))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the read cache generation: {e}")
+            return None
+    
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        # Still full: drop the oldest half, entries are in insertion order
+        if len(self._entries) >= self.max_entries:
+            for key in list(self._entries)[:len(self._entries) // 2]:
+                del self._entries[key]
+    
+    def invalidate(self, *keys: Hashable):
+        """Forget cached values and detach running loads, so later reads see new writes"""
+        
+        for key in keys:
+            self._entries.pop(key, None)
+            self._in_flight.pop(key, None)
+        if self.shared is not None:
+            try:
+                self.shared.bump_generations(_slot(key) for key in keys)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not invalidate cached reads of other workers: {e}")
+    
+    def clear(self):
+        self._entries.clear()
+        self._in_flight.clear()
+
+def _slot(key: Hashable) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(repr(key).encode()) % READ_CACHE_SLOTS
+
+def _consume_exception(task: asyncio.Task):
+    # Waiters re-raise the error; this only silences the warning when none are left
+    if not task.cancelled():
+        task.exception()
+
+# Shared by the assessment read endpoints
+read_cache = SingleFlightCache(shared=shared_state)
@@ -1,6 +1,42 @@
-from typing import List, Tuple
-from backend.models.patient_assessment import PatientAssessment, RiskResult, RiskFactor, RiskCalculationResult
+from typing import List, Optional, Tuple
+from pydantic import ValidationError
+from backend.models.patient_assessment import (
+    PatientAssessment,
+    PatientAssessmentCreate,
+    RiskResult,
+    RiskFactor,
+    RiskCalculationResult,
+    LatestResultSnapshot,
+    validation_messages
+)
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+
+# Version of the classification rules below; bump whenever a criterion changes
+# so that stored bitmasks produced by older rules are not re-rendered
+RULES_VERSION = 1
+
+# Bit assigned to each IMWG criterion in a criteria bitmask
+DEL17P_TP53 = 1 << 0
+TRANSLOCATION_COMBO = 1 << 1
+DEL1P32_1Q = 1 << 2
+HIGH_B2M_NORMAL_CREATININE = 1 << 3
+
+# Criterion 4 cutoffs: β2M at or above (mg/L) with creatinine below (mg/dL)
+B2M_CUTOFF = 5.5
+CREATININE_CUTOFF = 1.2
+
+class _Placeholder(float):
+    """A lab value that compares as a number but formats as a template field"""
+    
+    def __new__(cls, value: float, name: str):
+        placeholder = super().__new__(cls, value)
+        placeholder.name = name
+        return placeholder
+    
+    def __format__(self, format_spec: str) -> str:
+        return "{" + self.name + "}"
 
 class IMWGRiskCalculator:
     """
@@ -14,64 +50,198 @@ class IMWGRiskCalculator:
         Calculate risk based on IMWG criteria
         Returns risk result and detailed analysis
         """
-        risk_factors = []
+        mask = IMWGRiskCalculator.criteria_mask(assessment)
+        return IMWGRiskCalculator.build_result(assessment, mask)
+    
+    @staticmethod
+    def criteria_mask(assessment: PatientAssessment) -> int:
+        """Encode which of the four IMWG criteria are met as a bitmask"""
+        
+        mask = 0
         
         # Criterion 1: del(17p) and/or TP53 mutation
         if assessment.del17p_tp53 == 'positive':
+            mask |= DEL17P_TP53
+        
+        # Criterion 2: High-risk translocation with +1q and/or del(1p)
+        if assessment.translocation_combo == 'positive':
+            mask |= TRANSLOCATION_COMBO
+        
+        # Criterion 3: del(1p32) patterns
+        if assessment.del1p32_1q == 'positive':
+            mask |= DEL1P32_1Q
+        
+        # Criterion 4: High β2M with normal creatinine
+        if assessment.b2m_value is not None and assessment.creatinine_value is not None:
+            if assessment.b2m_value >= B2M_CUTOFF and assessment.creatinine_value < CREATININE_CUTOFF:
+                mask |= HIGH_B2M_NORMAL_CREATININE
+        
+        return mask
+    
+    @staticmethod
+    def criteria_masks(
+        del17p_tp53,
+        translocation_combo,
+        del1p32_1q,
+        b2m_value,
+        creatinine_value,
+        b2m_cutoff: float = B2M_CUTOFF,
+        creatinine_cutoff: float = CREATININE_CUTOFF
+    ):
+        """
+        Vectorized criteria_mask over whole columns
+        Genetic columns are boolean arrays (True for 'positive'); lab columns are
+        float arrays with NaN where the value is missing. Returns a uint8 array
+        """
+        import numpy as np
+        
+        b2m_value = np.asarray(b2m_value, dtype=np.float64)
+        creatinine_value = np.asarray(creatinine_value, dtype=np.float64)
+        
+        masks = np.zeros(b2m_value.shape, dtype=np.uint8)
+        masks[np.asarray(del17p_tp53, dtype=bool)] |= DEL17P_TP53
+        masks[np.asarray(translocation_combo, dtype=bool)] |= TRANSLOCATION_COMBO
+        masks[np.asarray(del1p32_1q, dtype=bool)] |= DEL1P32_1Q
+        
+        # Comparisons with NaN are False, so missing labs never meet criterion 4
+        with np.errstate(invalid="ignore"):
+            labs_met = (b2m_value >= b2m_cutoff) & (creatinine_value < creatinine_cutoff)
+        masks[labs_met] |= HIGH_B2M_NORMAL_CREATININE
+        
+        return masks
+    
+    @staticmethod
+    def risk_factors_from_mask(mask: int, assessment: PatientAssessment) -> List[RiskFactor]:
+        """Expand a criteria bitmask back into the detailed risk factor list"""
+        
+        risk_factors = []
+        
+        if mask & DEL17P_TP53:
             risk_factors.append(RiskFactor(
                 criterion="del(17p) and/or TP53 mutation",
                 description="Assessed using NGS-based method with CCF ≥20% on CD138-positive cells",
                 is_positive=True
             ))
         
-        # Criterion 2: High-risk translocation with +1q and/or del(1p)
-        if assessment.translocation_combo == 'positive':
+        if mask & TRANSLOCATION_COMBO:
             risk_factors.append(RiskFactor(
                 criterion="High-risk translocation",
                 description="One of these translocations—t(4;14) or t(14;16) or t(14;20)—co-occurring with +1q and/or del(1p)",
                 is_positive=True
             ))
         
-        # Criterion 3: del(1p32) patterns
-        if assessment.del1p32_1q == 'positive':
+        if mask & DEL1P32_1Q:
             risk_factors.append(RiskFactor(
                 criterion="del(1p32) patterns",
                 description="Monoallelic del(1p32) with +1q OR biallelic del(1p32)",
                 is_positive=True
             ))
         
-        # Criterion 4: High β2M with normal creatinine
-        b2m_criterion_met = False
-        if assessment.b2m_value is not None and assessment.creatinine_value is not None:
-            if assessment.b2m_value >= 5.5 and assessment.creatinine_value < 1.2:
-                b2m_criterion_met = True
-                risk_factors.append(RiskFactor(
-                    criterion="High β2-microglobulin with normal creatinine",
-                    description=f"β2M: {assessment.b2m_value} mg/L (≥5.5) with creatinine: {assessment.creatinine_value} mg/dL (<1.2)",
-                    is_positive=True
-                ))
-        
-        # Determine risk result
-        is_high_risk = len(risk_factors) > 0
-        risk_result = RiskResult.HIGH_RISK if is_high_risk else RiskResult.STANDARD_RISK
-        
-        # Generate clinical interpretation
-        clinical_interpretation = IMWGRiskCalculator._generate_clinical_interpretation(
-            risk_result, risk_factors, assessment
-        )
+        if mask & HIGH_B2M_NORMAL_CREATININE:
+            risk_factors.append(RiskFactor(
+                criterion="High β2-microglobulin with normal creatinine",
+                description=f"β2M: {assessment.b2m_value} mg/L (≥{B2M_CUTOFF}) with creatinine: {assessment.creatinine_value} mg/dL (<{CREATININE_CUTOFF})",
+                is_positive=True
+            ))
         
-        # Generate recommendations
-        recommendations = IMWGRiskCalculator._generate_recommendations(
-            risk_result, risk_factors
+        return risk_factors
+    
+    @staticmethod
+    def build_result(
+        assessment: PatientAssessment,
+        mask: int,
+        calculated_at: Optional[datetime] = None
+    ) -> RiskCalculationResult:
+        """Render the full calculation result for a criteria bitmask"""
+        
+        borderline_b2m = (
+            mask == 0 and assessment.b2m_value is not None and assessment.b2m_value >= 4.0
+        )
+        factor_templates, interpretation_template, recommendations = (
+            IMWGRiskCalculator._result_template(mask, borderline_b2m)
         )
         
-        return RiskCalculationResult(
+        risk_factors = [
+            RiskFactor(criterion=criterion, description=description, is_positive=True)
+            for criterion, description in factor_templates
+        ]
+        risk_result = RiskResult.HIGH_RISK if risk_factors else RiskResult.STANDARD_RISK
+        clinical_interpretation = interpretation_template
+        
+        # Only the β2M factor and the borderline β2M note quote lab values
+        if mask & HIGH_B2M_NORMAL_CREATININE or borderline_b2m:
+            values = {
+                "b2m_value": assessment.b2m_value,
+                "creatinine_value": assessment.creatinine_value
+            }
+            for factor in risk_factors:
+                factor.description = factor.description.format_map(values)
+            clinical_interpretation = interpretation_template.format_map(values)
+        
+        result = RiskCalculationResult(
             assessment_id=assessment.id,
             risk_result=risk_result,
             risk_factors=risk_factors,
             total_risk_factors=len(risk_factors),
             clinical_interpretation=clinical_interpretation,
-            recommendations=recommendations
+            recommendations=list(recommendations)
+        )
+        if calculated_at is not None:
+            result.calculated_at = calculated_at
+        
+        return result
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _result_template(
+        mask: int,
+        borderline_b2m: bool
+    ) -> Tuple[Tuple[Tuple[str, str], ...], str, Tuple[str, ...]]:
+        """
+        Render the text of a result once per criteria bitmask
+        Lab values are left as {b2m_value}/{creatinine_value} placeholders
+        """
+        
+        labs = SimpleNamespace(
+            b2m_value=_Placeholder(4.0 if borderline_b2m else 0.0, "b2m_value"),
+            creatinine_value=_Placeholder(0.0, "creatinine_value")
+        )
+        risk_factors = IMWGRiskCalculator.risk_factors_from_mask(mask, labs)
+        risk_result = RiskResult.HIGH_RISK if risk_factors else RiskResult.STANDARD_RISK
+        
+        interpretation = IMWGRiskCalculator._generate_clinical_interpretation(
+            risk_result, risk_factors, labs
+        )
+        recommendations = IMWGRiskCalculator._generate_recommendations(
+            risk_result, risk_factors
+        )
+        
+        factor_templates = tuple((factor.criterion, factor.description) for factor in risk_factors)
+        return factor_templates, interpretation, tuple(recommendations)
+    
+    @staticmethod
+    def snapshot(result: RiskCalculationResult, mask: int) -> LatestResultSnapshot:
+        """Compact form of a calculation result for embedding in the assessment"""
+        
+        return LatestResultSnapshot(
+            risk_mask=mask,
+            rules_version=RULES_VERSION,
+            calculated_at=result.calculated_at
+        )
+    
+    @staticmethod
+    def result_from_snapshot(assessment: PatientAssessment) -> Optional[RiskCalculationResult]:
+        """
+        Rebuild the latest calculation result from the embedded snapshot
+        Returns None when there is no snapshot or it was produced by other rules
+        """
+        
+        snapshot = assessment.latest_result
+        if snapshot is None or snapshot.rules_version != RULES_VERSION:
+            return None
+        
+        return IMWGRiskCalculator.build_result(
+            assessment, snapshot.risk_mask, calculated_at=snapshot.calculated_at
         )
     
     @staticmethod
@@ -99,7 +269,7 @@ class IMWGRiskCalculator:
             
             if any("β2-microglobulin" in factor.criterion for factor in risk_factors):
                 interpretation += "\n\nNote: Elevated β2-microglobulin with normal renal function indicates high tumor burden and poor prognosis."
-                
+        
         else:
             interpretation = "Patient does not meet criteria for High-Risk Multiple Myeloma based on current assessment. "
             interpretation += "Standard risk classification allows for conventional treatment approaches with standard monitoring intervals."
@@ -107,7 +277,7 @@ class IMWGRiskCalculator:
             # Add notes about borderline values
             if assessment.b2m_value is not None and assessment.b2m_value >= 4.0:
                 interpretation += f"\n\nNote: β2-microglobulin level of {assessment.b2m_value} mg/L is elevated but does not meet high-risk criteria."
-            
+        
         return interpretation
     
     @staticmethod
@@ -134,7 +304,7 @@ class IMWGRiskCalculator:
             if any("translocation" in factor.criterion for factor in risk_factors):
                 recommendations.append("Consider bortezomib-based regimens for t(4;14) patients")
                 recommendations.append("Enhanced monitoring for early progression")
-            
+        
         else:
             recommendations.extend([
                 "Standard treatment protocols are appropriate",
@@ -150,37 +320,9 @@ class IMWGRiskCalculator:
     def validate_assessment_data(assessment: PatientAssessment) -> Tuple[bool, List[str]]:
         """Validate assessment data for completeness and accuracy"""
         
-        errors = []
-        
-        # Check required fields
-        if not assessment.del17p_tp53:
-            errors.append("del(17p) and/or TP53 mutation status is required")
-        elif assessment.del17p_tp53 not in ['positive', 'negative']:
-            errors.append("del(17p) and/or TP53 mutation status must be 'positive' or 'negative'")
-        
-        if not assessment.translocation_combo:
-            errors.append("High-risk translocation status is required")
-        elif assessment.translocation_combo not in ['positive', 'negative']:
-            errors.append("High-risk translocation status must be 'positive' or 'negative'")
-        
-        if not assessment.del1p32_1q:
-            errors.append("del(1p32) patterns status is required")
-        elif assessment.del1p32_1q not in ['positive', 'negative']:
-            errors.append("del(1p32) patterns status must be 'positive' or 'negative'")
-        
-        # Validate β2M and creatinine if provided
-        if assessment.b2m_value is not None:
-            if assessment.b2m_value < 0 or assessment.b2m_value > 50:
-                errors.append("β2-microglobulin value must be between 0 and 50 mg/L")
-            
-            if assessment.creatinine_value is None:
-                errors.append("Creatinine value is required when β2-microglobulin is provided")
-        
-        if assessment.creatinine_value is not None:
-            if assessment.creatinine_value < 0 or assessment.creatinine_value > 20:
-                errors.append("Creatinine value must be between 0 and 20 mg/dL")
-            
-            if assessment.b2m_value is None:
-                errors.append("β2-microglobulin value is required when creatinine is provided")
-        
-        return len(errors) == 0, errors
\ No newline at end of file
+        # The rules live on PatientAssessmentCreate, so this is one compiled pass
+        try:
+            PatientAssessmentCreate.model_validate(assessment, from_attributes=True)
+        except ValidationError as e:
+            return False, validation_messages(e.errors())
+        return True, []
@@ -0,0 +1,154 @@
+import fcntl
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Directory shared by every worker process on the host
+SHARED_STATE_DIR = Path(os.environ.get(
+    'SHARED_STATE_DIR', os.path.join(tempfile.gettempdir(), 'imwg-shared')
+))
+
+class SharedStateStore:
+    """
+    Host-local state shared between worker processes
+    Backed by a SQLite file in WAL mode; each process opens its own connection,
+    shared by its threads under a lock
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so reopen in each new process
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " worker TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL,"
+                " updated_at REAL NOT NULL, PRIMARY KEY (worker, name))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                " slot INTEGER PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+    
+    def publish_counters(self, worker: str, counters: Dict[str, float]):
+        """Replace the published counter values of one worker"""
+        
+        now = time.time()
+        with self._lock:
+            self._connect().executemany(
+                "INSERT INTO counters (worker, name, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (worker, name) DO UPDATE SET value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                [(worker, name, value, now) for name, value in counters.items()]
+            )
+    
+    def aggregate_counters(self) -> Dict[str, float]:
+        """Sum every counter across the live workers, dropping those of workers that have exited"""
+        
+        with self._lock:
+            connection = self._connect()
+            workers = [worker for (worker,) in connection.execute("SELECT DISTINCT worker FROM counters")]
+            connection.executemany(
+                "DELETE FROM counters WHERE worker = ?",
+                [(worker,) for worker in workers if not _worker_alive(worker)]
+            )
+            rows = connection.execute(
+                "SELECT name, SUM(value) FROM counters GROUP BY name ORDER BY name"
+            ).fetchall()
+        return {name: value for name, value in rows}
+    
+    def bump_generations(self, slots: Iterable[int]):
+        """Advance the generation of each slot, telling every worker its values changed"""
+        
+        with self._lock:
+            self._connect().executemany(
+                "INSERT INTO generations (slot, generation) VALUES (?, 1) "
+                "ON CONFLICT (slot) DO UPDATE SET generation = generation + 1",
+                [(slot,) for slot in set(slots)]
+            )
+    
+    def generation(self, slot: int) -> int:
+        """Current generation of a slot, 0 if it was never bumped"""
+        
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT generation FROM generations WHERE slot = ?", (slot,)
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def active_workers(self, within_seconds: float = 60) -> int:
+        """Number of workers that published recently"""
+        
+        with self._lock:
+            (count,) = self._connect().execute(
+                "SELECT COUNT(DISTINCT worker) FROM counters WHERE updated_at >= ?",
+                (time.time() - within_seconds,)
+            ).fetchone()
+        return count
+
+def _worker_alive(worker: str) -> bool:
+    # Workers are named "<host>:<pid>"; the store is host-local, so a worker
+    # of another host is one from before the container was replaced
+    host, _, pid = worker.rpartition(":")
+    if host != os.uname().nodename or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+shared_state = SharedStateStore(SHARED_STATE_DIR / 'state.sqlite3')
+
+# File descriptors of leader locks held by this process
+_leader_locks: Dict[str, int] = {}
+
+def acquire_leadership(name: str = "startup") -> bool:
+    """
+    Try to become the leader for `name` among the workers on this host
+    The lock is held until the process exits, so exactly one live worker
+    runs the coordinated tasks and a replacement worker takes over on restart
+    """
+    
+    if name in _leader_locks:
+        return True
+    
+    SHARED_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(SHARED_STATE_DIR / f'{name}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _leader_locks[name] = fd
+    return True
+
+def release_leadership(name: str = "startup"):
+    """Give up leadership for `name` if this process holds it"""
+    
+    fd = _leader_locks.pop(name, None)
+    if fd is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
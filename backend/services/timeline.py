@@ -0,0 +1,38 @@
+from typing import List, Tuple
+
+from backend.models.patient_assessment import (
+    PatientAssessment,
+    PatientTimelineEntry,
+    RiskCalculationResult
+)
+from backend.repositories.base import AssessmentRepository
+
+async def record_calculations(
+    repository: AssessmentRepository,
+    calculations: List[Tuple[PatientAssessment, RiskCalculationResult]]
+):
+    """
+    Append calculations to the patient timeline, marking risk transitions
+    Looks up each patient's latest entry once for the whole batch
+    """
+    
+    calculations = [(assessment, result) for assessment, result in calculations if assessment.patient_id]
+    if not calculations:
+        return
+    
+    latest = await repository.latest_risk_results({assessment.patient_id for assessment, _ in calculations})
+    
+    entries = []
+    for assessment, result in sorted(calculations, key=lambda pair: pair[1].calculated_at):
+        previous = latest.get(assessment.patient_id)
+        entries.append(PatientTimelineEntry(
+            patient_id=assessment.patient_id,
+            assessment_id=assessment.id,
+            risk_result=result.risk_result,
+            previous_risk_result=previous,
+            transition=previous is not None and previous != result.risk_result.value,
+            calculated_at=result.calculated_at
+        ).model_dump())
+        latest[assessment.patient_id] = result.risk_result.value
+    
+    await repository.insert_timeline(entries)
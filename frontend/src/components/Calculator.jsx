@@ -37,7 +37,6 @@ const Calculator = () => {
     setError(null);
     
     try {
-      // First create an assessment
       const assessmentData = {
         patient_name: formData.patient_name || 'Anonymous Patient',
         del17p_tp53: formData.del17p_tp53,
@@ -51,12 +50,8 @@ const Calculator = () => {
       
       const backendUrl = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
       
-      // Create assessment
-      const createResponse = await axios.post(`${backendUrl}/api/assessments/`, assessmentData);
-      const assessmentId = createResponse.data.id;
-      
-      // Calculate risk
-      const riskResponse = await axios.post(`${backendUrl}/api/assessments/${assessmentId}/calculate`);
+      // Calculate risk (nothing is saved)
+      const riskResponse = await axios.post(`${backendUrl}/api/calculate`, assessmentData);
       const riskResult = riskResponse.data;
       
       setResult({
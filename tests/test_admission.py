@@ -0,0 +1,104 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.middleware.admission import (
+    PRIORITY_CLASSES,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    classify
+)
+
+CALCULATE, READ, BULK = (PRIORITY_CLASSES[name] for name in ("calculate", "read", "bulk"))
+
+def test_routes_are_classified():
+    assert classify("POST", "/api/calculate") is CALCULATE
+    assert classify("POST", "/api/assessments/calculate") is BULK
+    assert classify("GET", "/api/assessments/") is READ
+    assert classify("POST", "/api/assessments/a1/calculate") is READ
+    assert classify("GET", "/api/health") is None
+    assert classify("POST", "/api/import/csv").deadline is None
+
+def test_freed_slots_go_to_the_highest_priority_waiting():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        assert await controller.acquire(READ)
+        admitted = []
+        
+        async def request(priority_class):
+            if await controller.acquire(priority_class):
+                admitted.append(priority_class.name)
+                await asyncio.sleep(0)
+                controller.release(priority_class)
+        
+        waiting = [asyncio.create_task(request(cls)) for cls in (BULK, READ, CALCULATE)]
+        await asyncio.sleep(0)
+        controller.release(READ)
+        await asyncio.gather(*waiting)
+        assert admitted == ["calculate", "read", "bulk"]
+        assert controller.active == 0
+    
+    asyncio.run(scenario())
+
+def test_requests_over_the_queue_budget_are_shed():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1)
+        assert await controller.acquire(READ)
+        assert not await controller.acquire(BULK._replace(queue_budget=0.01))
+        # A class at its own limit waits even when the shared pool has room
+        controller.max_concurrency = 100
+        for _ in range(BULK.limit):
+            assert await controller.acquire(BULK)
+        assert not await controller.acquire(BULK._replace(queue_budget=0.01))
+        assert await controller.acquire(CALCULATE)
+        assert not controller._waiters
+    
+    asyncio.run(scenario())
+
+def test_shed_requests_get_503_with_retry_after():
+    app = FastAPI()
+    
+    @app.post("/api/assessments/calculate")
+    async def batch():
+        return {"ok": True}
+    
+    controller = AdmissionController(max_concurrency=0)
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    client = TestClient(app)
+    
+    response = client.post("/api/assessments/calculate")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(BULK.retry_after)
+    controller.max_concurrency = 1
+    assert client.post("/api/assessments/calculate").json() == {"ok": True}
+
+def test_database_deadlines_on_writes_get_503():
+    from pymongo.errors import ExecutionTimeout, OperationFailure
+    
+    from backend import database
+    from backend.repositories.memory import InMemoryAssessmentRepository
+    from backend.server import app
+    
+    class FailingRepository(InMemoryAssessmentRepository):
+        error = ExecutionTimeout("operation exceeded time limit", 50)
+        
+        async def apply_calculations(self, updates):
+            raise self.error
+    
+    repository = FailingRepository()
+    app.dependency_overrides[database.get_assessment_repository] = lambda: repository
+    try:
+        client = TestClient(app)
+        assessment_id = client.post("/api/assessments/", json={
+            "del17p_tp53": "positive", "translocation_combo": "negative", "del1p32_1q": "negative"
+        }).json()["id"]
+        response = client.post(f"/api/assessments/{assessment_id}/calculate")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(READ.retry_after)
+        
+        repository.error = OperationFailure("something else")
+        response = client.post(f"/api/assessments/{assessment_id}/calculate")
+        assert response.status_code == 500
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.repositories.memory import InMemoryAssessmentRepository
+from backend.services.analytics_mirror import AnalyticsMirror, sync_mirror
+
+START = datetime(2024, 5, 1, 12, 0)
+
+def assessment(index: int, **fields) -> dict:
+    return {
+        "id": f"a{index}",
+        "patient_id": f"P{index}",
+        "institution": "General" if index % 2 else "University",
+        "status": "COMPLETED",
+        "risk_result": "HIGH_RISK" if index % 3 == 0 else "STANDARD_RISK",
+        "total_risk_factors": 2 if index % 3 == 0 else 0,
+        "del17p_tp53": "positive" if index % 3 == 0 else "negative",
+        "translocation_combo": "negative",
+        "del1p32_1q": "positive" if index % 3 == 0 else "negative",
+        "b2m_value": 6.0,
+        "creatinine_value": 1.0,
+        "created_at": START,
+        # Several assessments share each updated_at, across batch boundaries
+        "updated_at": START + timedelta(seconds=index // 4),
+        **fields
+    }
+
+def test_sync_is_incremental_and_applies_deletions(tmp_path):
+    async def scenario():
+        repository = InMemoryAssessmentRepository()
+        mirror = AnalyticsMirror(tmp_path / "analytics.sqlite3")
+        for index in range(10):
+            await repository.insert_assessment(assessment(index))
+            await repository.insert_calculations([{
+                "assessment_id": f"a{index}",
+                "risk_result": assessment(index)["risk_result"],
+                "total_risk_factors": 0,
+                "calculated_at": START + timedelta(days=index),
+            }])
+        
+        applied = await sync_mirror(repository, mirror, batch_size=3, lag=0)
+        assert applied == {"assessments": 10, "calculations": 10, "deletions": 0}
+        assert await sync_mirror(repository, mirror, batch_size=3, lag=0) == {
+            "assessments": 0, "calculations": 0, "deletions": 0
+        }
+        
+        await repository.update_assessment("a1", {"institution": "Clinic", "updated_at": START + timedelta(hours=1)})
+        await repository.delete_assessment("a2")
+        await repository.insert_history([{
+            "id": "h1", "assessment_id": "a2", "action": "deleted", "timestamp": START + timedelta(hours=1)
+        }])
+        applied = await sync_mirror(repository, mirror, batch_size=3, lag=0)
+        assert applied == {"assessments": 1, "calculations": 0, "deletions": 1}
+        
+        status = mirror.status()
+        assert (status["assessments"], status["calculations"]) == (9, 9)
+        groups = {group["group"]: group for group in mirror.cohort_breakdown("institution")}
+        assert {name: group["assessments"] for name, group in groups.items()} == {
+            "University": 4, "General": 4, "Clinic": 1
+        }
+        assert groups["University"]["high_risk"] == 2
+    
+    asyncio.run(scenario())
+
+def test_queries_answer_from_the_mirror(tmp_path):
+    async def scenario():
+        repository = InMemoryAssessmentRepository()
+        mirror = AnalyticsMirror(tmp_path / "analytics.sqlite3")
+        for index in range(6):
+            await repository.insert_assessment(assessment(index))
+        await repository.insert_calculations([
+            {"assessment_id": "a0", "risk_result": "HIGH_RISK", "total_risk_factors": 2, "calculated_at": START},
+            {"assessment_id": "a1", "risk_result": "STANDARD_RISK", "total_risk_factors": 1,
+             "calculated_at": START + timedelta(hours=1)},
+            {"assessment_id": "a0", "risk_result": "HIGH_RISK", "total_risk_factors": 2,
+             "calculated_at": START + timedelta(days=40)},
+        ])
+        await sync_mirror(repository, mirror, lag=0)
+        
+        cooccurrence = mirror.factor_cooccurrence()
+        assert cooccurrence["assessments"] == 6
+        # a0 and a3 meet criteria 1 and 3; everyone meets criterion 4
+        assert cooccurrence["counts"][0] == [2, 0, 2, 2]
+        assert cooccurrence["counts"][3][3] == 6
+        
+        trends = mirror.risk_trends("month")
+        assert [(point["period"], point["calculations"], point["high_risk"]) for point in trends] == [
+            ("2024-05", 2, 1), ("2024-06", 1, 1)
+        ]
+        assert len(mirror.risk_trends("day", since=START + timedelta(days=1))) == 1
+    
+    asyncio.run(scenario())
@@ -0,0 +1,165 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.models.patient_assessment import PatientAssessment
+from backend.repositories.memory import InMemoryAssessmentRepository
+from backend.repositories.motor import MotorAssessmentRepository
+from backend.routes.assessments import router as assessments_router
+from backend.services.read_cache import read_cache
+from backend.services.risk_calculator import IMWGRiskCalculator
+
+PAYLOAD = {
+    "patient_id": "P1",
+    "del17p_tp53": "positive",
+    "translocation_combo": "negative",
+    "del1p32_1q": "negative",
+    "b2m_value": 6.0,
+    "creatinine_value": 1.0
+}
+
+def make_client(primary, secondary=None):
+    app = FastAPI()
+    app.include_router(assessments_router, prefix="/api")
+    app.dependency_overrides[database.get_assessment_repository] = lambda: primary
+    app.dependency_overrides[database.get_repository] = lambda: primary
+    app.dependency_overrides[database.get_read_repository] = lambda: secondary or primary
+    return TestClient(app)
+
+@pytest.fixture
+def client():
+    yield make_client(InMemoryAssessmentRepository())
+    read_cache.clear()
+
+def test_results_of_older_rules_fall_back_to_the_stored_calculation(client, monkeypatch):
+    assessment_id = client.post("/api/assessments/", json=PAYLOAD).json()["id"]
+    calculated = client.post(f"/api/assessments/{assessment_id}/calculate").json()
+    
+    monkeypatch.setattr("backend.services.risk_calculator.RULES_VERSION", 10**6)
+    result = client.get(f"/api/assessments/{assessment_id}?include=result").json()["result"]
+    assert result["risk_result"] == calculated["risk_result"]
+    assert result["total_risk_factors"] == calculated["total_risk_factors"]
+
+def test_history_checks_the_primary_for_assessments_the_secondary_lacks():
+    primary = InMemoryAssessmentRepository()
+    client = make_client(primary, secondary=InMemoryAssessmentRepository())
+    try:
+        assessment_id = client.post("/api/assessments/", json=PAYLOAD).json()["id"]
+        assert client.get(f"/api/assessments/{assessment_id}/history").json() == []
+        assert client.get("/api/assessments/missing/history").status_code == 404
+    finally:
+        read_cache.clear()
+
+def test_shared_loads_run_outside_the_request_session():
+    db = object()
+    repository = MotorAssessmentRepository(db, binary_ids=True, session=object())
+    shared = repository.without_session()
+    assert (shared.db, shared.binary_ids, shared.session) == (db, True, None)
+    assert shared.without_session() is shared
+
+def test_batch_filters_matching_too_many_are_rejected(client, monkeypatch):
+    monkeypatch.setattr("backend.routes.assessments.MAX_BATCH_SIZE", 2)
+    for _ in range(2):
+        client.post("/api/assessments/", json=PAYLOAD)
+    response = client.post("/api/assessments/calculate", json={"patient_id": "P1"})
+    assert [line["status"] for line in map(json.loads, response.text.splitlines())] == ["calculated"] * 2
+    
+    client.post("/api/assessments/", json=PAYLOAD)
+    response = client.post("/api/assessments/calculate", json={"patient_id": "P1"})
+    assert response.status_code == 400
+
+def test_batches_by_id_and_filter_at_once_are_rejected(client):
+    assessment_id = client.post("/api/assessments/", json=PAYLOAD).json()["id"]
+    response = client.post("/api/assessments/calculate", json={"assessment_ids": [assessment_id], "status": "DRAFT"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"] == ["Provide either assessment_ids or filters, not both"]
+    # Nothing was calculated
+    assert client.get(f"/api/assessments/{assessment_id}").json()["risk_result"] is None
+    
+    response = client.post("/api/assessments/calculate", json={"assessment_ids": [assessment_id]})
+    assert json.loads(response.text)["status"] == "calculated"
+
+def test_only_assessment_routes_report_invalid_input_as_400():
+    from backend.server import app
+    
+    repository = InMemoryAssessmentRepository()
+    app.dependency_overrides[database.get_assessment_repository] = lambda: repository
+    try:
+        client = TestClient(app)
+        invalid = {**PAYLOAD, "del17p_tp53": "maybe", "creatinine_value": None}
+        for path in ("/api/assessments/", "/api/calculate"):
+            response = client.post(path, json=invalid)
+            assert response.status_code == 400
+            assert response.json()["detail"]["errors"] == [
+                "del(17p) and/or TP53 mutation status must be 'positive' or 'negative'"
+            ]
+        
+        # Other routers keep FastAPI's 422 and its error shape
+        response = client.post("/api/status", json={})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "client_name"]
+    finally:
+        app.dependency_overrides.clear()
+
+def test_updates_with_if_match_apply_only_to_the_version_seen(client):
+    assessment_id = client.post("/api/assessments/", json=PAYLOAD).json()["id"]
+    seen = client.get(f"/api/assessments/{assessment_id}").headers["ETag"]
+    
+    response = client.put(f"/api/assessments/{assessment_id}", json={"clinical_notes": "First"}, headers={"If-Match": seen})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    current = response.headers["ETag"]
+    assert current != seen and current.startswith('"2.')
+    assert client.get(f"/api/assessments/{assessment_id}").headers["ETag"] == current
+    
+    # A stale tag is refused and told the current one
+    response = client.put(f"/api/assessments/{assessment_id}", json={"clinical_notes": "Lost"}, headers={"If-Match": seen})
+    assert response.status_code == 409
+    assert response.headers["ETag"] == current
+    
+    # Weak and malformed tags name no version, so they never match
+    for if_match in (f"W/{current}", current.strip('"'), '"latest"'):
+        response = client.put(f"/api/assessments/{assessment_id}", json={"clinical_notes": "Lost"}, headers={"If-Match": if_match})
+        assert response.status_code == 409, if_match
+        assert response.headers["ETag"] == current
+    assert client.get(f"/api/assessments/{assessment_id}").json()["clinical_notes"] == "First"
+    
+    # Any tag in the list may match, and "*" matches whatever the version
+    response = client.put(f"/api/assessments/{assessment_id}", json={"clinical_notes": "Second"}, headers={"If-Match": f"{seen}, {current}"})
+    assert response.status_code == 200
+    response = client.put(f"/api/assessments/{assessment_id}", json={"clinical_notes": "Third"}, headers={"If-Match": "*"})
+    assert (response.status_code, response.json()["version"]) == (200, 4)
+
+def test_updates_of_missing_assessments_are_404_not_409(client):
+    for headers in ({}, {"If-Match": '"1.abc"'}):
+        response = client.put("/api/assessments/missing", json={"clinical_notes": "x"}, headers=headers)
+        assert response.status_code == 404, headers
+
+def test_stateless_calculation_never_touches_the_database(monkeypatch):
+    from backend.server import app
+    
+    class Unreachable:
+        def __getattr__(self, name):
+            raise AssertionError(f"the repository was used: {name}")
+    
+    def no_database():
+        raise AssertionError("the database was used")
+    
+    monkeypatch.setattr(database, "get_client", no_database)
+    for dependency in (database.get_assessment_repository, database.get_repository, database.get_read_repository):
+        app.dependency_overrides[dependency] = Unreachable
+    try:
+        client = TestClient(app)
+        for payload in (PAYLOAD, {**PAYLOAD, "del17p_tp53": "negative"}, {**PAYLOAD, "del17p_tp53": "negative", "b2m_value": 4.5}):
+            response = client.post("/api/calculate", json=payload)
+            assert response.status_code == 200
+            expected = IMWGRiskCalculator.calculate_risk(PatientAssessment(**payload))
+            result = response.json()
+            assert result["risk_result"] == expected.risk_result.value
+            assert result["risk_factors"] == [factor.model_dump() for factor in expected.risk_factors]
+            assert result["clinical_interpretation"] == expected.clinical_interpretation
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,25 @@
+import uuid
+
+from bson import decode, encode
+from bson.binary import Binary
+
+from backend.repositories.binary_ids import decode_ids, encode_id, encode_ids, id_filter, ids_filter
+
+def test_uuids_round_trip_through_binary():
+    value = str(uuid.uuid4())
+    encoded = encode_id(value)
+    assert isinstance(encoded, Binary) and encoded.subtype == 4 and len(encoded) == 16
+    stored = decode(encode({"id": encoded, "assessment_id": encoded}))
+    assert decode_ids(stored, "assessment_history") == {"id": value, "assessment_id": value}
+
+def test_other_ids_stay_strings():
+    value = str(uuid.uuid4())
+    for other in ("legacy", value.upper(), value.replace("-", ""), 42, None):
+        assert encode_id(other) is other
+        assert id_filter(other) is other
+    assert encode_ids({"id": "legacy", "patient_id": value}, "assessments") == {"id": "legacy", "patient_id": value}
+
+def test_filters_match_both_encodings():
+    value = str(uuid.uuid4())
+    assert id_filter(value) == {"$in": [encode_id(value), value]}
+    assert ids_filter([value, "legacy"]) == {"$in": [encode_id(value), value, "legacy"]}
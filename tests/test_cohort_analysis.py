@@ -0,0 +1,116 @@
+import asyncio
+import math
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.models.patient_assessment import PatientAssessment
+from backend.repositories.memory import InMemoryAssessmentRepository
+from backend.routes.analysis import router as analysis_router
+from backend.services.cohort_store import CohortSnapshot, CohortSnapshotWriter, criterion4_counts
+from backend.services.risk_calculator import B2M_CUTOFF, CREATININE_CUTOFF, IMWGRiskCalculator
+
+pytest.importorskip("numpy")
+
+# Duplicates, the current cutoffs and the floats either side of them, unsorted
+B2M_CUTOFFS = [6.0, B2M_CUTOFF, math.nextafter(B2M_CUTOFF, math.inf), 3.0, B2M_CUTOFF,
+               math.nextafter(B2M_CUTOFF, -math.inf), 0.0]
+CREATININE_CUTOFFS = [CREATININE_CUTOFF, 2.0, math.nextafter(CREATININE_CUTOFF, -math.inf), 0.8,
+                      math.nextafter(CREATININE_CUTOFF, math.inf), CREATININE_CUTOFF]
+
+def _lab(cutoff: float, rng: random.Random):
+    return rng.choice((
+        None, 0.0, cutoff, math.nextafter(cutoff, math.inf), math.nextafter(cutoff, -math.inf),
+        round(rng.uniform(0, cutoff * 2), 2)
+    ))
+
+def cohort(count: int = 400, seed: int = 3):
+    rng = random.Random(seed)
+    for _ in range(count):
+        genetic = rng.random() < 0.2
+        yield {
+            "del17p_tp53": "positive" if genetic and rng.random() < 0.5 else "negative",
+            "translocation_combo": "positive" if genetic else "negative",
+            "del1p32_1q": rng.choice(("positive", "negative")) if genetic else "negative",
+            "b2m_value": _lab(B2M_CUTOFF, rng),
+            "creatinine_value": _lab(CREATININE_CUTOFF, rng),
+        }
+
+def classified_high(documents, b2m_cutoff: float, creatinine_cutoff: float, monkeypatch) -> set:
+    """Indexes of the patients the calculator itself calls high risk under the given cutoffs"""
+    
+    monkeypatch.setattr("backend.services.risk_calculator.B2M_CUTOFF", b2m_cutoff)
+    monkeypatch.setattr("backend.services.risk_calculator.CREATININE_CUTOFF", creatinine_cutoff)
+    return {
+        index for index, document in enumerate(documents)
+        if IMWGRiskCalculator.criteria_mask(PatientAssessment(**document))
+    }
+
+def test_criterion4_counts_match_per_patient_comparisons():
+    documents = [document for document in cohort() if document["b2m_value"] is not None
+                 and document["creatinine_value"] is not None]
+    b2m = [document["b2m_value"] for document in documents]
+    creatinine = [document["creatinine_value"] for document in documents]
+    
+    grid = criterion4_counts(b2m, creatinine, B2M_CUTOFFS, CREATININE_CUTOFFS)
+    assert grid.shape == (len(B2M_CUTOFFS), len(CREATININE_CUTOFFS))
+    for i, b2m_cutoff in enumerate(B2M_CUTOFFS):
+        for j, creatinine_cutoff in enumerate(CREATININE_CUTOFFS):
+            expected = sum(1 for x, y in zip(b2m, creatinine) if x >= b2m_cutoff and y < creatinine_cutoff)
+            assert grid[i, j] == expected, (b2m_cutoff, creatinine_cutoff)
+
+def test_sweep_matches_classifying_every_patient(tmp_path, monkeypatch):
+    documents = list(cohort())
+    writer = CohortSnapshotWriter()
+    for document in documents:
+        writer.append(document)
+    snapshot = CohortSnapshot(writer.write(tmp_path))
+    assert snapshot.count == len(documents)
+    
+    sweep = snapshot.threshold_sweep(B2M_CUTOFFS, CREATININE_CUTOFFS)
+    grid = snapshot.high_risk_grid(B2M_CUTOFFS, CREATININE_CUTOFFS)
+    current = classified_high(documents, B2M_CUTOFF, CREATININE_CUTOFF, monkeypatch)
+    assert sweep["current_high_risk"] == len(current)
+    for i, b2m_cutoff in enumerate(B2M_CUTOFFS):
+        for j, creatinine_cutoff in enumerate(CREATININE_CUTOFFS):
+            high = classified_high(documents, b2m_cutoff, creatinine_cutoff, monkeypatch)
+            cell = (b2m_cutoff, creatinine_cutoff)
+            assert grid[i][j] == sweep["high_risk"][i][j] == len(high), cell
+            assert sweep["newly_high_risk"][i][j] == len(high - current), cell
+            assert sweep["no_longer_high_risk"][i][j] == len(current - high), cell
+            assert sweep["reclassified"][i][j] == len(high ^ current), cell
+
+def test_analysis_routes_need_a_snapshot_and_return_full_grids(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.services.cohort_store.COHORT_SNAPSHOT_DIR", tmp_path)
+    monkeypatch.setattr("backend.services.cohort_store._loaded", None)
+    repository = InMemoryAssessmentRepository()
+    app = FastAPI()
+    app.include_router(analysis_router, prefix="/api")
+    app.dependency_overrides[database.get_read_repository] = lambda: repository
+    client = TestClient(app)
+    
+    whatif = {"b2m_cutoffs": [5.5, 4.0, 5.5], "creatinine_cutoffs": [1.2, 2.0]}
+    sweep = {"b2m": {"start": 4.0, "stop": 6.0, "steps": 5}, "creatinine": {"start": 1.0, "stop": 1.4, "steps": 3}}
+    assert client.post("/api/whatif", json=whatif).status_code == 409
+    assert client.post("/api/analysis/threshold-sweep", json=sweep).status_code == 409
+    
+    asyncio.run(repository.insert_assessments([
+        {**document, "id": str(index)} for index, document in enumerate(cohort(50))
+    ]))
+    assert client.post("/api/cohort/snapshot").json()["count"] == 50
+    
+    response = client.post("/api/whatif", json=whatif).json()
+    assert response["b2m_cutoffs"] == whatif["b2m_cutoffs"]
+    assert [len(row) for row in response["high_risk"]] == [2, 2, 2]
+    assert response["high_risk"][0] == response["high_risk"][2]
+    
+    response = client.post("/api/analysis/threshold-sweep", json=sweep).json()
+    assert response["b2m_cutoffs"] == [4.0, 4.5, 5.0, 5.5, 6.0]
+    for grid in ("high_risk", "newly_high_risk", "no_longer_high_risk", "reclassified"):
+        assert [len(row) for row in response[grid]] == [3] * 5, grid
+    # Nobody is reclassified at the current cutoffs
+    assert response["reclassified"][3][1] == 0
+    assert response["high_risk"][3][1] == response["current_high_risk"]
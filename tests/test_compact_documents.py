@@ -0,0 +1,96 @@
+import bson
+
+from backend.benchmarks.equivalence import generate_cases
+from backend.migrations.compact_documents import assessment_replacement
+from backend.models.documents import render_assessment
+from backend.models.patient_assessment import PatientAssessment
+from backend.repositories.compact import (
+    COMPACT_SCHEMA_VERSION,
+    compact_assessment,
+    compact_calculation,
+    compact_update,
+    expand_assessment,
+    expand_calculation,
+    stored_fields
+)
+from backend.services.risk_calculator import IMWGRiskCalculator
+from tests.test_documents import stored_assessment
+
+CASES = list(generate_cases(500, seed=2))
+
+def calculated(case: dict) -> dict:
+    assessment = PatientAssessment(**case)
+    result = IMWGRiskCalculator.calculate_risk(assessment)
+    return stored_assessment(
+        **case,
+        risk_result=result.risk_result.value,
+        risk_factors=[factor.model_dump() for factor in result.risk_factors],
+        total_risk_factors=result.total_risk_factors,
+        latest_result=None,
+    )
+
+def test_assessments_render_identically_after_round_trip():
+    for case in CASES:
+        document = calculated(case)
+        compact = compact_assessment(document)
+        assert compact["schema_version"] == COMPACT_SCHEMA_VERSION, case
+        assert len(bson.encode(compact)) < len(bson.encode(document))
+        assert render_assessment(expand_assessment(compact)) == render_assessment(document), case
+
+def test_projected_reads_expand_requested_fields():
+    compact = compact_assessment(calculated(CASES[0]))
+    projected = {field: compact[field] for field in stored_fields(["id", "del17p_tp53"]) if field in compact}
+    expanded = expand_assessment(projected)
+    assert expanded["del17p_tp53"] == CASES[0]["del17p_tp53"]
+    assert "risk_factors" not in expanded
+
+def test_uncompactable_documents_are_stored_as_they_are():
+    legacy = stored_assessment(schema_version=None)
+    assert compact_assessment(legacy) is legacy
+    unknown = stored_assessment(del17p_tp53="pending")
+    assert compact_assessment(unknown) is unknown
+    edited = stored_assessment(risk_factors=[{"criterion": "Other", "description": "", "weight": 1}])
+    assert compact_assessment(edited) is edited
+
+def test_compact_update_sets_and_clears_criteria_bits():
+    compact = compact_assessment(stored_assessment())
+    updates, unset = compact_update(
+        {"del17p_tp53": "negative", "del1p32_1q": "positive", "clinical_notes": "Revised"},
+        compact["criteria"]
+    )
+    expanded = expand_assessment({**compact, **updates})
+    assert (expanded["del17p_tp53"], expanded["translocation_combo"], expanded["del1p32_1q"]) == (
+        "negative", "negative", "positive"
+    )
+    assert expanded["clinical_notes"] == "Revised"
+    
+    updates, unset = compact_update({"risk_factors": [], "total_risk_factors": 0})
+    assert updates == {"factor_mask": 0} and unset == ["b2m_factor"]
+
+def test_calculations_round_trip():
+    for case in CASES:
+        assessment = PatientAssessment(**case)
+        result = IMWGRiskCalculator.calculate_risk(assessment)
+        row = {**result.model_dump(), "b2m_value": case["b2m_value"], "creatinine_value": case["creatinine_value"]}
+        compact = compact_calculation(row)
+        assert compact["schema_version"] == COMPACT_SCHEMA_VERSION, case
+        expanded = expand_calculation(compact)
+        assert expanded == result.model_dump(mode="python") | {"risk_result": result.risk_result.value}, case
+        # Rows from before lab values were recorded are kept as they are
+        assert compact_calculation(result.model_dump()) == result.model_dump()
+
+def test_migration_compacts_unstamped_legacy_assessments():
+    legacy = stored_assessment()
+    del legacy["schema_version"], legacy["version"], legacy["latest_result"]
+    
+    query, compact = assessment_replacement(legacy)
+    assert query == {"_id": legacy["_id"], "version": None, "schema_version": {"$exists": False}}
+    assert compact["schema_version"] == COMPACT_SCHEMA_VERSION
+    assert (compact["_id"], compact["id"], compact["version"]) == (legacy["_id"], legacy["id"], 1)
+    assert render_assessment(expand_assessment(compact)) == render_assessment(legacy)
+    
+    stamped = stored_assessment()
+    query, compact = assessment_replacement(stamped)
+    assert query["schema_version"] == 1 and query["version"] == stamped["version"]
+    assert assessment_replacement(compact) is None
+    assert assessment_replacement({**legacy, "del17p_tp53": None}) is None
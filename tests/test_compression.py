@@ -0,0 +1,31 @@
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+from backend.middleware.compression import CompressionMiddleware
+from backend.services.etags import etag_matches
+
+ETAG = '"3.abc123"'
+
+def test_each_content_coding_gets_its_own_etag():
+    app = FastAPI()
+    
+    @app.get("/resource")
+    async def resource(if_none_match: str = Header(None)):
+        if etag_matches(if_none_match, ETAG):
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return Response(b'{"value": "' + b"x" * 2000 + b'"}', media_type="application/json", headers={"ETag": ETAG})
+    
+    app.add_middleware(CompressionMiddleware)
+    client = TestClient(app)
+    
+    gzipped = client.get("/resource", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == '"3.abc123-gzip"'
+    identity = client.get("/resource", headers={"Accept-Encoding": "identity"})
+    assert identity.headers["etag"] == ETAG
+    
+    revalidated = client.get("/resource", headers={"Accept-Encoding": "gzip", "If-None-Match": '"3.abc123-gzip"'})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"3.abc123-gzip"'
+    revalidated = client.get("/resource", headers={"Accept-Encoding": "identity", "If-None-Match": ETAG})
+    assert (revalidated.status_code, revalidated.headers["etag"]) == (304, ETAG)
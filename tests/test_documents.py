@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from backend.models.documents import (
+    ASSESSMENT_SCHEMA_VERSION,
+    HISTORY_SCHEMA_VERSION,
+    render_assessment,
+    render_assessments,
+    render_history
+)
+from backend.models.patient_assessment import (
+    AssessmentHistory,
+    PatientAssessment,
+    PatientAssessmentResponse
+)
+from backend.services.risk_calculator import IMWGRiskCalculator
+
+def stored_assessment(**overrides) -> dict:
+    """An assessment document as the API stores it after a calculation"""
+    
+    assessment = PatientAssessment(
+        patient_id="P1",
+        patient_name="Jane Doe",
+        del17p_tp53="positive",
+        translocation_combo="negative",
+        del1p32_1q="negative",
+        b2m_value=6.0,
+        creatinine_value=1.0,
+        clinical_notes="Initial assessment",
+    )
+    mask = IMWGRiskCalculator.criteria_mask(assessment)
+    result = IMWGRiskCalculator.build_result(assessment, mask)
+    document = assessment.model_dump()
+    document.update(
+        risk_result=result.risk_result.value,
+        risk_factors=[factor.model_dump() for factor in result.risk_factors],
+        total_risk_factors=result.total_risk_factors,
+        latest_result=IMWGRiskCalculator.snapshot(result, mask).model_dump(),
+        status="COMPLETED",
+        updated_at=datetime(2024, 5, 1, 12, 30, 15, 123000),
+        schema_version=ASSESSMENT_SCHEMA_VERSION,
+        _id="665f1c2e9b1e8a3d4c5b6a79",
+    )
+    document.update(overrides)
+    return document
+
+def model_json(model, documents: List[dict]) -> bytes:
+    return TypeAdapter(List[model]).dump_json([model(**document) for document in documents])
+
+def test_trusted_assessments_render_like_the_response_model():
+    documents = [stored_assessment(), stored_assessment(b2m_value=None, creatinine_value=None)]
+    assert render_assessments(documents) == model_json(PatientAssessmentResponse, documents)
+    assert render_assessment(documents[0]) == PatientAssessmentResponse(**documents[0]).model_dump_json().encode()
+
+def test_legacy_assessments_are_validated():
+    # Written before schema versions, missing fields that now have defaults
+    legacy = stored_assessment()
+    for field in ("schema_version", "latest_result", "version", "updated_at"):
+        del legacy[field]
+    assert render_assessments([legacy]) == model_json(PatientAssessmentResponse, [legacy])
+    assert json.loads(render_assessment(legacy))["version"] == 1
+
+def test_history_renders_like_the_model():
+    records = [
+        {
+            **AssessmentHistory(
+                assessment_id="a1",
+                action="updated",
+                changes={"clinical_notes": "x", "updated_at": datetime(2024, 5, 1, 12, 0)},
+                timestamp=datetime(2024, 5, 1, 12, 0, 1),
+            ).model_dump(),
+            "schema_version": HISTORY_SCHEMA_VERSION,
+            "_id": "665f1c2e9b1e8a3d4c5b6a7a",
+        },
+        {"id": "h0", "assessment_id": "a1", "action": "created", "timestamp": datetime(2024, 4, 30)},
+    ]
+    assert render_history(records) == model_json(AssessmentHistory, records)
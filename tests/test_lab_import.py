@@ -0,0 +1,103 @@
+import asyncio
+import io
+
+import pytest
+from pymongo.errors import BulkWriteError
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend import database
+from backend.repositories.memory import InMemoryAssessmentRepository
+from backend.routes.imports import router as imports_router
+from backend.services.lab_import import LabFileReader
+
+HEADER = "MRN,del(17p),Translocation,del1p32_1q,B2M (mg/L),Creatinine,Notes\n"
+
+def read_all(text: str, chunk_rows: int):
+    reader = LabFileReader(io.BytesIO(text.encode()), chunk_rows=chunk_rows)
+    batches = []
+    while (batch := reader.next_batch()) is not None:
+        batches.append(batch)
+    return reader, batches
+
+def test_rows_are_mapped_and_validated_by_chunk():
+    reader, batches = read_all(
+        HEADER
+        + "P1,Positive,neg,negative,6.1,1.2,  \n"
+        + "P2,,maybe,negative,60,abc,x\n"
+        + "P3,positive,negative,negative,3.0,,x\n"
+        + "P4,negative,negative\n",
+        chunk_rows=2
+    )
+    assert reader.columns["MRN"] == "patient_id"
+    assert [batch.first_row for batch in batches] == [1, 3]
+    
+    (row, first), = batches[0].rows
+    assert row == 1
+    assert (first.patient_id, first.del17p_tp53, first.translocation_combo) == ("P1", "positive", "negative")
+    assert (first.b2m_value, first.clinical_notes) == (6.1, None)
+    assert batches[0].errors == {2: [
+        "del(17p) and/or TP53 mutation status is required",
+        "High-risk translocation status must be 'positive' or 'negative'",
+        "β2-microglobulin value must be between 0 and 50 mg/L",
+        "creatinine_value: Input should be a valid number, unable to parse string as a number",
+    ]}
+    # Rows passing the column checks still get the model's own checks
+    assert batches[1].errors == {
+        3: ["Creatinine value is required when β2-microglobulin is provided"],
+        4: ["del(1p32) patterns status is required"],
+    }
+
+def test_files_without_the_criteria_are_rejected():
+    with pytest.raises(ValueError, match="Missing required columns: del1p32_1q"):
+        LabFileReader(io.BytesIO(b"del17p,translocation,b2m\npositive,negative,3\n"))
+    with pytest.raises(ValueError):
+        LabFileReader(io.BytesIO(b""))
+
+def test_import_inserts_valid_rows_and_reports_the_rest(monkeypatch):
+    monkeypatch.setattr("backend.services.lab_import.IMPORT_CHUNK_ROWS", 10)
+    repository = InMemoryAssessmentRepository()
+    app = FastAPI()
+    app.include_router(imports_router, prefix="/api")
+    app.dependency_overrides[database.get_assessment_repository] = lambda: repository
+    client = TestClient(app)
+    
+    rows = [f"P{index},positive,negative,negative,{99 if index % 10 == 3 else 6},1.0,\n" for index in range(35)]
+    response = client.post("/api/import/csv", files={"file": ("labs.csv", HEADER + "".join(rows), "text/csv")})
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["rows"], summary["imported"], summary["failed"]) == (35, 31, 4)
+    # Four batches, each reporting its own rows
+    assert [error["row"] for error in summary["errors"]] == [4, 14, 24, 34]
+    
+    (document,) = asyncio.run(repository.find_assessments(patient_id="P0"))
+    assert document["del17p_tp53"] == "positive"
+    
+    response = client.post("/api/import/csv", files={"file": ("labs.csv", "a,b\n1,2\n", "text/csv")})
+    assert response.status_code == 400
+
+def test_partly_failed_inserts_report_what_was_stored():
+    class FailingRepository(InMemoryAssessmentRepository):
+        async def insert_assessments(self, documents):
+            # The second document is rejected, the others are stored
+            await super().insert_assessments(documents[:1] + documents[2:])
+            raise BulkWriteError({
+                "nInserted": len(documents) - 1,
+                "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+            })
+    
+    repository = FailingRepository()
+    app = FastAPI()
+    app.include_router(imports_router, prefix="/api")
+    app.dependency_overrides[database.get_assessment_repository] = lambda: repository
+    client = TestClient(app)
+    
+    rows = [f"P{index},positive,negative,negative,6,1.0,\n" for index in range(3)]
+    summary = client.post("/api/import/csv", files={"file": ("labs.csv", HEADER + "".join(rows), "text/csv")}).json()
+    assert (summary["rows"], summary["imported"], summary["failed"]) == (3, 2, 1)
+    assert summary["errors"] == [{"row": 2, "errors": ["Not stored: duplicate key"]}]
+    assert summary["error"]
+    # History is written for the stored rows only
+    stored = asyncio.run(repository.find_assessments())
+    assert sorted(document["patient_id"] for document in stored) == ["P0", "P2"]
+    assert all(asyncio.run(repository.history(document["id"])) for document in stored)
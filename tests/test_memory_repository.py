@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.repositories.memory import InMemoryAssessmentRepository
+
+START = datetime(2024, 5, 1, 12, 0)
+
+def assessment(index: int, **fields) -> dict:
+    return {
+        "id": f"a{index}",
+        "patient_id": f"P{index % 3}",
+        "physician_name": "Dr. Smith" if index % 2 else "Dr. Jones",
+        "status": "DRAFT",
+        "version": 1,
+        "created_at": START + timedelta(minutes=index),
+        **fields
+    }
+
+def test_find_uses_indexes_and_sorts_newest_first():
+    async def scenario():
+        repository = InMemoryAssessmentRepository()
+        for index in range(10):
+            await repository.insert_assessment(assessment(index))
+        
+        ids = lambda documents: [document["id"] for document in documents]
+        assert ids(await repository.find_assessments(limit=3)) == ["a9", "a8", "a7"]
+        assert ids(await repository.find_assessments(skip=8, limit=5)) == ["a1", "a0"]
+        assert ids(await repository.find_assessments(patient_id="P1")) == ["a7", "a4", "a1"]
+        assert ids(await repository.find_assessments(ids=["a2", "a5", "missing"])) == ["a5", "a2"]
+        assert ids(await repository.find_assessments(patient_id="P1", physician_name="^dr. s")) == ["a7", "a1"]
+        assert await repository.get_assessment("a3", ["id", "version"]) == {"id": "a3", "version": 1}
+        
+        await repository.delete_assessment("a9")
+        assert ids(await repository.find_assessments(limit=1)) == ["a8"]
+        assert await repository.get_assessment("a9") is None
+    
+    asyncio.run(scenario())
+
+def test_updates_compare_versions_and_advance_the_change_token():
+    async def scenario():
+        repository = InMemoryAssessmentRepository()
+        await repository.insert_assessment(assessment(1))
+        token = await repository.change_token()
+        
+        updated = await repository.update_assessment("a1", {"status": "COMPLETED"}, expected_versions=[1])
+        assert updated["version"] == 2 and updated["status"] == "COMPLETED"
+        assert await repository.update_assessment("a1", {"status": "DRAFT"}, expected_versions=[1]) is None
+        assert await repository.update_assessment("missing", {"status": "DRAFT"}) is None
+        assert await repository.change_token() == token + 1
+        
+        # Returned documents are copies of the stored ones
+        updated["status"] = "DRAFT"
+        assert (await repository.get_assessment("a1"))["status"] == "COMPLETED"
+    
+    asyncio.run(scenario())
+
+def test_timeline_and_transitions_are_chronological():
+    async def scenario():
+        repository = InMemoryAssessmentRepository()
+        entries = [
+            {"patient_id": "P1", "risk_result": "STANDARD_RISK", "transition": False, "calculated_at": START},
+            {"patient_id": "P1", "risk_result": "HIGH_RISK", "previous_risk_result": "STANDARD_RISK",
+             "transition": True, "calculated_at": START + timedelta(days=2)},
+            {"patient_id": "P2", "risk_result": "HIGH_RISK", "previous_risk_result": "STANDARD_RISK",
+             "transition": True, "calculated_at": START + timedelta(days=1)},
+        ]
+        await repository.insert_timeline(entries)
+        
+        assert await repository.latest_risk_results(["P1", "P2", "P3"]) == {"P1": "HIGH_RISK", "P2": "HIGH_RISK"}
+        transitions = await repository.risk_transitions("STANDARD_RISK", "HIGH_RISK")
+        assert [entry["patient_id"] for entry in transitions] == ["P2", "P1"]
+        since = await repository.risk_transitions("STANDARD_RISK", "HIGH_RISK", since=START + timedelta(days=1, hours=1))
+        assert [entry["patient_id"] for entry in since] == ["P1"]
+        assert await repository.risk_transitions("HIGH_RISK", "STANDARD_RISK") == []
+    
+    asyncio.run(scenario())
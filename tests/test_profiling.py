@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routes.debug import router as debug_router
+from backend.services.profiling import EventLoopMonitor, sample_stacks
+
+def busy_wait(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sampler_collapses_another_threads_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_wait, args=(stop,))
+    worker.start()
+    try:
+        samples = sample_stacks(worker.ident, 0.1, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+    assert sum(samples.values()) > 5
+    assert all("tests/test_profiling.py:busy_wait" in stack.split(";") for stack in samples)
+
+def test_monitor_measures_lag_and_logs_the_blocking_stack(caplog):
+    monitor = EventLoopMonitor(interval=0.01, threshold=0.05)
+    
+    def block_the_loop():
+        time.sleep(0.3)
+    
+    async def scenario():
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        block_the_loop()
+        await asyncio.sleep(0.05)
+        task.cancel()
+    
+    with caplog.at_level(logging.WARNING, logger="backend.services.profiling"):
+        asyncio.run(scenario())
+    assert monitor.percentiles()["max_ms"] >= 200
+    assert any("block_the_loop" in record.getMessage() for record in caplog.records)
+
+def test_profile_endpoint_is_admin_only(monkeypatch):
+    app = FastAPI()
+    app.include_router(debug_router, prefix="/api")
+    client = TestClient(app)
+    
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/api/debug/profile?seconds=0.05").status_code == 404
+    
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get("/api/debug/profile?seconds=0.05", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    response = client.get("/api/debug/profile?seconds=0.05", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    # Every line is "stack count"
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
@@ -0,0 +1,68 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.services.query_advisor import plan_stages, review_plan
+
+def explained(plan: dict) -> dict:
+    return {"queryPlanner": {"winningPlan": plan}}
+
+def test_flags_collection_scans_and_in_memory_sorts():
+    plan = {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}
+    assert [finding.stage for finding in review_plan(explained(plan), "full", ("status",))] == ["COLLSCAN", "SORT"]
+
+def test_index_walks_pass_and_uncovered_summaries_are_flagged():
+    covered = {"stage": "LIMIT", "inputStage": {"stage": "PROJECTION_COVERED", "inputStage": {"stage": "IXSCAN"}}}
+    assert review_plan(explained(covered), "summary", ("status",)) == []
+    # Plans from the slot-based engine nest the tree under queryPlan
+    fetched = {"queryPlan": {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+    assert list(plan_stages(fetched)) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert review_plan(explained(fetched), "full", ()) == []
+    assert [finding.stage for finding in review_plan(explained(fetched), "summary", ())] == ["FETCH"]
+
+def mongo_available(url: str) -> bool:
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    
+    client = MongoClient(url, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+@pytest.mark.skipif(
+    not mongo_available(os.environ.get("MONGO_URL", "mongodb://localhost:27017")),
+    reason="MongoDB is not reachable"
+)
+def test_listing_indexes_serve_every_query_shape(monkeypatch):
+    monkeypatch.setenv("DB_NAME", "imwg_query_advisor_test")
+    from backend import database
+    from backend.services.query_advisor import advise
+    
+    async def scenario():
+        db = database.get_db()
+        try:
+            await database.get_client().drop_database(db.name)
+            await database.init_database()
+            start = datetime(2024, 5, 1)
+            await db.assessments.insert_many([{
+                "id": f"a{index}",
+                "patient_id": f"P-{index % 50:04d}",
+                "physician_name": f"Dr {index % 7}",
+                "risk_result": "HIGH_RISK" if index % 4 == 0 else "STANDARD_RISK",
+                "status": "COMPLETED" if index % 3 else "DRAFT",
+                "created_at": start + timedelta(minutes=index),
+            } for index in range(2000)])
+            return await advise(db)
+        finally:
+            await database.get_client().drop_database(db.name)
+            database.close_client()
+    
+    findings = asyncio.run(scenario())
+    # An unanchored case-insensitive regex cannot use index bounds whatever the indexes are
+    assert [str(finding) for finding in findings if "physician_name" not in finding.filters] == []
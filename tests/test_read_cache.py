@@ -0,0 +1,118 @@
+import asyncio
+
+from backend.services.read_cache import SingleFlightCache
+from backend.services.shared_state import SharedStateStore
+
+class CountingLoader:
+    def __init__(self, value="document", delay=0.01):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+def test_concurrent_reads_share_one_load():
+    async def scenario():
+        cache = SingleFlightCache(ttl=0)
+        loader = CountingLoader()
+        results = await asyncio.gather(*(cache.get("key", loader) for _ in range(50)))
+        assert results == ["document"] * 50
+        assert loader.calls == 1
+        
+        # Nothing is cached with a zero TTL
+        await cache.get("key", loader)
+        assert loader.calls == 2
+    
+    asyncio.run(scenario())
+
+def test_cached_value_is_served_until_invalidated():
+    async def scenario():
+        cache = SingleFlightCache(ttl=60)
+        loader = CountingLoader()
+        await cache.get("key", loader)
+        await cache.get("key", loader)
+        assert loader.calls == 1
+        
+        cache.invalidate("key")
+        await cache.get("key", loader)
+        assert loader.calls == 2
+    
+    asyncio.run(scenario())
+
+def test_load_invalidated_while_running_is_not_cached():
+    async def scenario():
+        cache = SingleFlightCache(ttl=60)
+        stale = CountingLoader("old", delay=0.05)
+        read = asyncio.create_task(cache.get("key", stale))
+        await asyncio.sleep(0.01)
+        
+        # A write lands while the read is in flight
+        cache.invalidate("key")
+        assert await read == "old"
+        
+        fresh = CountingLoader("new")
+        assert await cache.get("key", fresh) == "new"
+        assert fresh.calls == 1
+    
+    asyncio.run(scenario())
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        cache = SingleFlightCache(ttl=60)
+        calls = 0
+        
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database unavailable")
+        
+        results = await asyncio.gather(
+            *(cache.get("key", failing) for _ in range(5)), return_exceptions=True
+        )
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        
+        loader = CountingLoader()
+        assert await cache.get("key", loader) == "document"
+    
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_cancel_the_shared_load():
+    async def scenario():
+        cache = SingleFlightCache(ttl=60)
+        loader = CountingLoader(delay=0.05)
+        first = asyncio.create_task(cache.get("key", loader))
+        second = asyncio.create_task(cache.get("key", loader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "document"
+        assert loader.calls == 1
+    
+    asyncio.run(scenario())
+
+def test_writes_through_one_worker_reach_the_others(tmp_path):
+    async def scenario():
+        store = SharedStateStore(tmp_path / "state.sqlite3")
+        writer, reader = SingleFlightCache(ttl=60, shared=store), SingleFlightCache(ttl=60, shared=store)
+        stored = CountingLoader("old", delay=0)
+        await writer.get("key", stored)
+        await reader.get("key", stored)
+        await reader.get("other", CountingLoader(delay=0))
+        assert await reader.get("key", stored) == "old"
+        assert stored.calls == 2
+        
+        # The write goes through the other worker
+        stored.value = "new"
+        writer.invalidate("key")
+        assert await reader.get("key", stored) == "new"
+        assert await writer.get("key", stored) == "new"
+        assert await reader.get("key", stored) == "new"
+        assert stored.calls == 4
+        # Values of other keys are still served from the cache
+        assert await reader.get("other", CountingLoader("reloaded")) == "document"
+    
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from backend import database
+
+def test_lagging_reads_prefer_secondaries_with_a_staleness_bound(monkeypatch):
+    monkeypatch.setenv("READ_MAX_STALENESS_SECONDS", "120")
+    try:
+        db = database.get_secondary_db()
+        assert db.read_preference.mongos_mode == "secondaryPreferred"
+        assert db.read_preference.max_staleness == 120
+        assert db.read_concern.level == "majority"
+        # The primary handle keeps the client defaults
+        assert database.get_db().read_preference.mongos_mode == "primary"
+    finally:
+        database.close_client()
+
+def test_memory_engine_serves_both_routes(monkeypatch):
+    monkeypatch.setenv("STORAGE_ENGINE", "memory")
+    
+    async def first(dependency):
+        async for repository in dependency():
+            return repository
+    
+    async def scenario():
+        return await first(database.get_assessment_repository), await first(database.get_read_repository)
+    
+    primary, secondary = asyncio.run(scenario())
+    assert primary is secondary is database.get_repository()
+
+# A local three-member replica set, e.g.
+# mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0
+REPLICA_SET_URL = os.environ.get("MONGO_REPLICA_SET_URL")
+
+@pytest.mark.skipif(not REPLICA_SET_URL, reason="MONGO_REPLICA_SET_URL is not set")
+def test_routes_reads_on_a_replica_set(monkeypatch):
+    monkeypatch.setenv("MONGO_URL", REPLICA_SET_URL)
+    monkeypatch.setenv("DB_NAME", "imwg_read_routing_test")
+    monkeypatch.setenv("STORAGE_ENGINE", "mongo")
+    database.close_client()
+    
+    async def scenario():
+        client = database.get_client()
+        try:
+            await client.drop_database("imwg_read_routing_test")
+            assessment_id = str(uuid.uuid4())
+            async for primary in database.get_assessment_repository():
+                await primary.insert_assessment({
+                    "id": assessment_id, "patient_id": "P1", "created_at": datetime.utcnow(), "version": 1
+                })
+                # Read-your-writes on the primary within the request's session
+                assert (await primary.get_assessment(assessment_id))["id"] == assessment_id
+                cursor = primary.db.assessments.find({}, session=primary.session)
+                await cursor.to_list(length=1)
+                assert cursor.address == client.primary
+            
+            async for secondary in database.get_read_repository():
+                cursor = secondary.db.assessments.find({}, session=secondary.session)
+                await cursor.to_list(length=1)
+                assert cursor.address in client.secondaries
+        finally:
+            await client.drop_database("imwg_read_routing_test")
+            database.close_client()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+import shutil
+
+import pytest
+
+from backend.benchmarks.equivalence import (
+    NodeEngine,
+    classification,
+    generate_cases,
+    scalar_results,
+    vectorized_masks
+)
+from backend.models.patient_assessment import PatientAssessment
+from backend.services.risk_calculator import IMWGRiskCalculator
+from tests.reference_calculator import ReferenceRiskCalculator
+
+CASES = list(generate_cases(5000, seed=1))
+
+def test_vectorized_masks_match_scalar():
+    pytest.importorskip("numpy")
+    
+    masks = vectorized_masks(CASES)
+    
+    for case, mask in zip(CASES, masks):
+        assert int(mask) == IMWGRiskCalculator.criteria_mask(PatientAssessment(**case)), case
+
+def test_results_match_the_reference_calculator():
+    for case in CASES[:2000]:
+        assessment = PatientAssessment(**case)
+        expected = ReferenceRiskCalculator.calculate_risk(assessment)
+        result = IMWGRiskCalculator.calculate_risk(assessment)
+        mask = IMWGRiskCalculator.criteria_mask(assessment)
+        rebuilt = IMWGRiskCalculator.build_result(assessment, mask, calculated_at=result.calculated_at)
+        for actual in (result, rebuilt):
+            assert actual.risk_result == expected.risk_result, case
+            assert actual.risk_factors == expected.risk_factors, case
+            assert actual.clinical_interpretation == expected.clinical_interpretation, case
+            assert actual.recommendations == expected.recommendations, case
+
+def test_text_quotes_the_lab_values():
+    labs = {"del17p_tp53": "negative", "translocation_combo": "negative", "del1p32_1q": "negative"}
+    
+    result = IMWGRiskCalculator.calculate_risk(PatientAssessment(**labs, b2m_value=6.25, creatinine_value=0.9))
+    assert result.risk_factors[0].description == "β2M: 6.25 mg/L (≥5.5) with creatinine: 0.9 mg/dL (<1.2)"
+    assert "1. High β2-microglobulin with normal creatinine: β2M: 6.25 mg/L" in result.clinical_interpretation
+    
+    result = IMWGRiskCalculator.calculate_risk(PatientAssessment(**labs, b2m_value=4.5, creatinine_value=1.3))
+    assert result.clinical_interpretation.endswith(
+        "Note: β2-microglobulin level of 4.5 mg/L is elevated but does not meet high-risk criteria."
+    )
+    assert result.recommendations[0] == "Standard treatment protocols are appropriate"
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_server_js_classification_matches_python():
+    engine = NodeEngine(shutil.which("node"))
+    try:
+        actual = engine.results(CASES)
+    finally:
+        engine.close()
+    
+    for case, expected, result in zip(CASES, scalar_results(CASES), actual):
+        assert "error" not in result, (case, result)
+        assert classification(result) == classification(expected), case
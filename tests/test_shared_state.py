@@ -0,0 +1,14 @@
+import os
+
+from backend.services.shared_state import SharedStateStore
+
+def test_counters_of_exited_workers_are_dropped(tmp_path):
+    store = SharedStateStore(tmp_path / "state.sqlite3")
+    host = os.uname().nodename
+    store.publish_counters(f"{host}:{os.getpid()}", {"requests_total": 1})
+    # No such process, and a worker of a replaced container
+    store.publish_counters(f"{host}:{2 ** 22 + 1}", {"requests_total": 5})
+    store.publish_counters("old-container:1", {"requests_total": 7})
+    
+    assert store.aggregate_counters() == {"requests_total": 1}
+    assert store.active_workers() == 1